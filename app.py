@@ -1,32 +1,80 @@
-from flask import Flask, render_template, jsonify, request
+from flask import (Blueprint, Flask, current_app, render_template, jsonify, request, g, has_request_context,
+                   send_from_directory, stream_with_context)
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+import click
+import hmac
+import inspect
 import json
 import random
 import os
+import secrets
 import logging
-
-app = Flask(__name__)
-
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
-app.logger.setLevel(logging.DEBUG)
+import time
+
+from compound_catalog import CompoundCatalog, load_catalog
+from compound_index import composition_key, element_mask
+import element_table
+import equation_balancer
+import formula_engine as formula_engine_module
+import formula_parser
+from compound_store import load_store
+from data_version import DataReloader, DataSnapshot
+from element_query import QueryError, query_from_args
+from element_store import ElementStore
+from equation_balancer import BalanceError, format_equation
+from formula_engine import OXIDATION_STATES, FormulaEngine, electronegativity
+from formula_parser import FormulaError
+from metrics import Metrics
+from mix_table import build_table, generator_fingerprint, load_table
+from precompressed import PrecompressedJSON
+from static_assets import AssetManifest
+
+# Every route, hook and command; create_app() registers them on a new app
+bp = Blueprint('chemcraft', __name__, cli_group=None)
+
+# Configure logging; set LOG_LEVEL=DEBUG for verbose output
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL)
+
+def current_metrics():
+    """Request metrics of the current app, exposed at /metrics (see metrics.py for the multi-worker setup)"""
+    return current_app.extensions['metrics']
+
+@bp.before_app_request
+def start_request_timer():
+    if current_metrics().enabled:
+        g.request_start = time.perf_counter()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Labelled by view name, without the blueprint prefix
+        endpoint = (request.endpoint or 'unmatched').removeprefix(f'{bp.name}.')
+        current_metrics().observe_request(endpoint, request.method, response.status_code,
+                                          time.perf_counter() - start, response.content_length)
+    return response
 
 # Add error handlers for debugging
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
-    app.logger.error(f"404 error: {request.url}")
+    current_app.logger.error(f"404 error: {request.url}")
     return jsonify({'error': 'Page not found', 'url': request.url}), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
-    app.logger.error(f"500 error: {error}")
+    current_app.logger.error(f"500 error: {error}")
     return jsonify({'error': 'Internal server error'}), 500
 
-# Load elements data
-def load_elements():
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+ELEMENTS_FILE = os.path.join(DATA_DIR, 'elements.json')
+COMPOUNDS_FILE = os.environ.get('COMPOUNDS_FILE', os.path.join(DATA_DIR, 'compounds.json'))
+
+# Load elements data; strict loads (hot reloads) raise instead of falling back to empty
+def load_elements(logger, strict=False):
     try:
-        file_path = os.path.join(os.path.dirname(__file__), 'data', 'elements.json')
-        app.logger.info(f"Loading elements from: {file_path}")
-        with open(file_path, 'r') as f:
+        logger.info(f"Loading elements from: {ELEMENTS_FILE}")
+        with open(ELEMENTS_FILE, 'r') as f:
             data = json.load(f)
 
         # Handle both direct array and nested structure
@@ -35,64 +83,220 @@ def load_elements():
         elif isinstance(data, list):
             elements = data
         else:
-            app.logger.error(f"Unexpected data structure in elements.json")
-            return []
+            raise ValueError("Unexpected data structure in elements.json")
+        if strict and not elements:
+            raise ValueError("elements.json has no elements")
 
-        app.logger.info(f"Loaded {len(elements)} elements")
-        return elements
+        logger.info(f"Loaded {len(elements)} elements")
+        return ElementStore(elements)
     except Exception as e:
-        app.logger.error(f"Error loading elements: {e}")
-        return []
+        logger.error(f"Error loading elements: {e}")
+        if strict:
+            raise
+        return ElementStore([])
 
 # Load compounds data
-def load_compounds():
-    try:
-        file_path = os.path.join(os.path.dirname(__file__), 'data', 'compounds.json')
-        app.logger.info(f"Loading compounds from: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+COMPOUND_STORE = os.environ.get('COMPOUND_STORE', 'snapshot')
 
-        # Handle both direct array and nested structure
-        if isinstance(data, dict) and 'compounds' in data:
-            compounds = data['compounds']
-        elif isinstance(data, list):
-            compounds = data
+def load_compounds(table, logger, strict=False):
+    """Open the compound store, rebuilding it when the catalogue file changed"""
+    try:
+        if COMPOUND_STORE == 'sqlite':
+            path = os.environ.get('COMPOUNDS_DB', os.path.join(DATA_DIR, 'compounds.sqlite'))
+            logger.info(f"Loading compounds from: {path}")
+            compounds = load_store(COMPOUNDS_FILE, path, table, log=logger.info)
         else:
-            app.logger.error(f"Unexpected data structure in compounds.json")
-            return []
-
-        app.logger.info(f"Loaded {len(compounds)} compounds")
+            path = os.environ.get('COMPOUNDS_SNAPSHOT', os.path.join(DATA_DIR, 'compounds.snapshot'))
+            logger.info(f"Loading compounds from: {path}")
+            compounds = load_catalog(COMPOUNDS_FILE, path, table, log=logger.info)
+        logger.info(f"Loaded {len(compounds)} compounds")
         return compounds
     except Exception as e:
-        app.logger.error(f"Error loading compounds: {e}")
-        return []
+        logger.error(f"Error loading compounds: {e}")
+        if strict:
+            raise
+        return CompoundCatalog.from_compounds([], table)
 
-elements_data = load_elements()
-compounds_data = load_compounds()
+# Large catalogues are streamed from the store instead of held compressed in memory
+COMPOUNDS_PRECOMPRESS_LIMIT = int(os.environ.get('COMPOUNDS_PRECOMPRESS_LIMIT', 8 * 1024 * 1024))
 
-@app.route('/')
+# Precomputed dynamic compounds written by `flask --app app build-mix-table`
+MIX_TABLE_FILE = os.environ.get('MIX_TABLE_FILE', os.path.join(DATA_DIR, 'mix_table.bin'))
+
+def mix_table_fingerprint(elements):
+    """Identifies the element data and generator code a mix table's results come from.
+
+    The code is the source of build_dynamic_compound() and its helpers (see
+    MIX_TABLE_GENERATOR), the tables they read and the modules they call, so
+    any change to how results are generated retires older tables.
+    """
+    code = [inspect.getsource(part) for part in MIX_TABLE_GENERATOR]
+    tables = json.dumps([METAL_CATEGORIES, NONMETAL_CATEGORIES, DIATOMIC_ELEMENTS, ANION_NAMES, HYDRIDE_NAMES,
+                         NONMETAL_FIRST_HYDRIDES, GREEK_PREFIXES, ROMAN_NUMERALS], sort_keys=True)
+    return generator_fingerprint(json.dumps(elements.table.to_dicts(), sort_keys=True), tables, *code)
+
+def build_data_snapshot(app, strict=False):
+    """Load both datasets and build every index and payload derived from them"""
+    elements = load_elements(app.logger, strict)
+    compounds = load_compounds(elements.table, app.logger, strict)
+    return DataSnapshot(
+        elements, compounds,
+        # The SQLite store answers searches from its own FTS5 index
+        search_compounds=COMPOUND_STORE != 'sqlite',
+        precompress_limit=COMPOUNDS_PRECOMPRESS_LIMIT,
+        dynamic_cache_size=int(os.environ.get('DYNAMIC_COMPOUND_CACHE_SIZE', 1024)),
+        quiz_seed=QUIZ_SEED,
+        mix_table=load_table(MIX_TABLE_FILE, mix_table_fingerprint(elements), log=app.logger.info),
+        dumps=app.json.dumps)
+
+# Seconds between checks of the data files for changes; 0 disables hot reloading
+DATA_RELOAD_INTERVAL = float(os.environ.get('DATA_RELOAD_INTERVAL', 2))
+# Bearer token for POST /api/admin/reload; the endpoint is disabled when unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+formula_engine = FormulaEngine()
+
+def data_reloader():
+    """The current app's DataReloader"""
+    return current_app.extensions['data_reloader']
+
+def current_data():
+    """The data snapshot for this request, fixed at first use so a reload never splits a request"""
+    if not has_request_context():
+        return data_reloader().current
+    data = g.get('data')
+    if data is None:
+        data = g.data = data_reloader().current
+    return data
+
+@bp.before_app_request
+def check_data_files():
+    data_reloader().check()
+
+# Quiz tokens carry [data version, key] and are only signed, so they hold
+# nothing that gives the answer away: the question is rebuilt from a seed
+# that only the server can derive from the key, be it a random nonce or the
+# caller's own ?seed=.
+QUIZ_TOKEN_MAX_AGE = int(os.environ.get('QUIZ_TOKEN_MAX_AGE', 3600))
+# Makes the sequence of random questions, and the question behind each ?seed=, reproducible
+QUIZ_SEED = os.environ.get('QUIZ_SEED')
+
+def quiz_seed(key):
+    """Question seed behind a quiz token key, keyed with the secret key and QUIZ_SEED"""
+    message = f"{QUIZ_SEED or ''}:{key}".encode('utf-8')
+    digest = hmac.new(current_app.secret_key.encode('utf-8'), message, 'sha256').digest()
+    return int.from_bytes(digest[:8], 'big')
+
+# Static files are linked under content-hashed names and cached for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+@bp.app_url_defaults
+def hashed_static_filename(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = current_app.extensions['asset_manifest'].url_name(values['filename'])
+
+def serve_static(filename):
+    """Serve a static file; hashed names are immutable, plain names revalidate"""
+    original = current_app.extensions['asset_manifest'].original(filename)
+    if original is None:
+        return send_from_directory(current_app.static_folder, filename, max_age=0)
+    response = send_from_directory(current_app.static_folder, original, max_age=STATIC_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+def category_class(category):
+    """CSS class for a category, e.g. 'alkali metal' -> 'alkali-metal'"""
+    return '-'.join(category.lower().split()).replace(',', '')
+
+def periodic_cells(table):
+    """Grid cell of every element, with lanthanides and actinides in rows 8 and 9"""
+    cells = []
+    for i in range(len(table)):
+        number, category = table.numbers[i], table.value('category', i)
+        column, row = table.value('group', i), table.value('period', i)
+        if category == 'lanthanide' and number != 57:
+            column, row = number - 54, 8
+        elif category == 'actinide' and number != 89:
+            column, row = number - 86, 9
+        cells.append({
+            'number': number,
+            'symbol': table.symbols[i],
+            'name': table.names[i],
+            'category': category,
+            'group': table.value('group', i),
+            'period': table.value('period', i),
+            'css_class': category_class(category),
+            'column': column or 'auto',
+            'row': row or 'auto',
+        })
+    return cells
+
+@bp.route('/')
 def index():
-    """Main page with periodic table and quiz"""
+    """Main page with the periodic table rendered server-side"""
     try:
-        app.logger.info("Serving main page")
-        return render_template('index.html')
+        current_app.logger.info("Serving main page")
+        data = current_data()
+        # Rendered and compressed once per data version (every time in debug mode)
+        page = data.pages.get('index')
+        if page is None or current_app.debug:
+            cells = periodic_cells(data.elements.table)
+            cell_data = [{field: cell[field] for field in ('number', 'symbol', 'name', 'category', 'group', 'period')}
+                         for cell in cells]
+            html = render_template('index.html', cells=cells, cell_data=cell_data)
+            page = data.pages['index'] = PrecompressedJSON(html, mimetype='text/html')
+        return page.make_response(request)
     except Exception as e:
-        app.logger.error(f"Error serving main page: {e}")
+        current_app.logger.error(f"Error serving main page: {e}")
         return f"Error loading page: {e}", 500
 
-@app.route('/health')
+@bp.route('/health')
 def health_check():
     """Health check endpoint for deployment"""
+    data = current_data()
     return jsonify({
         'status': 'healthy',
-        'elements_loaded': len(elements_data),
-        'compounds_loaded': len(compounds_data),
-        'version': '1.0.0'
+        'elements_loaded': len(data.elements),
+        'compounds_loaded': len(data.compounds),
+        'compound_store': COMPOUND_STORE,
+        'version': '1.0.0',
+        'data_version': data.version,
+        'data_loaded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(data.loaded_at)),
+        'data_reloading': data_reloader().reloading,
+        'data_reload_error': data_reloader().last_error,
+        'caches': {
+            'dynamic_compounds': data.dynamic_compounds.stats()
+        }
     })
 
-@app.route('/debug')
+@bp.route('/api/admin/reload', methods=['POST'])
+def reload_data():
+    """Rebuild the datasets in the background (pass wait=1 to wait for the new version)"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Page not found', 'url': request.url}), 404
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 403
+
+    wait = request.args.get('wait', '').lower() in ('1', 'true', 'yes')
+    reloader = data_reloader()
+    started = reloader.reload(wait=wait)
+    return jsonify({
+        'started': started,
+        'reloading': reloader.reloading,
+        'data_version': reloader.current.version,
+        'error': reloader.last_error
+    }), 200 if wait else 202
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for all routes, aggregated across workers"""
+    return current_app.response_class(current_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/debug')
 def debug_page():
     """Debug page to test element loading"""
+    data = current_data()
     return f"""
     <!DOCTYPE html>
     <html>
@@ -116,12 +320,12 @@ def debug_page():
     </head>
     <body>
         <h1>ChemCraft Debug Page</h1>
-        <p>Elements loaded: {len(elements_data)}</p>
-        <p>Compounds loaded: {len(compounds_data)}</p>
+        <p>Elements loaded: {len(data.elements)}</p>
+        <p>Compounds loaded: {len(data.compounds)}</p>
 
         <h2>First 10 Elements:</h2>
         <div>
-            {''.join([f'<div class="element"><div>{el["symbol"]}</div><div>{el["name"]}</div></div>' for el in elements_data[:10]])}
+            {''.join([f'<div class="element"><div>{el["symbol"]}</div><div>{el["name"]}</div></div>' for el in data.elements.elements[:10]])}
         </div>
 
         <h2>API Test:</h2>
@@ -145,197 +349,440 @@ def debug_page():
     </html>
     """
 
-@app.route('/api/elements')
+@bp.route('/api/elements')
 def get_elements():
     """API endpoint to get all elements data"""
-    return jsonify(elements_data)
+    return current_data().elements_payload.make_response(request)
+
+@bp.route('/api/elements/query')
+def query_elements():
+    """Filter, sort, project and paginate elements server-side"""
+    try:
+        query = query_from_args(request.args)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(current_data().element_query.query(**query))
 
-@app.route('/api/element/<int:atomic_number>')
+@bp.route('/api/element/<int:atomic_number>')
 def get_element(atomic_number):
     """API endpoint to get specific element by atomic number"""
-    for element in elements_data['elements']:
-        if element['number'] == atomic_number:
-            return jsonify(element)
+    element = current_data().elements.get_by_number(atomic_number)
+    if element is not None:
+        return jsonify(element.to_dict())
     return jsonify({'error': 'Element not found'}), 404
 
-@app.route('/api/quiz/random')
+@bp.route('/api/quiz/random')
 def get_random_quiz():
-    """Generate a random quiz question"""
-    element = random.choice(elements_data['elements'])
-
-    # Different types of questions
-    question_types = [
-        'symbol_to_name',
-        'name_to_symbol',
-        'atomic_number_to_name',
-        'category_question',
-        'property_question'
-    ]
-
-    question_type = random.choice(question_types)
-
-    if question_type == 'symbol_to_name':
-        question = f"What is the name of the element with symbol '{element['symbol']}'?"
-        correct_answer = element['name']
-        # Generate wrong answers
-        wrong_answers = [e['name'] for e in random.sample(elements_data['elements'], 3) if e['name'] != correct_answer]
-
-    elif question_type == 'name_to_symbol':
-        question = f"What is the chemical symbol for {element['name']}?"
-        correct_answer = element['symbol']
-        wrong_answers = [e['symbol'] for e in random.sample(elements_data['elements'], 3) if e['symbol'] != correct_answer]
-
-    elif question_type == 'atomic_number_to_name':
-        question = f"Which element has atomic number {element['number']}?"
-        correct_answer = element['name']
-        wrong_answers = [e['name'] for e in random.sample(elements_data['elements'], 3) if e['name'] != correct_answer]
-
-    elif question_type == 'category_question':
-        question = f"What category does {element['name']} belong to?"
-        correct_answer = element['category']
-        # Get other categories
-        all_categories = list(set([e['category'] for e in elements_data['elements']]))
-        wrong_answers = [cat for cat in random.sample(all_categories, min(3, len(all_categories)-1)) if cat != correct_answer]
-
-    elif question_type == 'property_question':
-        if element['phase']:
-            question = f"What is the phase of {element['name']} at room temperature?"
-            correct_answer = element['phase']
-            phases = ['Solid', 'Liquid', 'Gas']
-            wrong_answers = [phase for phase in phases if phase != correct_answer]
-        else:
-            # Fallback to symbol question
-            question = f"What is the chemical symbol for {element['name']}?"
-            correct_answer = element['symbol']
-            wrong_answers = [e['symbol'] for e in random.sample(elements_data['elements'], 3) if e['symbol'] != correct_answer]
-
-    # Ensure we have exactly 3 wrong answers
-    while len(wrong_answers) < 3:
-        random_element = random.choice(elements_data['elements'])
-        if question_type == 'symbol_to_name' or question_type == 'atomic_number_to_name':
-            candidate = random_element['name']
-        elif question_type == 'name_to_symbol':
-            candidate = random_element['symbol']
-        elif question_type == 'category_question':
-            candidate = random_element['category']
-        else:
-            candidate = random_element['phase'] if random_element['phase'] else 'Unknown'
-
-        if candidate != correct_answer and candidate not in wrong_answers:
-            wrong_answers.append(candidate)
-
-    # Shuffle answers
-    all_answers = [correct_answer] + wrong_answers[:3]
-    random.shuffle(all_answers)
+    """Generate a random quiz question with a signed answer token"""
+    data = current_data()
+    seed = request.args.get('seed', type=int)
+    if seed is None and QUIZ_SEED is None:
+        key = secrets.token_hex(12)
+    elif seed is None:
+        # Drawn from the quiz generator, which QUIZ_SEED makes reproducible
+        key = f"{data.quiz.rng.getrandbits(96):024x}"
+    else:
+        # Hashed like a nonce, so a known seed does not let anyone rebuild the question offline
+        key = str(seed)
+    quiz = data.quiz.question(seed=quiz_seed(key))
+    token = current_app.extensions['quiz_signer'].dumps([data.version, key])
 
     return jsonify({
-        'question': question,
-        'answers': all_answers,
-        'correct_answer': correct_answer,
-        'element': element,
-        'explanation': f"{element['name']} ({element['symbol']}) is {element['summary'][:100]}..."
+        'question': quiz['question'],
+        'answers': quiz['answers'],
+        'token': token
     })
 
-@app.route('/api/quiz/check', methods=['POST'])
+@bp.route('/api/quiz/check', methods=['POST'])
 def check_answer():
-    """Check if the submitted answer is correct"""
-    data = request.get_json()
-    user_answer = data.get('answer')
-    correct_answer = data.get('correct_answer')
+    """Check a submitted answer against the question rebuilt from its signed token"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    snapshot = current_data()
 
-    is_correct = user_answer == correct_answer
+    try:
+        version, key = current_app.extensions['quiz_signer'].loads(data.get('token', ''),
+                                                                   max_age=QUIZ_TOKEN_MAX_AGE)
+        if version != snapshot.version:
+            raise ValueError('Quiz data changed since the question was asked')
+        if not isinstance(key, str):
+            raise TypeError('Unexpected quiz token key')
+    except (BadSignature, TypeError, ValueError):
+        return jsonify({'error': 'Invalid or expired quiz token'}), 400
+    quiz = snapshot.quiz.question(seed=quiz_seed(key))
+    correct_index = quiz['correct_index']
+    correct_answer = quiz['answers'][correct_index]
+
+    if 'answer_index' in data:
+        answer_index = data['answer_index']
+        if not isinstance(answer_index, int) or isinstance(answer_index, bool):
+            return jsonify({'error': 'answer_index must be an integer'}), 400
+        is_correct = answer_index == correct_index
+    else:
+        is_correct = data.get('answer') == correct_answer
 
     return jsonify({
         'correct': is_correct,
+        'correct_answer': correct_answer,
+        'correct_index': correct_index,
+        'explanation': quiz['explanation'],
         'message': 'Correct!' if is_correct else f'Incorrect. The correct answer is: {correct_answer}'
     })
 
-@app.route('/api/search')
+@bp.route('/api/search')
 def search_elements():
-    """Search elements by name or symbol"""
-    query = request.args.get('q', '').lower()
+    """Search elements by name, symbol or atomic number"""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true', 'yes')
 
     if not query:
         return jsonify([])
 
-    results = []
-    for element in elements_data['elements']:
-        if (element['name'].lower().startswith(query) or
-            element['symbol'].lower().startswith(query) or
-            str(element['number']) == query):
-            results.append(element)
+    results = current_data().element_search.search(query, limit=limit, fuzzy=fuzzy)
+    return jsonify([e.to_dict() for e in results])
 
-    return jsonify(results[:10])  # Limit to 10 results
+FORMULA_BATCH_LIMIT = 10000
+
+def describe_formula(formula):
+    """Composition, charge and molecular mass of a formula string"""
+    data = current_data()
+    try:
+        parsed = data.formula_parser.parse(formula)
+    except FormulaError as e:
+        return {'formula': formula, 'error': str(e)}
+    return {
+        'formula': formula,
+        'element_counts': dict(parsed.counts),
+        'charge': parsed.charge,
+        'molecular_mass': round(data.elements.table.molecular_mass(parsed.counts), 3)
+    }
 
-@app.route('/api/compounds')
+@bp.route('/api/formula', methods=['GET', 'POST'])
+def parse_formula():
+    """Parse a formula such as Ca(OH)2·2H2O into element counts and mass"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        formula = data.get('formula', '')
+    else:
+        formula = request.args.get('f', '')
+
+    result = describe_formula(formula)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@bp.route('/api/formula/batch', methods=['POST'])
+def parse_formula_batch():
+    """Parse many formulas in one request, preserving input order"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    formulas = data.get('formulas')
+
+    if not isinstance(formulas, list):
+        return jsonify({'error': '"formulas" must be a list of strings'}), 400
+    if len(formulas) > FORMULA_BATCH_LIMIT:
+        return jsonify({'error': f'At most {FORMULA_BATCH_LIMIT} formulas per batch'}), 400
+
+    results = [describe_formula(formula) for formula in formulas]
+    return jsonify({'results': results, 'count': len(results)})
+
+BALANCE_BATCH_LIMIT = 1000
+
+def describe_balance(equation):
+    """Balanced coefficients for an equation string or a {'reactants', 'products'} object"""
+    balancer = current_data().balancer
+    try:
+        if isinstance(equation, dict):
+            reactants, products = equation.get('reactants'), equation.get('products')
+            if not all(isinstance(side, list) and side and all(isinstance(f, str) for f in side)
+                       for side in (reactants, products)):
+                raise BalanceError('"reactants" and "products" must be non-empty lists of formulas')
+            balanced = balancer.balance(reactants, products)
+        else:
+            balanced = balancer.balance_equation(equation)
+    except BalanceError as e:
+        return {'equation': equation, 'error': str(e)}
+    return {
+        'equation': format_equation(balanced),
+        'reactants': [{'formula': formula, 'coefficient': coefficient} for coefficient, formula in balanced.reactants],
+        'products': [{'formula': formula, 'coefficient': coefficient} for coefficient, formula in balanced.products]
+    }
+
+@bp.route('/api/balance', methods=['GET', 'POST'])
+def balance_equation():
+    """Balance a chemical equation such as KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        equation = data.get('equation', data if 'reactants' in data else '')
+    else:
+        equation = request.args.get('equation', '')
+
+    result = describe_balance(equation)
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@bp.route('/api/balance/batch', methods=['POST'])
+def balance_equation_batch():
+    """Balance many equations in one request, preserving input order"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    equations = data.get('equations')
+
+    if not isinstance(equations, list):
+        return jsonify({'error': '"equations" must be a list of equations'}), 400
+    if len(equations) > BALANCE_BATCH_LIMIT:
+        return jsonify({'error': f'At most {BALANCE_BATCH_LIMIT} equations per batch'}), 400
+
+    results = [describe_balance(equation) for equation in equations]
+    return jsonify({'results': results, 'count': len(results)})
+
+@bp.route('/api/compounds')
 def get_compounds():
     """API endpoint to get all compounds data"""
-    return jsonify(compounds_data)
+    data = current_data()
+    if data.compounds_payload is not None:
+        return data.compounds_payload.make_response(request)
 
-@app.route('/api/mix', methods=['POST'])
-def mix_elements():
-    """Mix elements to create compounds - now supports ANY combination!"""
-    data = request.get_json()
-    selected_elements = data.get('elements', [])
+    compounds_data = data.compounds
+    if request.if_none_match.contains_weak(compounds_data.digest):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(compounds_data.json_chunks(), mimetype='application/json')
+        response.content_length = compounds_data.body_size
+    response.set_etag(compounds_data.digest)
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+@bp.route('/api/compounds/search')
+def search_compounds():
+    """Search compounds by name, formula, category or use"""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
 
-    if len(selected_elements) < 1:
-        return jsonify({'error': 'At least 1 element is required'}), 400
+    if not query:
+        return jsonify([])
 
-    # Count selected elements
-    selected_counts = {}
-    element_symbols = []
+    data = current_data()
+    if data.compound_search is None:
+        return jsonify(data.compounds.search(query, limit=limit))
+    return jsonify([data.compounds[doc_id] for _, doc_id in data.compound_search.ranked(query, limit)])
+
+FORMABLE_MAX_LIMIT = 500
+
+@bp.route('/api/compounds/formable', methods=['GET', 'POST'])
+def formable_compounds():
+    """Known compounds that use only the given elements, optionally within their counts"""
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        if not isinstance(params, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        selected = params.get('elements')
+    else:
+        params = request.args
+        selected = [s.strip() for raw in params.getlist('elements') for s in raw.split(',') if s.strip()]
+    limit_counts = str(params.get('limit_counts', '')).lower() in ('1', 'true', 'yes')
+
+    if not isinstance(selected, list) or not selected:
+        return jsonify({'error': '"elements" must be a non-empty list of element symbols'}), 400
+    try:
+        element_symbols = selection_symbols(selected)
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 50))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if offset < 0 or not 1 <= limit <= FORMABLE_MAX_LIMIT:
+        return jsonify({'error': f"'offset' must be >= 0 and 'limit' between 1 and {FORMABLE_MAX_LIMIT}"}), 400
+
+    data = current_data()
+    table = data.elements.table
+    counts = {table.numbers[table.index[symbol]]: count
+              for symbol, count in count_elements(element_symbols).items()}
+    records = data.compounds.formable_indexes(element_mask(counts), counts if limit_counts else None)
+    return jsonify({
+        'total': len(records),
+        'offset': offset,
+        'limit': limit,
+        'results': [data.compounds[record] for record in records[offset:offset + limit]]
+    })
+
+SIMILAR_MAX_LIMIT = 50
+
+@bp.route('/api/compounds/similar', methods=['GET', 'POST'])
+def similar_compounds():
+    """Known compounds closest in composition to a formula or a selection of elements"""
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        if not isinstance(params, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        selected = params.get('elements')
+    else:
+        params = request.args
+        selected = [s.strip() for raw in params.getlist('elements') for s in raw.split(',') if s.strip()] or None
+    formula = params.get('formula')
+
+    try:
+        if formula is not None:
+            selected_counts = dict(current_data().formula_parser.parse(formula).counts)
+        elif isinstance(selected, list) and selected:
+            selected_counts = count_elements(selection_symbols(selected))
+        else:
+            return jsonify({'error': 'Give a "formula" or a non-empty list of "elements"'}), 400
+        limit = int(params.get('limit', 10))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not 1 <= limit <= SIMILAR_MAX_LIMIT:
+        return jsonify({'error': f"'limit' must be between 1 and {SIMILAR_MAX_LIMIT}"}), 400
+
+    return jsonify({
+        'element_counts': selected_counts,
+        'results': [{'similarity': score, 'compound': compound}
+                    for score, compound in find_similar_compounds(selected_counts, limit)]
+    })
+
+MIX_BATCH_LIMIT = 1000
+# Known compounds suggested with each dynamically generated one; 0 turns suggestions off
+MIX_SIMILAR_LIMIT = int(os.environ.get('MIX_SIMILAR_LIMIT', 3))
+
+def selection_symbols(selected_elements):
+    """Normalize a selection of {'symbol': ...} dicts or bare symbols to symbols"""
+    elements_data = current_data().elements
+    symbols = []
     for elem in selected_elements:
-        symbol = elem['symbol']
-        selected_counts[symbol] = selected_counts.get(symbol, 0) + 1
-        element_symbols.append(symbol)
+        symbol = elem.get('symbol') if isinstance(elem, dict) else elem
+        if not isinstance(symbol, str):
+            raise ValueError('Each element must be a symbol or an object with a "symbol" key')
+        if elements_data.get_by_symbol(symbol) is None:
+            raise ValueError(f'Unknown element: {symbol}')
+        symbols.append(symbol)
+    return symbols
+
+def count_elements(element_symbols):
+    """Count occurrences of each symbol, keeping first-seen order"""
+    counts = {}
+    for symbol in element_symbols:
+        counts[symbol] = counts.get(symbol, 0) + 1
+    return counts
+
+def mix_selection(element_symbols):
+    """Run the exact/ratio/dynamic mixing pipeline for a list of element symbols"""
+    # Count selected elements
+    selected_counts = count_elements(element_symbols)
 
     # Try to find exact match in predefined compounds first
     exact_match = find_exact_compound_match(selected_counts)
     if exact_match:
-        return jsonify({
+        current_metrics().inc('mix_results', 'match_type', 'exact')
+        return {
             'success': True,
             'compound': exact_match,
             'message': f'Successfully created {exact_match["name"]}!',
             'match_type': 'exact'
-        })
+        }
 
     # Try to find compounds with same elements but different ratios
     ratio_match = find_ratio_compound_match(selected_counts)
     if ratio_match:
         compound, suggested_ratio = ratio_match
-        return jsonify({
+        current_metrics().inc('mix_results', 'match_type', 'ratio')
+        return {
             'success': True,
             'compound': compound,
             'message': f'Created {compound["name"]} using available elements!',
             'match_type': 'ratio',
             'note': f'Ideal ratio would be {suggested_ratio}, but compound formed with available elements.'
-        })
+        }
 
     # Generate compound dynamically from ANY combination of elements
     dynamic_compound = generate_compound_dynamically(element_symbols)
+    current_metrics().inc('mix_results', 'match_type', 'dynamic')
 
-    return jsonify({
+    result = {
         'success': True,
         'compound': dynamic_compound,
         'message': f'Successfully created {dynamic_compound["name"]}!',
         'match_type': 'dynamic',
         'note': 'This compound was generated dynamically based on chemical principles!'
-    })
+    }
+    if MIX_SIMILAR_LIMIT:
+        result['similar'] = [
+            {'name': compound['name'], 'formula': compound['formula'], 'similarity': score}
+            for score, compound in find_similar_compounds(selected_counts, MIX_SIMILAR_LIMIT)
+        ]
+    return result
+
+@bp.route('/api/mix', methods=['POST'])
+def mix_elements():
+    """Mix elements to create compounds - now supports ANY combination!"""
+    data = request.get_json()
+    selected_elements = data.get('elements', [])
 
-@app.route('/api/random-compound')
+    if len(selected_elements) < 1:
+        return jsonify({'error': 'At least 1 element is required'}), 400
+
+    try:
+        element_symbols = selection_symbols(selected_elements)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(mix_selection(element_symbols))
+
+def mix_batch_results(combinations):
+    """Yield mix results for each combination in order, computing duplicates once"""
+    results = {}
+    for selected_elements in combinations:
+        if not isinstance(selected_elements, list) or len(selected_elements) < 1:
+            yield {'success': False, 'error': 'At least 1 element is required'}
+            continue
+        try:
+            element_symbols = selection_symbols(selected_elements)
+        except ValueError as e:
+            yield {'success': False, 'error': str(e)}
+            continue
+
+        key = composition_key(count_elements(element_symbols))
+        if key not in results:
+            results[key] = mix_selection(element_symbols)
+        yield results[key]
+
+@bp.route('/api/mix/batch', methods=['POST'])
+def mix_elements_batch():
+    """Mix many element combinations in one request, preserving input order"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    combinations = data.get('combinations')
+
+    if not isinstance(combinations, list):
+        return jsonify({'error': '"combinations" must be a list of element lists'}), 400
+    if len(combinations) > MIX_BATCH_LIMIT:
+        return jsonify({'error': f'At most {MIX_BATCH_LIMIT} combinations per batch'}), 400
+
+    stream = data.get('stream') or request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+    if stream:
+        dumps = current_app.json.dumps
+        # Keep the request context so the whole stream uses this request's data snapshot
+        lines = stream_with_context(dumps(result, separators=(',', ':')) + '\n'
+                                    for result in mix_batch_results(combinations))
+        return current_app.response_class(lines, mimetype='application/x-ndjson')
+
+    results = list(mix_batch_results(combinations))
+    return jsonify({'results': results, 'count': len(results)})
+
+@bp.route('/api/random-compound')
 def get_random_compound():
     """Get a random compound for demonstration"""
     try:
-        compound = random.choice(compounds_data['compounds'])
-
-        # Get the elements for this compound
-        compound_elements = []
-        if 'elements' in compound:
-            for symbol in compound['elements']:
-                for element in elements_data['elements']:
-                    if element['symbol'] == symbol:
-                        compound_elements.append(element)
-                        break
+        data = current_data()
+        compound = random.choice(data.compounds)
 
         # Ensure compound has required fields
         if 'formula' not in compound:
@@ -364,79 +811,57 @@ def get_random_compound():
             'uses': ['Essential for life', 'Universal solvent']
         })
 
-def get_oxidation_states():
-    """Get common oxidation states for elements"""
+def copy_compound(compound):
+    """Copy a compound dict deeply enough that callers cannot alter the original"""
     return {
-        # Group 1 - Alkali metals
-        'H': [1, -1], 'Li': [1], 'Na': [1], 'K': [1], 'Rb': [1], 'Cs': [1], 'Fr': [1],
-
-        # Group 2 - Alkaline earth metals
-        'Be': [2], 'Mg': [2], 'Ca': [2], 'Sr': [2], 'Ba': [2], 'Ra': [2],
-
-        # Group 13
-        'B': [3], 'Al': [3], 'Ga': [3], 'In': [3], 'Tl': [1, 3],
-
-        # Group 14
-        'C': [4, -4], 'Si': [4], 'Ge': [2, 4], 'Sn': [2, 4], 'Pb': [2, 4],
-
-        # Group 15
-        'N': [3, 5, -3], 'P': [3, 5, -3], 'As': [3, 5, -3], 'Sb': [3, 5], 'Bi': [3, 5],
-
-        # Group 16
-        'O': [-2], 'S': [2, 4, 6, -2], 'Se': [2, 4, 6, -2], 'Te': [2, 4, 6], 'Po': [2, 4],
-
-        # Group 17 - Halogens
-        'F': [-1], 'Cl': [1, 3, 5, 7, -1], 'Br': [1, 3, 5, 7, -1], 'I': [1, 3, 5, 7, -1], 'At': [1, 3, 5, 7, -1],
-
-        # Group 18 - Noble gases
-        'He': [0], 'Ne': [0], 'Ar': [0], 'Kr': [2], 'Xe': [2, 4, 6], 'Rn': [2], 'Og': [0],
-
-        # Transition metals (common oxidation states)
-        'Sc': [3], 'Ti': [2, 3, 4], 'V': [2, 3, 4, 5], 'Cr': [2, 3, 6], 'Mn': [2, 3, 4, 6, 7],
-        'Fe': [2, 3], 'Co': [2, 3], 'Ni': [2, 3], 'Cu': [1, 2], 'Zn': [2],
-        'Y': [3], 'Zr': [4], 'Nb': [3, 5], 'Mo': [2, 3, 4, 5, 6], 'Tc': [4, 7], 'Ru': [2, 3, 4, 8],
-        'Rh': [3], 'Pd': [2, 4], 'Ag': [1], 'Cd': [2],
-        'Hf': [4], 'Ta': [5], 'W': [2, 3, 4, 5, 6], 'Re': [4, 6, 7], 'Os': [2, 3, 4, 6, 8],
-        'Ir': [3, 4], 'Pt': [2, 4], 'Au': [1, 3], 'Hg': [1, 2],
-
-        # Lanthanides (mostly +3)
-        'La': [3], 'Ce': [3, 4], 'Pr': [3], 'Nd': [3], 'Pm': [3], 'Sm': [2, 3], 'Eu': [2, 3],
-        'Gd': [3], 'Tb': [3, 4], 'Dy': [3], 'Ho': [3], 'Er': [3], 'Tm': [3], 'Yb': [2, 3], 'Lu': [3],
-
-        # Actinides
-        'Ac': [3], 'Th': [4], 'Pa': [4, 5], 'U': [3, 4, 5, 6], 'Np': [3, 4, 5, 6, 7], 'Pu': [3, 4, 5, 6],
-        'Am': [3, 4, 5, 6], 'Cm': [3], 'Bk': [3, 4], 'Cf': [3], 'Es': [3], 'Fm': [3], 'Md': [3], 'No': [2, 3], 'Lr': [3],
-
-        # Super-heavy elements (predicted)
-        'Rf': [4], 'Db': [5], 'Sg': [6], 'Bh': [7], 'Hs': [8], 'Mt': [9], 'Ds': [10], 'Rg': [11], 'Cn': [12],
-        'Nh': [13], 'Fl': [14], 'Mc': [15], 'Lv': [16], 'Ts': [17]
+        key: value.copy() if isinstance(value, (list, dict)) else value
+        for key, value in compound.items()
     }
 
+METAL_CATEGORIES = ('alkali metal', 'alkaline earth metal', 'transition metal', 'post-transition metal', 'lanthanide', 'actinide')
+NONMETAL_CATEGORIES = ('diatomic nonmetal', 'polyatomic nonmetal')
+DIATOMIC_ELEMENTS = ('H', 'N', 'O', 'F', 'Cl', 'Br', 'I')
+
 def generate_compound_dynamically(element_symbols):
     """Generate a compound dynamically from any combination of elements"""
-    from math import gcd
-    from functools import reduce
-
-    # Count elements
-    element_counts = {}
-    for symbol in element_symbols:
-        element_counts[symbol] = element_counts.get(symbol, 0) + 1
-
-    unique_elements = list(element_counts.keys())
-
-    # Get element data
-    element_data = {}
-    for symbol in unique_elements:
-        for element in elements_data['elements']:
-            if element['symbol'] == symbol:
-                element_data[symbol] = element
-                break
+    element_counts = count_elements(element_symbols)
+
+    key = composition_key(element_counts)
+    data = current_data()
+    compound = data.dynamic_compounds.get(key)
+    if compound is None:
+        if data.mix_table is not None:
+            table = data.elements.table
+            compound = data.mix_table.get([(table.numbers[table.index[symbol]], count)
+                                           for symbol, count in element_counts.items()])
+            current_metrics().inc('mix_table_lookups', 'result', 'miss' if compound is None else 'hit')
+        if compound is None:
+            compound = build_dynamic_compound(element_counts)
+        data.dynamic_compounds.put(key, compound)
+    return copy_compound(compound)
+
+def build_dynamic_compound(element_counts):
+    """Build the compound object for an element-count multiset"""
+    # Order elements canonically (by atomic number) so the result only
+    # depends on the multiset, not on the order elements were clicked
+    table = current_data().elements.table
+    unique_elements = sorted(element_counts, key=table.index.__getitem__)
+    element_counts = {symbol: element_counts[symbol] for symbol in unique_elements}
+
+    # Balance charges from common oxidation states (e.g. Na + Na + Cl -> NaCl)
+    oxidation_states = None
+    if len(unique_elements) > 1:
+        balanced = formula_engine.balance(unique_elements)
+        if balanced is not None:
+            balanced_counts = {symbol: count for symbol, _, count in balanced.parts}
+            element_counts = {symbol: balanced_counts[symbol] for symbol in unique_elements}
+            oxidation_states = {symbol: state for symbol, state, _ in balanced.parts}
 
     # Handle single element (diatomic or monatomic)
     if len(unique_elements) == 1:
         symbol = unique_elements[0]
         count = element_counts[symbol]
-        element = element_data[symbol]
+        element = table.row(symbol)
 
         if count == 1:
             # Monatomic (noble gases or metals)
@@ -446,41 +871,51 @@ def generate_compound_dynamically(element_symbols):
         else:
             # Diatomic or polyatomic
             formula = f"{symbol}{count}" if count > 1 else symbol
-            if symbol in ['H', 'N', 'O', 'F', 'Cl', 'Br', 'I']:
+            if symbol in DIATOMIC_ELEMENTS:
                 name = f"{element['name']} Gas"
                 compound_type = "Diatomic Gas"
             else:
                 name = f"{element['name']} Cluster"
                 compound_type = "Polyatomic"
 
-        return create_compound_object(formula, name, unique_elements, element_counts, element_data, compound_type)
+        return create_compound_object(formula, name, unique_elements, element_counts, table, compound_type)
 
     # Handle binary compounds (2 elements)
     elif len(unique_elements) == 2:
-        return generate_binary_compound(unique_elements, element_counts, element_data)
+        compound = generate_binary_compound(unique_elements, element_counts, table, oxidation_states)
 
     # Handle ternary and higher compounds (3+ elements)
     else:
-        return generate_complex_compound(unique_elements, element_counts, element_data)
+        compound = generate_complex_compound(unique_elements, element_counts, table, oxidation_states)
 
-def generate_binary_compound(elements, element_counts, element_data):
-    """Generate binary compound with proper stoichiometry"""
-    from math import gcd
+    if oxidation_states:
+        compound['oxidation_states'] = oxidation_states
+    return compound
 
+def generate_binary_compound(elements, element_counts, table, oxidation_states=None):
+    """Generate binary compound with proper stoichiometry"""
     elem1, elem2 = elements
     count1, count2 = element_counts[elem1], element_counts[elem2]
 
     # Determine which is more metallic
-    categories1 = element_data[elem1]['category']
-    categories2 = element_data[elem2]['category']
+    categories1 = table.category_mask((elem1,))
+    categories2 = table.category_mask((elem2,))
 
-    metal_categories = ['alkali metal', 'alkaline earth metal', 'transition metal', 'post-transition metal', 'lanthanide', 'actinide']
-    nonmetal_categories = ['diatomic nonmetal', 'polyatomic nonmetal', 'noble gas']
+    metal_categories = table.category_bits(METAL_CATEGORIES)
+    nonmetal_categories = table.category_bits(NONMETAL_CATEGORIES + ('noble gas',))
 
-    if categories1 in metal_categories and categories2 in nonmetal_categories:
+    if oxidation_states:
+        # Cation (positive oxidation state) first
+        if oxidation_states[elem1] > 0:
+            metal, nonmetal = elem1, elem2
+            metal_count, nonmetal_count = count1, count2
+        else:
+            metal, nonmetal = elem2, elem1
+            metal_count, nonmetal_count = count2, count1
+    elif categories1 & metal_categories and categories2 & nonmetal_categories:
         metal, nonmetal = elem1, elem2
         metal_count, nonmetal_count = count1, count2
-    elif categories2 in metal_categories and categories1 in nonmetal_categories:
+    elif categories2 & metal_categories and categories1 & nonmetal_categories:
         metal, nonmetal = elem2, elem1
         metal_count, nonmetal_count = count2, count1
     else:
@@ -492,21 +927,22 @@ def generate_binary_compound(elements, element_counts, element_data):
             metal, nonmetal = elem2, elem1
             metal_count, nonmetal_count = count2, count1
 
-    # Create formula
-    if metal_count == 1 and nonmetal_count == 1:
-        formula = f"{metal}{nonmetal}"
-    elif metal_count == 1:
-        formula = f"{metal}{nonmetal}{nonmetal_count}"
-    elif nonmetal_count == 1:
-        formula = f"{metal}{metal_count}{nonmetal}"
-    else:
-        formula = f"{metal}{metal_count}{nonmetal}{nonmetal_count}"
+    # Create formula; hydrides of the group 13-15 nonmetals are written nonmetal first (CH4, NH3)
+    parts = [(metal, metal_count), (nonmetal, nonmetal_count)]
+    if metal == 'H' and nonmetal in NONMETAL_FIRST_HYDRIDES:
+        parts.reverse()
+    formula = ''.join(symbol if count == 1 else f"{symbol}{count}" for symbol, count in parts)
 
     # Create name
-    name = create_binary_compound_name(element_data[metal], element_data[nonmetal], metal_count, nonmetal_count)
+    ionic = bool(categories1 & metal_categories if metal == elem1 else categories2 & metal_categories)
+    metal_state = oxidation_states[metal] if oxidation_states else None
+    name = HYDRIDE_NAMES.get(formula) or create_binary_compound_name(
+        table.row(metal), table.row(nonmetal), metal_count, nonmetal_count, ionic, metal_state)
 
     # Determine compound type
-    if nonmetal == 'O':
+    if nonmetal == 'H' or (metal == 'H' and nonmetal in NONMETAL_FIRST_HYDRIDES):
+        compound_type = "Hydride"
+    elif nonmetal == 'O':
         compound_type = "Oxide"
     elif nonmetal in ['F', 'Cl', 'Br', 'I', 'At']:
         compound_type = "Halide"
@@ -516,20 +952,22 @@ def generate_binary_compound(elements, element_counts, element_data):
         compound_type = "Nitride"
     elif nonmetal == 'C':
         compound_type = "Carbide"
-    elif nonmetal == 'H':
-        compound_type = "Hydride"
     elif nonmetal == 'P':
         compound_type = "Phosphide"
     else:
         compound_type = "Binary Compound"
 
-    return create_compound_object(formula, name, elements, element_counts, element_data, compound_type)
+    return create_compound_object(formula, name, elements, element_counts, table, compound_type)
 
-def generate_complex_compound(elements, element_counts, element_data):
+def generate_complex_compound(elements, element_counts, table, oxidation_states=None):
     """Generate complex compound with 3+ elements"""
 
-    # Sort elements by count (descending) then alphabetically
-    sorted_elements = sorted(elements, key=lambda x: (-element_counts[x], x))
+    if oxidation_states:
+        # Balanced: least electronegative first, as in CaCO3
+        sorted_elements = sorted(elements, key=lambda x: (electronegativity(x), x))
+    else:
+        # Sort elements by count (descending) then alphabetically
+        sorted_elements = sorted(elements, key=lambda x: (-element_counts[x], x))
 
     # Create formula
     formula_parts = []
@@ -543,7 +981,7 @@ def generate_complex_compound(elements, element_counts, element_data):
     formula = "".join(formula_parts)
 
     # Create name
-    element_names = [element_data[elem]['name'] for elem in sorted_elements]
+    element_names = [table.names[table.index[elem]] for elem in sorted_elements]
     name = " ".join(element_names) + " Compound"
 
     # Determine compound type
@@ -557,64 +995,65 @@ def generate_complex_compound(elements, element_counts, element_data):
     else:
         compound_type = "Complex Compound"
 
-    return create_compound_object(formula, name, elements, element_counts, element_data, compound_type)
-
-def create_binary_compound_name(metal_elem, nonmetal_elem, metal_count, nonmetal_count):
-    """Create systematic name for binary compound"""
-
-    # Special naming for common compounds
-    if nonmetal_elem['symbol'] == 'O':
-        if metal_count == 1 and nonmetal_count == 1:
-            return f"{metal_elem['name']} Oxide"
-        elif metal_count == 2 and nonmetal_count == 1:
-            return f"{metal_elem['name']} Oxide"
-        elif metal_count == 1 and nonmetal_count == 2:
-            return f"{metal_elem['name']} Dioxide"
-        elif metal_count == 2 and nonmetal_count == 3:
-            return f"{metal_elem['name']} Trioxide"
-        else:
-            return f"{metal_elem['name']} Oxide"
-
-    elif nonmetal_elem['symbol'] in ['F', 'Cl', 'Br', 'I', 'At']:
-        halogen_names = {'F': 'Fluoride', 'Cl': 'Chloride', 'Br': 'Bromide', 'I': 'Iodide', 'At': 'Astatide'}
-        base_name = halogen_names[nonmetal_elem['symbol']]
-
-        if nonmetal_count == 1:
-            return f"{metal_elem['name']} {base_name}"
-        elif nonmetal_count == 2:
-            return f"{metal_elem['name']} Di{base_name.lower()}"
-        elif nonmetal_count == 3:
-            return f"{metal_elem['name']} Tri{base_name.lower()}"
-        elif nonmetal_count == 4:
-            return f"{metal_elem['name']} Tetra{base_name.lower()}"
-        else:
-            return f"{metal_elem['name']} {base_name}"
-
-    elif nonmetal_elem['symbol'] == 'S':
-        return f"{metal_elem['name']} Sulfide"
-    elif nonmetal_elem['symbol'] == 'N':
-        return f"{metal_elem['name']} Nitride"
-    elif nonmetal_elem['symbol'] == 'C':
-        return f"{metal_elem['name']} Carbide"
-    elif nonmetal_elem['symbol'] == 'H':
-        return f"{metal_elem['name']} Hydride"
-    elif nonmetal_elem['symbol'] == 'P':
-        return f"{metal_elem['name']} Phosphide"
-    else:
-        return f"{metal_elem['name']} {nonmetal_elem['name']}"
-
-def create_compound_object(formula, name, elements, element_counts, element_data, compound_type):
+    return create_compound_object(formula, name, elements, element_counts, table, compound_type)
+
+# Anion names of the nonmetals and metalloids
+ANION_NAMES = {
+    'H': 'Hydride', 'B': 'Boride', 'C': 'Carbide', 'N': 'Nitride', 'O': 'Oxide', 'F': 'Fluoride',
+    'Si': 'Silicide', 'P': 'Phosphide', 'S': 'Sulfide', 'Cl': 'Chloride', 'As': 'Arsenide',
+    'Se': 'Selenide', 'Br': 'Bromide', 'Sb': 'Antimonide', 'Te': 'Telluride', 'I': 'Iodide', 'At': 'Astatide',
+}
+# Hydrogen compounds known by their common names
+HYDRIDE_NAMES = {
+    'BH3': 'Borane', 'CH4': 'Methane', 'SiH4': 'Silane', 'GeH4': 'Germane', 'NH3': 'Ammonia',
+    'PH3': 'Phosphine', 'AsH3': 'Arsine', 'SbH3': 'Stibine', 'H2O': 'Water',
+}
+NONMETAL_FIRST_HYDRIDES = ('B', 'C', 'Si', 'Ge', 'N', 'P', 'As', 'Sb')
+GREEK_PREFIXES = ('', 'Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa', 'Hepta', 'Octa', 'Nona', 'Deca')
+ROMAN_NUMERALS = ('', 'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII')
+
+def create_binary_compound_name(metal_elem, nonmetal_elem, metal_count, nonmetal_count, ionic=True,
+                                metal_state=None):
+    """Create systematic name for binary compound.
+
+    Ionic compounds take no prefixes, with the charge of a metal that has
+    several common states as a Roman numeral (Iron(III) Oxide). Molecular
+    compounds use Greek prefixes (Dinitrogen Pentoxide), except after
+    hydrogen (Hydrogen Sulfide); see HYDRIDE_NAMES for NH3, CH4 and the like.
+    """
+    metal_name, symbol = metal_elem['name'], nonmetal_elem['symbol']
+    anion = ANION_NAMES.get(symbol)
+    if anion is None:
+        # Not an anion-forming element, e.g. an alloy of two metals
+        return f"{metal_name} {nonmetal_elem['name']}"
+
+    if metal_elem['symbol'] == 'H':
+        return f"Hydrogen {anion}"
+
+    if ionic:
+        positive_states = [state for state in OXIDATION_STATES.get(metal_elem['symbol'], []) if state > 0]
+        if len(positive_states) > 1 and metal_state in range(1, len(ROMAN_NUMERALS)):
+            return f"{metal_name}({ROMAN_NUMERALS[metal_state]}) {anion}"
+        return f"{metal_name} {anion}"
+
+    if max(metal_count, nonmetal_count) >= len(GREEK_PREFIXES):
+        return f"{metal_name} {anion}"
+    first = f"{GREEK_PREFIXES[metal_count]}{metal_name.lower()}" if metal_count > 1 else metal_name
+    prefix = GREEK_PREFIXES[nonmetal_count]
+    if prefix[-1] in 'ao' and anion == 'Oxide':
+        prefix = prefix[:-1]  # Monoxide, Pentoxide
+    return f"{first} {prefix}{anion.lower()}"
+
+def create_compound_object(formula, name, elements, element_counts, table, compound_type):
     """Create a complete compound object"""
 
     # Calculate molecular mass
-    molecular_mass = sum(element_data[elem]['atomic_mass'] * count for elem, count in element_counts.items())
-
-    # Determine bond type
-    metal_categories = ['alkali metal', 'alkaline earth metal', 'transition metal', 'post-transition metal', 'lanthanide', 'actinide']
-    nonmetal_categories = ['diatomic nonmetal', 'polyatomic nonmetal']
+    molecular_mass = table.molecular_mass(element_counts.items())
 
-    has_metal = any(element_data[elem]['category'] in metal_categories for elem in elements)
-    has_nonmetal = any(element_data[elem]['category'] in nonmetal_categories for elem in elements)
+    # Determine bond type from the categories present, as one bitmask
+    categories = table.category_mask(elements)
+    has_metal = bool(categories & table.category_bits(METAL_CATEGORIES))
+    has_nonmetal = bool(categories & table.category_bits(NONMETAL_CATEGORIES))
 
     if has_metal and has_nonmetal:
         bond_type = "Ionic"
@@ -632,10 +1071,10 @@ def create_compound_object(formula, name, elements, element_counts, element_data
         state = "Solid"
 
     # Create uses based on compound type and elements
-    uses = generate_compound_uses(elements, compound_type, element_data)
+    uses = generate_compound_uses(elements, compound_type, table, categories)
 
     # Create interesting facts
-    facts = generate_interesting_facts(elements, compound_type, element_data)
+    facts = generate_interesting_facts(elements, compound_type, table, categories)
 
     return {
         'formula': formula,
@@ -651,7 +1090,7 @@ def create_compound_object(formula, name, elements, element_counts, element_data
         'solubility': 'Varies',
         'reactivity': 'Varies with conditions',
         'uses': uses,
-        'formation_reaction': f"{' + '.join(elements)} → {formula}",
+        'formation_reaction': formation_reaction(elements, formula),
         'bond_type': bond_type,
         'interesting_facts': facts,
         'safety': 'Handle with appropriate safety measures',
@@ -659,7 +1098,21 @@ def create_compound_object(formula, name, elements, element_counts, element_data
         'category': compound_type
     }
 
-def generate_compound_uses(elements, compound_type, element_data):
+def formation_reaction(elements, formula):
+    """Balanced formation from the elements in their standard forms, e.g. '4Fe + 3O2 → 2Fe2O3'.
+
+    None for a single element, which is taken to be in its standard state
+    already, and for a formula the elements cannot balance.
+    """
+    if len(set(elements)) < 2:
+        return None
+    reactants = [f"{symbol}2" if symbol in DIATOMIC_ELEMENTS else symbol for symbol in elements]
+    try:
+        return format_equation(current_data().balancer.balance(reactants, [formula]))
+    except BalanceError:
+        return None
+
+def generate_compound_uses(elements, compound_type, table, categories):
     """Generate realistic uses based on elements and compound type"""
     uses = []
 
@@ -687,22 +1140,21 @@ def generate_compound_uses(elements, compound_type, element_data):
     if 'N' in elements:
         uses.extend(['Hard coatings', 'Cutting tools', 'Electronic applications'])
 
-    # Based on element categories
-    categories = [element_data[elem]['category'] for elem in elements]
-    if 'transition metal' in categories:
+    # Based on element categories (bitmask from table.category_mask)
+    if categories & table.category_bits(('transition metal',)):
         uses.extend(['Catalysis', 'Magnetic materials', 'Electronic components'])
-    if 'lanthanide' in categories:
+    if categories & table.category_bits(('lanthanide',)):
         uses.extend(['Phosphors', 'Laser materials', 'Magnetic applications'])
-    if 'actinide' in categories:
+    if categories & table.category_bits(('actinide',)):
         uses.extend(['Nuclear applications', 'Research purposes', 'Specialized materials'])
 
     # Default uses
     if not uses:
         uses = ['Research applications', 'Chemical synthesis', 'Industrial processes']
 
-    return list(set(uses))  # Remove duplicates
+    return list(dict.fromkeys(uses))  # Remove duplicates, keeping a stable order
 
-def generate_interesting_facts(elements, compound_type, element_data):
+def generate_interesting_facts(elements, compound_type, table, categories):
     """Generate interesting facts based on elements and compound type"""
     facts = []
 
@@ -715,17 +1167,17 @@ def generate_interesting_facts(elements, compound_type, element_data):
         facts.append("Diatomic molecule found in gaseous state")
 
     # Based on elements
-    if any(element_data[elem]['category'] == 'lanthanide' for elem in elements):
+    if categories & table.category_bits(('lanthanide',)):
         facts.append("Contains rare earth elements")
-    if any(element_data[elem]['category'] == 'actinide' for elem in elements):
+    if categories & table.category_bits(('actinide',)):
         facts.append("Contains radioactive actinide elements")
-    if any(element_data[elem]['number'] > 103 for elem in elements):
+    if table.max_value('number', elements) > 103:
         facts.append("Contains super-heavy synthetic elements")
 
     # Based on element properties
     if len(elements) > 3:
         facts.append("Complex multi-element compound")
-    if any(element_data[elem]['atomic_mass'] > 200 for elem in elements):
+    if table.max_value('atomic_mass', elements) > 200:
         facts.append("Contains heavy elements")
 
     # Default fact
@@ -734,35 +1186,28 @@ def generate_interesting_facts(elements, compound_type, element_data):
 
     return facts
 
+# build_dynamic_compound(), its helpers and the modules they depend on; see mix_table_fingerprint()
+MIX_TABLE_GENERATOR = (
+    build_dynamic_compound, generate_binary_compound, generate_complex_compound, create_binary_compound_name,
+    create_compound_object, formation_reaction, generate_compound_uses, generate_interesting_facts,
+    formula_engine_module, equation_balancer, formula_parser, element_table,
+)
+
 def find_exact_compound_match(selected_counts):
     """Find a compound that exactly matches the selected element counts"""
-    for compound in compounds_data['compounds']:
-        if compound['element_counts'] == selected_counts:
-            return compound
-    return None
+    return current_data().compounds.exact(selected_counts)
 
 def find_ratio_compound_match(selected_counts):
     """Find a compound with same elements but allow different ratios"""
-    selected_elements = set(selected_counts.keys())
-
-    for compound in compounds_data['compounds']:
-        compound_elements = set(compound['elements'])
+    return current_data().compounds.ratio(selected_counts)
 
-        # Check if we have the same elements
-        if compound_elements == selected_elements:
-            # Create a readable ratio string
-            ratio_parts = []
-            for element in sorted(compound['elements']):
-                count = compound['element_counts'][element]
-                if count == 1:
-                    ratio_parts.append(element)
-                else:
-                    ratio_parts.append(f"{count}{element}")
-
-            suggested_ratio = " + ".join(ratio_parts)
-            return compound, suggested_ratio
-
-    return None
+def find_similar_compounds(selected_counts, limit):
+    """(cosine similarity, compound) for the known compounds closest in composition, best first"""
+    data = current_data()
+    table = data.elements.table
+    pairs = [(table.numbers[table.index[symbol]], count) for symbol, count in selected_counts.items()]
+    return [(round(score, 4), data.compounds[doc_id])
+            for score, doc_id in data.compound_similarity.nearest(pairs, limit)]
 
 def generate_hypothetical_compound(elements):
     """Generate a hypothetical compound when no known compound exists"""
@@ -809,10 +1254,55 @@ def generate_hypothetical_compound(elements):
         'safety': 'Properties unknown - handle with caution'
     }
 
+@bp.cli.command('build-mix-table')
+@click.option('-o', '--output', default=MIX_TABLE_FILE, show_default=True)
+@click.option('--max-count', default=4, show_default=True, help='Most of each element in 1- and 2-element mixes')
+@click.option('--ternary-max-count', default=1, show_default=True,
+              help='Most of each element in 3-element mixes (0 leaves them out)')
+@click.option('--processes', type=int, help='Worker processes (default: one per CPU)')
+def build_mix_table(output, max_count, ternary_max_count, processes):
+    """Precompute dynamic /api/mix results into a memory-mapped lookup table"""
+    data = current_data()
+    table = data.elements.table
+    start = time.perf_counter()
+    count = build_table(output, build_dynamic_compound, dict(zip(table.numbers, table.symbols)),
+                        (max_count, max_count, ternary_max_count), mix_table_fingerprint(data.elements),
+                        processes=processes, log=click.echo)
+    click.echo(f"{count:,} mix results written to {output} ({os.path.getsize(output):,} bytes) "
+               f"in {time.perf_counter() - start:.1f}s")
+
+def create_app():
+    """Build the application: load the datasets, build their indexes and register the routes.
+
+    Everything is loaded here rather than at import, so a WSGI server that
+    preloads the app (see gunicorn.conf.py) builds it once in the master
+    process and workers share those pages copy-on-write.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get('SECRET_KEY')
+    app.logger.setLevel(LOG_LEVEL)
+    if not app.secret_key:
+        # Tokens signed with a per-process key only verify on the worker that issued them
+        app.logger.warning("SECRET_KEY is not set; using a random key for this process")
+        app.secret_key = os.urandom(32).hex()
+
+    app.extensions['metrics'] = Metrics(enabled=os.environ.get('METRICS_ENABLED', '1') != '0',
+                                        directory=os.environ.get('METRICS_DIR') or None)
+    app.extensions['quiz_signer'] = URLSafeTimedSerializer(app.secret_key, salt='quiz-answer')
+    app.extensions['asset_manifest'] = AssetManifest(app.static_folder)
+    app.extensions['data_reloader'] = DataReloader(
+        build_data_snapshot(app), lambda: build_data_snapshot(app, strict=True),
+        (ELEMENTS_FILE, COMPOUNDS_FILE, MIX_TABLE_FILE), interval=DATA_RELOAD_INTERVAL, log=app.logger.info)
+
+    app.register_blueprint(bp)
+    app.view_functions['static'] = serve_static
+    return app
+
 if __name__ == '__main__':
     # Get port from environment variable for deployment compatibility
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
 
+    app = create_app()
     app.logger.info(f"Starting ChemCraft on port {port}")
     app.run(debug=debug, host='0.0.0.0', port=port)
@@ -0,0 +1,138 @@
+"""Equation balancing: integer nullspace vs. Fraction elimination, cached and uncached.
+
+Usage: python benchmarks/bench_balance.py [--rounds N]
+
+Times typical 2-8 species reactions, split into plain and redox-heavy sets
+(permanganate, dichromate and nitric acid oxidations, ionic half-cells).
+Uncached runs use a balancer with its cache disabled, so every equation
+is parsed and solved; the parser's own cache is on in both, as in the app.
+The baseline solves the same matrices by Gauss-Jordan elimination over
+Fraction. Every result is checked for element and charge conservation.
+"""
+import argparse
+import os
+import sys
+import time
+from fractions import Fraction
+from math import lcm
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT, load_elements  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from equation_balancer import EquationBalancer, split_equation  # noqa: E402
+from formula_parser import FormulaParser  # noqa: E402
+
+TYPICAL = [
+    'H2 + O2 -> H2O',
+    'Fe + O2 -> Fe2O3',
+    'C3H8 + O2 -> CO2 + H2O',
+    'C8H18 + O2 -> CO2 + H2O',
+    'Al + HCl -> AlCl3 + H2',
+    'Ca(OH)2 + H3PO4 -> Ca3(PO4)2 + H2O',
+    'NH3 + O2 -> NO + H2O',
+    'Fe2(SO4)3 + KOH -> K2SO4 + Fe(OH)3',
+    'C6H12O6 + O2 -> CO2 + H2O',
+    'CuSO4·5H2O -> CuSO4 + H2O',
+]
+REDOX = [
+    'KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2',
+    'K2Cr2O7 + FeSO4 + H2SO4 -> Cr2(SO4)3 + Fe2(SO4)3 + K2SO4 + H2O',
+    'Cu + HNO3 -> Cu(NO3)2 + NO + H2O',
+    'As2S3 + HNO3 + H2O -> H3AsO4 + H2SO4 + NO',
+    'KMnO4 + H2C2O4 + H2SO4 -> K2SO4 + MnSO4 + CO2 + H2O',
+    'K4[Fe(CN)6] + KMnO4 + H2SO4 -> KHSO4 + Fe2(SO4)3 + MnSO4 + HNO3 + CO2 + H2O',
+    'MnO4^- + Fe^2+ + H+ -> Mn^2+ + Fe^3+ + H2O',
+    'Cr2O7^2- + H+ + I- -> Cr^3+ + I2 + H2O',
+    'P4 + OH- + H2O -> PH3 + H2PO2^-',
+    'Zn + NO3^- + H+ -> Zn^2+ + NH4+ + H2O',
+]
+
+
+def fraction_balance(matrix, columns):
+    """Reference solver: reduced row echelon form over Fraction"""
+    rows = [[Fraction(a) for a in row] for row in matrix]
+    pivots = []
+    for column in range(columns):
+        rank = len(pivots)
+        pivot = next((i for i in range(rank, len(rows)) if rows[i][column]), None)
+        if pivot is None:
+            continue
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        lead = rows[rank][column]
+        rows[rank] = [a / lead for a in rows[rank]]
+        for i, row in enumerate(rows):
+            if i != rank and row[column]:
+                factor = row[column]
+                rows[i] = [a - factor * b for a, b in zip(row, rows[rank])]
+        pivots.append(column)
+    free = next(column for column in range(columns) if column not in pivots)
+    solution = [Fraction(0)] * columns
+    solution[free] = Fraction(1)
+    for row, column in zip(rows, pivots):
+        solution[column] = -row[free]
+    scale = lcm(*(x.denominator for x in solution))
+    return [int(x * scale) for x in solution]
+
+
+def species_matrix(parser, equation):
+    reactants, products = split_equation(equation)
+    species = [(parser.parse(f), 1) for f in reactants] + [(parser.parse(f), -1) for f in products]
+    symbols = sorted({symbol for parsed, _ in species for symbol, _ in parsed.counts})
+    matrix = [[sign * dict(parsed.counts).get(symbol, 0) for parsed, sign in species] for symbol in symbols]
+    matrix.append([sign * parsed.charge for parsed, sign in species])
+    return matrix, len(species)
+
+
+def check(parser, equation, balanced):
+    totals = {}
+    for terms, sign in ((balanced.reactants, 1), (balanced.products, -1)):
+        for coefficient, formula in terms:
+            parsed = parser.parse(formula)
+            for symbol, count in parsed.counts:
+                totals[symbol] = totals.get(symbol, 0) + sign * coefficient * count
+            totals['charge'] = totals.get('charge', 0) + sign * coefficient * parsed.charge
+    if any(totals.values()):
+        raise SystemExit(f"Not balanced: {equation} -> {balanced}")
+
+
+def timed(function, equations, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for equation in equations:
+            function(equation)
+    return (time.perf_counter() - start) / (rounds * len(equations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    formula_parser = FormulaParser(e['symbol'] for e in load_elements())
+    uncached = EquationBalancer(formula_parser, cache_size=0)
+    cached = EquationBalancer(formula_parser)
+
+    print(f"{'set':>8}{'species':>9}{'fraction us':>13}{'uncached us':>13}{'cached us':>11}")
+    for name, equations in (('typical', TYPICAL), ('redox', REDOX)):
+        for equation in equations:
+            balanced = uncached.balance_equation(equation)
+            check(formula_parser, equation, balanced)
+            matrix, columns = species_matrix(formula_parser, equation)
+            expected = [c for c, _ in balanced.reactants + balanced.products]
+            if fraction_balance(matrix, columns) != expected:
+                raise SystemExit(f"Solvers disagree on {equation}")
+
+        species = sum(len(e.replace('->', '+').split(' + ')) for e in equations) / len(equations)
+        matrices = [species_matrix(formula_parser, e) for e in equations]
+        fraction = timed(lambda m: fraction_balance(*m), matrices, args.rounds)
+        print(f"{name:>8}{species:>9.1f}{fraction * 1e6:>13.1f}"
+              f"{timed(uncached.balance_equation, equations, args.rounds) * 1e6:>13.1f}"
+              f"{timed(cached.balance_equation, equations, args.rounds) * 1e6:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Compound catalogue import, startup and lookup cost as the catalogue grows.
+
+Usage: python benchmarks/bench_catalog.py [--sizes 1000 10000 100000 300000] [--store sqlite]
+
+For each size a synthetic NDJSON catalogue is written to a temporary
+directory, imported into a snapshot (or SQLite database), then opened in a
+fresh process to measure startup time (for a snapshot, including its search
+index) and private resident memory (mapped
+or cached file pages are shared page cache and excluded). Startup and RSS
+should stay flat while import time and file size grow linearly.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT, load_elements  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from compound_catalog import build_snapshot  # noqa: E402
+from compound_store import build_store  # noqa: E402
+from element_store import ElementStore  # noqa: E402
+
+# Run in a fresh interpreter: open the store, do lookups, report timings and RSS
+PROBE = r'''
+import json, os, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+
+def rss_kib():
+    # Private (non file-backed) resident memory; mapped snapshot pages are shared page cache
+    try:
+        with open('/proc/self/statm') as f:
+            resident, shared = map(int, f.read().split()[1:3])
+        return (resident - shared) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+from element_store import ElementStore
+from compound_catalog import CompoundCatalog
+from compound_store import SQLiteCompoundStore
+table = ElementStore(json.load(open(sys.argv[2]))['elements']).table
+queries = json.loads(sys.argv[4])
+before = rss_kib()
+start = time.perf_counter()
+if sys.argv[5] == 'sqlite':
+    catalog = SQLiteCompoundStore(sys.argv[3], table)
+else:
+    catalog = CompoundCatalog.open(sys.argv[3], table)
+    search = catalog.search_index()
+opened = time.perf_counter() - start
+start = time.perf_counter()
+hits = sum(catalog.exact(q) is not None for q in queries)
+lookup = (time.perf_counter() - start) / len(queries)
+rss = rss_kib()
+print(json.dumps({'open_ms': opened * 1e3, 'lookup_us': lookup * 1e6, 'hits': hits,
+                  'rss_growth_kib': rss - before}))
+'''
+
+
+def synthetic_compounds(elements, count, seed=0):
+    """Random but valid compounds with 1-5 elements, some given only by formula"""
+    rng = random.Random(seed)
+    symbols = [e['symbol'] for e in elements[:92]]
+    for i in range(count):
+        chosen = rng.sample(symbols, rng.randint(1, 5))
+        counts = {s: rng.randint(1, 12) for s in chosen}
+        compound = {
+            'name': f"Compound {i}",
+            'category': rng.choice(['Oxide', 'Halide', 'Salt', 'Organic']),
+            'uses': ['Research applications'],
+        }
+        if i % 4:
+            compound['element_counts'] = counts
+        else:
+            compound['formula'] = ''.join(f"{s}{n}" for s, n in counts.items())
+        yield compound
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--store', choices=('snapshot', 'sqlite'), default='snapshot')
+    args = parser.parse_args()
+
+    elements = load_elements()
+    table = ElementStore(elements).table
+    elements_path = os.path.join(ROOT, 'data', 'elements.json')
+
+    print(f"{'compounds':>10}{'import s':>10}{'file MB':>9}{'open ms':>9}{'lookup us':>11}{'private +KiB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            source = os.path.join(tmp, f"catalogue-{size}.ndjson")
+            with open(source, 'w') as f:
+                for compound in synthetic_compounds(elements, size):
+                    f.write(json.dumps(compound) + '\n')
+            path = os.path.join(tmp, f"catalogue-{size}.{args.store}")
+
+            start = time.perf_counter()
+            build = build_store if args.store == 'sqlite' else build_snapshot
+            build(source, path, table)
+            imported = time.perf_counter() - start
+
+            rng = random.Random(1)
+            sample = [c for c in synthetic_compounds(elements, min(size, 50000)) if 'element_counts' in c]
+            queries = [rng.choice(sample)['element_counts'] for _ in range(args.lookups)]
+            probe = subprocess.run(
+                [sys.executable, '-c', PROBE, ROOT, elements_path, path, json.dumps(queries), args.store],
+                check=True, capture_output=True, text=True)
+            result = json.loads(probe.stdout)
+            print(f"{size:>10,}{imported:>10.2f}{os.path.getsize(path) / 1e6:>9.1f}"
+                  f"{result['open_ms']:>9.2f}{result['lookup_us']:>11.1f}{result['rss_growth_kib']:>14,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Compound search: inverted index vs. a linear scan over the catalogue.
+
+Usage: python benchmarks/bench_compound_search.py [--sizes 10000 100000] [--queries N]
+
+Each size indexes a synthetic catalogue whose names, uses and facts are drawn
+from a Zipf-weighted vocabulary, then replays one- and two-word queries typed
+a prefix at a time. The scan baseline is a substring match over every text
+field of every compound: without an index, ranking has to visit them all.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from compound_search import FIELD_WEIGHTS, CompoundSearchIndex  # noqa: E402
+
+WORDS = ('acid oxide chloride sulfate nitrate carbonate hydroxide fluoride bromide iodide '
+         'phosphate silicate catalyst pigment ceramic glass battery fertilizer explosive '
+         'semiconductor magnet alloy coating medicine antiseptic bleach detergent fuel '
+         'reactor laser lens polymer solvent dye cement mineral crystal toxic soluble '
+         'stable volatile conductive transparent industrial laboratory nuclear optical').split()
+
+
+def synthetic_compounds(count, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+    def words(n):
+        return ' '.join(rng.choices(WORDS, weights, k=n))
+
+    for i in range(count):
+        yield {
+            'name': f"{words(2).title()} {i}",
+            'formula': f"X{rng.randint(1, 9)}Y{rng.randint(1, 9)}",
+            'category': rng.choice(['Oxide', 'Halide', 'Salt', 'Organic']),
+            'uses': [words(3) for _ in range(rng.randint(1, 3))],
+            'interesting_facts': [words(6)],
+        }
+
+
+def linear_scan(compounds, query, limit=10):
+    terms = query.lower().split()
+    results = []
+    for compound in compounds:
+        text = ' '.join(str(compound.get(field, '')) for field in FIELD_WEIGHTS).lower()
+        if all(term in text for term in terms):
+            results.append(compound)
+    return results[:limit]
+
+
+def build_workload(size, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < size:
+        phrase = ' '.join(rng.sample(WORDS, rng.randint(1, 2)))
+        queries.extend(phrase[:i] for i in range(2, len(phrase) + 1) if not phrase[i - 1].isspace())
+    return queries[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--scan-queries', type=int, default=20)
+    args = parser.parse_args()
+
+    workload = build_workload(args.queries)
+    print(f"{'compounds':>10}{'build s':>9}{'terms':>8}{'index us':>10}{'p99 us':>9}{'scan us':>11}")
+    for size in args.sizes:
+        compounds = list(synthetic_compounds(size))
+        start = time.perf_counter()
+        index = CompoundSearchIndex(compounds)
+        built = time.perf_counter() - start
+
+        timings = []
+        for query in workload:
+            start = time.perf_counter()
+            index.ranked(query, 10)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        start = time.perf_counter()
+        for query in workload[:args.scan_queries]:
+            linear_scan(compounds, query)
+        scan = (time.perf_counter() - start) / args.scan_queries
+
+        mean = sum(timings) / len(timings)
+        p99 = timings[int(len(timings) * 0.99)]
+        print(f"{size:>10,}{built:>9.2f}{len(index.vocabulary):>8,}{mean * 1e6:>10.0f}"
+              f"{p99 * 1e6:>9.0f}{scan * 1e6:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Formable-compound queries: element-set lattice vs. a scan over element masks.
+
+Usage: python benchmarks/bench_formable.py [--size 100000] [--queries N] [--store sqlite]
+
+Builds a synthetic catalogue (see bench_catalog.py), then asks which
+compounds can be made from random benches of 3, 6 and 10 elements. The
+baseline is the best case for a scan: every compound's 118-bit element mask
+precomputed in a Python list and tested with one AND per compound. Results
+of both are compared, so the benchmark doubles as a correctness check.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_catalog import synthetic_compounds  # noqa: E402
+from workloads import ROOT, load_elements  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from compound_catalog import CompoundCatalog, write_snapshot  # noqa: E402
+from compound_index import element_mask  # noqa: E402
+from compound_store import SQLiteCompoundStore, build_database  # noqa: E402
+from element_store import ElementStore  # noqa: E402
+
+BENCH_SIZES = (3, 6, 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--store', choices=('snapshot', 'sqlite'), default='snapshot')
+    args = parser.parse_args()
+
+    elements = load_elements()
+    table = ElementStore(elements).table
+    symbols = [e['symbol'] for e in elements[:92]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        path = os.path.join(tmp, f"catalogue.{args.store}")
+        if args.store == 'sqlite':
+            build_database(synthetic_compounds(elements, args.size), path, table)
+            catalog = SQLiteCompoundStore(path, table)
+        else:
+            with open(path, 'wb') as f:
+                write_snapshot(synthetic_compounds(elements, args.size), table, f)
+            catalog = CompoundCatalog.open(path, table)
+        print(f"{args.size:,} compounds imported in {time.perf_counter() - start:.1f}s")
+
+        masks = [element_mask(number for number, _ in catalog.counts(record))
+                 for record in range(len(catalog))] if args.store == 'snapshot' else None
+        if masks is None:
+            masks = [element_mask(table.numbers[table.index[s]] for s in compound['element_counts'])
+                     for compound in catalog]
+
+        rng = random.Random(2)
+        print(f"{'bench':>6}{'matches':>9}{'index us':>10}{'p99 us':>9}{'scan us':>10}")
+        for bench in BENCH_SIZES:
+            queries = [element_mask(table.numbers[table.index[s]] for s in rng.sample(symbols, bench))
+                       for _ in range(args.queries)]
+            timings, matches = [], 0
+            for query in queries:
+                begin = time.perf_counter()
+                found = catalog.formable_indexes(query)
+                timings.append(time.perf_counter() - begin)
+                matches += len(found)
+            timings.sort()
+
+            begin = time.perf_counter()
+            expected = [[i for i, mask in enumerate(masks) if not mask & ~query] for query in queries[:20]]
+            scan = (time.perf_counter() - begin) / len(expected)
+            for query, want in zip(queries, expected):
+                if catalog.formable_indexes(query) != want:
+                    raise SystemExit(f"Mismatch for mask {query:#x}")
+
+            print(f"{bench:>6}{matches / len(queries):>9.1f}{sum(timings) / len(timings) * 1e6:>10.0f}"
+                  f"{timings[int(len(timings) * 0.99)] * 1e6:>9.0f}{scan * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
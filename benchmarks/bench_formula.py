@@ -0,0 +1,77 @@
+"""Benchmark charge-balanced formula search, including worst-case element sets.
+
+Usage: python benchmarks/bench_formula.py [--repeat N]
+
+Times each element set on a cold engine (search) and a warm one (memoized).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from formula_engine import OXIDATION_STATES, FormulaEngine  # noqa: E402
+
+CASES = {
+    'binary ionic': ['Na', 'Cl'],
+    'binary covalent': ['C', 'O'],
+    'ternary oxoanion': ['Ca', 'C', 'O'],
+    'ternary multivalent': ['K', 'Mn', 'O'],
+    # Every element has several states: the widest assignment space
+    '6 multivalent': ['Mn', 'Os', 'Cl', 'N', 'S', 'U'],
+    '6 mixed': ['Fe', 'Cu', 'S', 'O', 'Cl', 'H'],
+    '8 second period': ['Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Na'],
+    # Large +/- imbalance: needs big counts on one side
+    'high charge': ['Os', 'Ru', 'F'],
+    # No negative state anywhere: rejected before searching
+    '6 metals': ['Fe', 'Cu', 'Zn', 'Ni', 'Co', 'Mn'],
+    # Only one element can go negative, and it is the most constrained
+    '6 cations, 1 anion': ['Mn', 'Os', 'V', 'Mo', 'W', 'Re', 'H'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--sweep', type=int, default=300, help='random element sets per size')
+    args = parser.parse_args()
+
+    print(f"{'case':<22}{'cold us':>10}{'warm us':>10}  formula")
+    for label, symbols in CASES.items():
+        cold = float('inf')
+        for _ in range(args.repeat):
+            engine = FormulaEngine()
+            start = time.perf_counter()
+            result = engine.balance(symbols)
+            cold = min(cold, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat * 100):
+            engine.balance(symbols)
+        warm = (time.perf_counter() - start) / (args.repeat * 100)
+
+        formula = ''.join(f"{s}{c if c > 1 else ''}" for s, _, c in result.parts) if result else '-'
+        print(f"{label:<22}{cold * 1e6:>10.1f}{warm * 1e6:>10.2f}  {formula}")
+
+    # Random element sets find the slow corners the hand-picked cases miss
+    rng = random.Random(0)
+    symbols = sorted(OXIDATION_STATES)
+    print(f"\n{'random sets':<22}{'mean us':>10}{'max us':>10}  slowest")
+    for size in (2, 3, 6, 8, 10):
+        timings = []
+        for _ in range(args.sweep):
+            sample = rng.sample(symbols, size)
+            engine = FormulaEngine()
+            start = time.perf_counter()
+            engine.balance(sample)
+            timings.append((time.perf_counter() - start, sample))
+        slowest = max(timings)
+        mean = sum(t for t, _ in timings) / len(timings)
+        print(f"{size} elements{'':<12}{mean * 1e6:>10.1f}{slowest[0] * 1e6:>10.1f}  {' '.join(slowest[1])}")
+
+
+if __name__ == '__main__':
+    main()
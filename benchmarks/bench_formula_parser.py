@@ -0,0 +1,83 @@
+"""Benchmark the formula parser against the 100k formulas/s target.
+
+Usage: python benchmarks/bench_formula_parser.py [--formulas N]
+
+Measures uncached parsing (cache disabled) and the cached path, plus
+parse + molecular mass together.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT, load_elements  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from element_table import ElementTable  # noqa: E402
+from formula_parser import FormulaParser  # noqa: E402
+
+TARGET = 100_000
+
+SAMPLES = [
+    'H2O', 'NaCl', 'CO2', 'C6H12O6', 'Ca(OH)2', 'Ca(OH)2·2H2O', 'CuSO4·5H2O',
+    'Fe2(SO4)3', 'K4[Fe(CN)6]', 'SO4^2-', 'NH4+', '[Cu(NH3)4]^2+', 'CH3COOH',
+    'Al2(SO4)3·18H2O', 'Mg3(PO4)2', 'C8H10N4O2', 'KAl(SO4)2·12H2O',
+]
+
+
+def synthetic_formulas(elements, count, seed=0):
+    """Unique random formulas so the uncached path cannot hit the cache"""
+    rng = random.Random(seed)
+    symbols = [e['symbol'] for e in elements[:86]]
+    formulas = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            group = ''.join(f"{rng.choice(symbols)}{rng.choice(['', 2, 3, 4])}"
+                            for _ in range(rng.randint(1, 3)))
+            parts.append(f"({group}){rng.randint(2, 4)}" if rng.random() < 0.3 else group)
+        formula = ''.join(parts)
+        if rng.random() < 0.2:
+            formula += f"·{rng.randint(1, 10)}H2O"
+        formulas.append(formula)
+    return formulas
+
+
+def rate(label, fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    per_second = len(items) / (time.perf_counter() - start)
+    verdict = 'OK' if per_second >= TARGET else 'below target'
+    print(f"{label:<28}{per_second:>12,.0f} formulas/s  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--formulas', type=int, default=200_000)
+    args = parser.parse_args()
+
+    elements = load_elements()
+    masses = ElementTable(elements)
+    symbols = [e['symbol'] for e in elements]
+
+    unique = synthetic_formulas(elements, args.formulas)
+    repeated = [SAMPLES[i % len(SAMPLES)] for i in range(args.formulas)]
+
+    uncached = FormulaParser(symbols, cache_size=0)
+    rate('uncached parse (unique)', uncached.parse, unique)
+    rate('uncached parse (samples)', uncached.parse, repeated)
+
+    cached = FormulaParser(symbols)
+    rate('cached parse (samples)', cached.parse, repeated)
+    rate('cached parse + mass', lambda f: masses.molecular_mass(cached.parse(f).counts), repeated)
+    print(f"cache: {cached.cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Measure the overhead of request metrics against the 2% budget.
+
+Usage: python benchmarks/bench_metrics.py [--requests N]
+
+Runs the same workload through the Flask test client with metrics enabled
+and disabled, and times Metrics.observe_request() on its own.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT, load_elements, route_requests  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from metrics import Metrics  # noqa: E402
+
+BUDGET = 0.02
+
+
+def time_workload(client, workload):
+    start = time.perf_counter()
+    for method, path, body in workload:
+        client.open(path, method=method, json=body).close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=7)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    n = 200_000
+    start = time.perf_counter()
+    for i in range(n):
+        metrics.observe_request('get_element', 'GET', 200, 0.0004, 1024)
+    record_ns = (time.perf_counter() - start) / n * 1e9
+    print(f"observe_request: {record_ns:.0f} ns per call")
+
+    logging.disable(logging.CRITICAL)
+    from app import create_app
+    app = create_app()
+    app_metrics = app.extensions['metrics']
+    client = app.test_client()
+    elements = load_elements()
+    per_route = max(args.requests // 4, 1)
+    workload = []
+    for route in ('element', 'search', 'quiz', 'mix'):
+        workload += route_requests(route, elements, per_route)
+
+    time_workload(client, workload)  # warm caches
+
+    # Interleave the two configurations so drift affects both equally
+    baseline = instrumented = float('inf')
+    for _ in range(args.rounds):
+        app_metrics.enabled = False
+        baseline = min(baseline, time_workload(client, workload))
+        app_metrics.enabled = True
+        instrumented = min(instrumented, time_workload(client, workload))
+
+    per_request = baseline / len(workload)
+    print(f"without metrics: {per_request * 1e6:.1f} us/request")
+    print(f"with metrics:    {instrumented / len(workload) * 1e6:.1f} us/request")
+    print(f"recording cost vs request time: {record_ns * 1e-9 / per_request:.2%}")
+    overhead = instrumented / baseline - 1
+    print(f"measured overhead: {overhead:+.2%} (budget {BUDGET:.0%}) -> "
+          f"{'OK' if overhead < BUDGET else 'OVER BUDGET'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Precomputed mix table: build cost, size, and /api/mix with and without it.
+
+Usage: python benchmarks/bench_mix_table.py [--max-count 2] [--ternary-max-count 0] [--lookups N]
+
+Builds a table (by default every 1- and 2-element composition with up to 2
+of each element, a quick subset of the production build) into a temporary
+file, then times dynamic compositions three ways: the live generation
+pipeline, a table lookup, and POST /api/mix end to end before and after the
+app reloads with the table. The dynamic-compound LRU is disabled so every
+request pays the generation or the lookup. Lookups are checked against the
+live pipeline.
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+
+def mix_latency(client, selections):
+    timings = []
+    for elements in selections:
+        start = time.perf_counter()
+        response = client.post('/api/mix', json={'elements': elements})
+        timings.append(time.perf_counter() - start)
+        if response.get_json()['match_type'] != 'dynamic':
+            raise SystemExit(f"Expected a dynamic result for {elements}")
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-count', type=int, default=2)
+    parser.add_argument('--ternary-max-count', type=int, default=0)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mix_table.bin')
+        os.environ.update(MIX_TABLE_FILE=path, DYNAMIC_COMPOUND_CACHE_SIZE='0', DATA_RELOAD_INTERVAL='0',
+                          METRICS_ENABLED='0')
+        logging.disable(logging.CRITICAL)
+        import app
+        from mix_table import build_table
+
+        flask_app = app.create_app()
+        flask_app.app_context().push()
+        data = app.current_data()
+        table = data.elements.table
+        start = time.perf_counter()
+        count = build_table(path, app.build_dynamic_compound, dict(zip(table.numbers, table.symbols)),
+                            (args.max_count, args.max_count, args.ternary_max_count),
+                            app.mix_table_fingerprint(data.elements), processes=args.processes)
+        built = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(f"{count:,} results built in {built:.1f}s ({count / built:,.0f}/s), "
+              f"{size / 1e6:.1f} MB, {size / count:.0f} bytes per result")
+
+        rng = random.Random(4)
+        symbols = list(table.symbols)
+        selections = []
+        while len(selections) < args.lookups:
+            chosen = rng.sample(symbols, rng.choice([1, 2, 3] if args.ternary_max_count else [1, 2]))
+            limit = args.ternary_max_count if len(chosen) == 3 else args.max_count
+            counts = {symbol: rng.randint(1, limit) for symbol in chosen}
+            if data.compounds.exact(counts) is None and data.compounds.ratio(counts) is None:
+                selections.append([symbol for symbol, n in counts.items() for _ in range(n)])
+        compositions = [app.count_elements(elements) for elements in selections]
+
+        client = flask_app.test_client()
+        live_http = mix_latency(client, selections)
+        app.data_reloader().reload(wait=True)
+        mix_table = app.current_data().mix_table
+
+        start = time.perf_counter()
+        for counts in compositions:
+            app.build_dynamic_compound(counts)
+        live = (time.perf_counter() - start) / len(compositions)
+
+        pairs = [[(table.numbers[table.index[s]], n) for s, n in counts.items()] for counts in compositions]
+        start = time.perf_counter()
+        for composition in pairs:
+            mix_table.get(composition)
+        lookup = (time.perf_counter() - start) / len(pairs)
+        for counts, composition in zip(compositions, pairs):
+            if mix_table.get(composition) != app.build_dynamic_compound(counts):
+                raise SystemExit(f"Table disagrees with the pipeline for {counts}")
+
+        table_http = mix_latency(client, selections)
+        print(f"{'':>14}{'live us':>10}{'table us':>10}")
+        print(f"{'generate':>14}{live * 1e6:>10.0f}{lookup * 1e6:>10.0f}")
+        print(f"{'POST /api/mix':>14}{live_http * 1e6:>10.0f}{table_http * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Per-route latency, throughput and allocation benchmark for the ChemCraft API.
+
+Usage:
+    python benchmarks/bench_routes.py                         # Flask test client, in-process
+    python benchmarks/bench_routes.py --url http://localhost:5000
+    python benchmarks/bench_routes.py --output results.json
+    python benchmarks/bench_routes.py --compare results.json  # diff against a previous run
+
+Results are written as JSON tagged with the current git commit so runs from
+different commits can be compared with --compare.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from workloads import ROOT, ROUTES, load_elements, route_requests  # noqa: E402
+
+HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+ALLOC_SAMPLES = 200
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class TestClientTarget:
+    """Sends requests through Flask's test client, in-process"""
+
+    name = 'test-client'
+
+    def __init__(self):
+        sys.path.insert(0, ROOT)
+        logging.disable(logging.CRITICAL)
+        from app import create_app
+        self.client = create_app().test_client()
+
+    def send(self, method, path, body):
+        response = self.client.open(path, method=method, json=body, headers=HEADERS)
+        response.close()
+        return response.status_code
+
+
+class ServerTarget:
+    """Sends requests over HTTP to a running server"""
+
+    name = 'server'
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def send(self, method, path, body):
+        response = self.session.request(method, self.base_url + path, json=body, headers=HEADERS)
+        return response.status_code
+
+
+def measure_allocations(target, workload):
+    """Mean peak traced allocation (KiB) per request, sampled separately from timing"""
+    sample = workload[:ALLOC_SAMPLES]
+    tracemalloc.start()
+    peaks = []
+    try:
+        for method, path, body in sample:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            target.send(method, path, body)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(peaks) / 1024
+
+
+def bench_route(target, route, elements, count, seed, warmup):
+    workload = route_requests(route, elements, count + warmup, seed)
+    for method, path, body in workload[:warmup]:
+        target.send(method, path, body)
+    workload = workload[warmup:]
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for method, path, body in workload:
+        t0 = time.perf_counter()
+        status = target.send(method, path, body)
+        latencies.append(time.perf_counter() - t0)
+        if status >= 500:
+            errors += 1
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100)
+    result = {
+        'requests': len(workload),
+        'errors': errors,
+        'throughput_rps': len(workload) / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1e3,
+        'p50_ms': cuts[49] * 1e3,
+        'p95_ms': cuts[94] * 1e3,
+        'p99_ms': cuts[98] * 1e3,
+        'alloc_kib_per_request': None,
+    }
+    if isinstance(target, TestClientTarget):
+        result['alloc_kib_per_request'] = measure_allocations(target, workload)
+    return result
+
+
+def print_results(results, baseline=None):
+    header = f"{'route':<16}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'KiB/req':>9}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    for route, r in results['routes'].items():
+        alloc = r['alloc_kib_per_request']
+        alloc = '-' if alloc is None else f"{alloc:.1f}"
+        line = (f"{route:<16}{r['throughput_rps']:>10,.0f}{r['p50_ms']:>9.3f}"
+                f"{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+                f"{alloc:>9}")
+        base = baseline['routes'].get(route) if baseline else None
+        if base:
+            change = r['throughput_rps'] / base['throughput_rps'] - 1
+            line += f"{change:>+10.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemCraft per-route benchmark')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--routes', nargs='+', choices=ROUTES, default=list(ROUTES))
+    parser.add_argument('--requests', type=int, default=2000, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='previous JSON results to compare throughput against')
+    args = parser.parse_args()
+
+    target = ServerTarget(args.url) if args.url else TestClientTarget()
+    elements = load_elements()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'target': target.name,
+            'url': args.url,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'requests_per_route': args.requests,
+            'seed': args.seed,
+        },
+        'routes': {},
+    }
+    for route in args.routes:
+        results['routes'][route] = bench_route(
+            target, route, elements, args.requests, args.seed, args.warmup)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"comparing against commit {baseline['meta'].get('commit')}")
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
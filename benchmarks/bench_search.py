@@ -0,0 +1,83 @@
+"""Compare the element search index against the original linear scan.
+
+Usage: python benchmarks/bench_search.py [--queries N] [--fuzzy]
+
+The workload replays incremental prefixes of element names and symbols
+(what the search box sends while a user types) plus atomic numbers.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from search_index import ElementSearchIndex  # noqa: E402
+
+TARGET_QPS = 10_000
+
+
+def load_elements():
+    with open(os.path.join(ROOT, 'data', 'elements.json')) as f:
+        return json.load(f)['elements']
+
+
+def linear_scan(elements, query):
+    """The original /api/search implementation"""
+    query = query.lower()
+    results = []
+    for element in elements:
+        if (element['name'].lower().startswith(query) or
+                element['symbol'].lower().startswith(query) or
+                str(element['number']) == query):
+            results.append(element)
+    return results[:10]
+
+
+def build_workload(elements, size, seed=0):
+    rng = random.Random(seed)
+    pool = []
+    for e in elements:
+        name = e['name']
+        pool.extend(name[:i] for i in range(1, len(name) + 1))
+        pool.append(e['symbol'])
+        pool.append(str(e['number']))
+    return [rng.choice(pool) for _ in range(size)]
+
+
+def run(label, fn, workload):
+    start = time.perf_counter()
+    for query in workload:
+        fn(query)
+    elapsed = time.perf_counter() - start
+    qps = len(workload) / elapsed
+    print(f"{label:<22} {qps:>12,.0f} queries/s  {elapsed / len(workload) * 1e6:8.2f} us/query")
+    return qps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=100_000)
+    parser.add_argument('--fuzzy', action='store_true', help='enable fuzzy matching in the index')
+    args = parser.parse_args()
+
+    elements = load_elements()
+    start = time.perf_counter()
+    index = ElementSearchIndex(elements)
+    print(f"index build: {(time.perf_counter() - start) * 1e3:.2f} ms for {len(elements)} elements")
+
+    workload = build_workload(elements, args.queries)
+    scan_qps = run('linear scan', lambda q: linear_scan(elements, q), workload)
+    index_qps = run('search index', lambda q: index.search(q, fuzzy=args.fuzzy), workload)
+
+    print(f"speedup: {index_qps / scan_qps:.1f}x")
+    for label, qps in (('linear scan', scan_qps), ('search index', index_qps)):
+        verdict = 'meets' if qps >= TARGET_QPS else 'misses'
+        print(f"{label} {verdict} the {TARGET_QPS:,} queries/s target")
+
+
+if __name__ == '__main__':
+    main()
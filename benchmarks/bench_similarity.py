@@ -0,0 +1,85 @@
+"""Similar-compound queries: threshold-algorithm top-k vs. scoring every compound.
+
+Usage: python benchmarks/bench_similarity.py [--size 100000] [--queries N] [--limit K]
+
+Indexes the composition vectors of a synthetic catalogue (see
+bench_catalog.py) in memory and maps the index saved in its snapshot, then
+asks the mapped one for the compounds closest to random 1-5 element
+compositions, like the ones /api/mix generates. The baseline scores every
+row of the matrix, which is what a single vectorized pass does without
+NumPy. Top-k results are compared with the scan and the in-memory index, so
+the benchmark doubles as a correctness check.
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_catalog import synthetic_compounds  # noqa: E402
+from workloads import ROOT, load_elements  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from compound_catalog import CompoundCatalog  # noqa: E402
+from compound_similarity import CompositionIndex, composition_vector  # noqa: E402
+from element_store import ElementStore  # noqa: E402
+
+
+def scan(index, pairs, limit):
+    vector = composition_vector(pairs)
+    scored = ((index.similarity(vector, doc_id), -doc_id) for doc_id in range(len(index)))
+    return [(score, -doc_id) for score, doc_id in heapq.nlargest(limit, scored) if score > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--scan-queries', type=int, default=10)
+    args = parser.parse_args()
+
+    elements = load_elements()
+    table = ElementStore(elements).table
+    catalog = CompoundCatalog.from_compounds(synthetic_compounds(elements, args.size), table)
+    start = time.perf_counter()
+    built = CompositionIndex(catalog.compositions())
+    print(f"{len(built):,} composition vectors indexed in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    index = catalog.similarity_index()
+    print(f"mapped from the snapshot in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    rng = random.Random(3)
+    numbers = [e['number'] for e in elements[:92]]
+    print(f"{'elements':>9}{'index us':>10}{'p99 us':>9}{'scan us':>10}")
+    for size in range(1, 6):
+        queries = [[(number, rng.randint(1, 12)) for number in sorted(rng.sample(numbers, size))]
+                   for _ in range(args.queries)]
+        timings = []
+        for pairs in queries:
+            begin = time.perf_counter()
+            index.nearest(pairs, args.limit)
+            timings.append(time.perf_counter() - begin)
+        timings.sort()
+
+        begin = time.perf_counter()
+        expected = [scan(index, pairs, args.limit) for pairs in queries[:args.scan_queries]]
+        scanned = (time.perf_counter() - begin) / len(expected)
+        for pairs, want in zip(queries, expected):
+            got = index.nearest(pairs, args.limit)
+            if got != built.nearest(pairs, args.limit):
+                raise SystemExit(f"Mapped index differs for {pairs}")
+            if [round(score, 9) for score, _ in got] != [round(score, 9) for score, _ in want]:
+                raise SystemExit(f"Mismatch for {pairs}")
+
+        print(f"{size:>9}{sum(timings) / len(timings) * 1e6:>10.0f}"
+              f"{timings[int(len(timings) * 0.99)] * 1e6:>9.0f}{scanned * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Simulate a class of participants in one quiz room and report broadcast latency.
+
+Usage:
+    python benchmarks/load_quiz_rooms.py                       # starts a local room server
+    python room_server.py --port 5001 &
+    python benchmarks/load_quiz_rooms.py --url http://localhost:5001 --participants 1000
+
+Every participant joins over its own keep-alive connection, holds an event
+stream open and answers each question after a random think time. The host
+asks --questions questions, and each one closes as soon as everyone has
+answered. Reports join and answer latency, and how long each question took
+to reach every participant, measured from the moment the host's request
+was sent. Each participant's final score is checked against the answers
+it saw revealed. The load generator runs on one event loop, so on a
+single core it competes with a local server for CPU.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client for the room server's JSON API"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n"
+                          .encode('latin-1') + data)
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        length = 0
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        payload = await self.reader.readexactly(length) if length else b''
+        return status, json.loads(payload) if payload else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def event_stream(host, port, path):
+    """(event, data) pairs from a text/event-stream, ignoring comments"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode('latin-1'))
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        while True:
+            frame = await reader.readuntil(b'\n\n')
+            event = data = None
+            for line in frame.decode('utf-8').split('\n'):
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: '):
+                    data = json.loads(line[6:])
+            if event is not None:
+                yield event, data
+    finally:
+        writer.close()
+
+
+class Run:
+    def __init__(self, host, port, room, participants, think):
+        self.host, self.port, self.room = host, port, room
+        self.participants = participants
+        self.think = think
+        self.joined = asyncio.Event()
+        self.join_count = 0
+        self.join_latency = []
+        self.answer_latency = {}  # question number -> seconds per answer
+        self.question_sent = {}  # question number -> perf_counter() when the host asked
+        self.question_received = {}
+        self.reveal_received = {}
+        self.revealed = {}  # question number -> asyncio.Event once everyone saw the reveal
+        self.errors = 0
+        self.mismatches = 0
+
+    def reveal_event(self, number):
+        return self.revealed.setdefault(number, asyncio.Event())
+
+
+async def participant(run, index, connect_slots):
+    rng = random.Random(index)
+    connection = Connection(run.host, run.port)
+    async with connect_slots:
+        start = time.perf_counter()
+        status, joined = await connection.request('POST', f"/rooms/{run.room}/join", {'name': f"Student {index}"})
+        run.join_latency.append(time.perf_counter() - start)
+        if status != 201:
+            raise SystemExit(f"Join failed: {status} {joined}")
+        stream = event_stream(run.host, run.port, f"/rooms/{run.room}/events")
+        await anext(stream)  # initial state
+    token = joined['token']
+    run.join_count += 1
+    if run.join_count == run.participants:
+        run.joined.set()
+
+    async def answer(number, choices):
+        await asyncio.sleep(rng.uniform(0.1, run.think))
+        choice = rng.randrange(choices)
+        start = time.perf_counter()
+        status, _ = await connection.request('POST', f"/rooms/{run.room}/answer",
+                                             {'token': token, 'question': number, 'answer_index': choice})
+        run.answer_latency.setdefault(number, []).append(time.perf_counter() - start)
+        if status != 200:
+            run.errors += 1
+        return choice
+
+    pending = {}
+    correct = 0
+    async for event, data in stream:
+        now = time.perf_counter()
+        if event == 'question':
+            run.question_received.setdefault(data['number'], []).append(now)
+            pending[data['number']] = asyncio.create_task(answer(data['number'], len(data['answers'])))
+        elif event == 'reveal':
+            number = data['number']
+            run.reveal_received.setdefault(number, []).append(now)
+            if await pending.pop(number) == data['correct_index']:
+                correct += 1
+            if len(run.reveal_received[number]) == run.participants:
+                run.reveal_event(number).set()
+        elif event == 'finished':
+            break
+    await stream.aclose()
+
+    status, me = await connection.request('GET', f"/rooms/{run.room}/me?token={token}")
+    if status != 200 or me['correct'] != correct:
+        run.mismatches += 1
+    connection.close()
+
+
+def percentiles(values):
+    cuts = statistics.quantiles(values, n=100)
+    return cuts[49] * 1e3, cuts[98] * 1e3, max(values) * 1e3
+
+
+async def simulate(host, port, args):
+    host_connection = Connection(host, port)
+    status, created = await host_connection.request('POST', '/rooms', {'questions': args.questions,
+                                                                       'seconds': args.seconds})
+    if status != 201:
+        raise SystemExit(f"Could not create a room: {status} {created}")
+    run = Run(host, port, created['room'], args.participants, args.think)
+    connect_slots = asyncio.Semaphore(args.connect_concurrency)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(participant(run, i, connect_slots)) for i in range(args.participants)]
+    await run.joined.wait()
+    joined = time.perf_counter() - start
+    p50, p99, _ = percentiles(run.join_latency)
+    print(f"{args.participants} participants joined and streaming in {joined:.1f}s "
+          f"(join p50 {p50:.1f} ms, p99 {p99:.1f} ms)")
+
+    print(f"{'question':>8}{'deliver p50':>13}{'p99':>8}{'max':>8}{'answer p50':>12}{'p99':>8}{'reveal spread':>15}")
+    for number in range(1, args.questions + 1):
+        run.question_sent[number] = time.perf_counter()
+        await host_connection.request('POST', f"/rooms/{run.room}/next", {'host_token': created['host_token']})
+        await run.reveal_event(number).wait()
+        received = run.question_received[number]
+        deliver = percentiles([t - run.question_sent[number] for t in received])
+        answer = percentiles(run.answer_latency[number])
+        spread = max(run.reveal_received[number]) - min(run.reveal_received[number])
+        print(f"{number:>8}{deliver[0]:>10.1f} ms{deliver[1]:>8.1f}{deliver[2]:>8.1f}"
+              f"{answer[0]:>9.1f} ms{answer[1]:>8.1f}{spread * 1e3:>12.1f} ms")
+    await asyncio.gather(*tasks)
+
+    _, health = await host_connection.request('GET', '/health')
+    host_connection.close()
+    print(f"server: {health['frames_sent']:,} frames sent, {health['lagging_subscribers']} lagging, "
+          f"{health['dropped_subscribers']} dropped subscribers; "
+          f"{run.errors} rejected answers, {run.mismatches} score mismatches")
+    if run.errors or run.mismatches:
+        raise SystemExit(1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='running room server (default: start one locally)')
+    parser.add_argument('--participants', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=5)
+    parser.add_argument('--seconds', type=int, default=30, help='time limit per question')
+    parser.add_argument('--think', type=float, default=3.0, help='longest think time before answering')
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        env = dict(os.environ, LOG_LEVEL='WARNING', ROOM_MAX_PARTICIPANTS=str(args.participants))
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'room_server.py'),
+                                   '--host', host, '--port', str(port)], env=env)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise SystemExit('Room server did not start')
+                time.sleep(0.1)
+    try:
+        asyncio.run(simulate(host, port, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Drive a running ChemCraft server with concurrent clients and report requests/s.
+
+Usage:
+    python app.py &                                   # dev server baseline
+    gunicorn -c gunicorn.conf.py --bind :8000 &       # production server
+    python benchmarks/load_test.py --url http://localhost:5000 --url http://localhost:8000
+
+Each URL is tested in turn with the same workload so the results are
+directly comparable.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+SYMBOLS = ['H', 'O', 'Na', 'Cl', 'C', 'N', 'Fe', 'Cu', 'Ca', 'S', 'Mg', 'K']
+
+
+def pick_request(rng):
+    """Return (method, path, json body) for one request of the traffic mix"""
+    roll = rng.random()
+    if roll < 0.30:
+        return 'GET', '/api/quiz/random', None
+    if roll < 0.55:
+        elements = [{'symbol': rng.choice(SYMBOLS)} for _ in range(rng.randint(1, 4))]
+        return 'POST', '/api/mix', {'elements': elements}
+    if roll < 0.75:
+        return 'GET', f"/api/search?q={rng.choice(SYMBOLS).lower()}", None
+    if roll < 0.90:
+        return 'GET', f"/api/element/{rng.randint(1, 118)}", None
+    return 'GET', '/api/random-compound', None
+
+
+def client(base_url, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        method, path, body = pick_request(rng)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, json=body, timeout=10)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(path)
+
+
+def run(base_url, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(base_url, deadline, i, latencies, errors))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"{base_url}: no requests completed")
+        return
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{base_url}: {len(latencies) / elapsed:,.0f} req/s over {len(latencies)} requests, "
+          f"p50 {cuts[49] * 1e3:.1f} ms, p99 {cuts[98] * 1e3:.1f} ms, errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemCraft HTTP load test')
+    parser.add_argument('--url', action='append', required=True, help='server base URL (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per URL')
+    args = parser.parse_args()
+
+    for url in args.url:
+        run(url.rstrip('/'), args.concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Synthetic traffic shaped like real ChemCraft usage, shared by the benchmarks"""
+import json
+import os
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = ('elements', 'element', 'search', 'quiz', 'mix', 'random_compound')
+
+
+def load_elements():
+    with open(os.path.join(ROOT, 'data', 'elements.json')) as f:
+        return json.load(f)['elements']
+
+
+def zipf_weights(n, s=1.1):
+    """Zipf(s) weights for ranks 1..n"""
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def mix_combinations(elements, count, seed=0, pool_size=500, max_atoms=6, s=1.1):
+    """Element combinations for /api/mix drawn Zipf-style from a fixed pool.
+
+    A few hundred combinations account for most traffic (students repeat the
+    classics), with a long tail of one-offs. Lighter elements are picked more
+    often when building the pool.
+    """
+    rng = random.Random(seed)
+    symbols = [e['symbol'] for e in elements]
+    symbol_weights = zipf_weights(len(symbols), 0.8)
+    pool = []
+    for _ in range(pool_size):
+        atoms = rng.randint(1, max_atoms)
+        pool.append(rng.choices(symbols, weights=symbol_weights, k=atoms))
+    return rng.choices(pool, weights=zipf_weights(len(pool), s), k=count)
+
+
+def search_prefixes(elements, count, seed=0, s=1.0):
+    """Queries for /api/search as typed: 'c', 'ca', 'car', ... per chosen element"""
+    rng = random.Random(seed)
+    names = [e['name'].lower() for e in elements]
+    weights = zipf_weights(len(names), s)
+    queries = []
+    while len(queries) < count:
+        name = rng.choices(names, weights=weights)[0]
+        typed = rng.randint(1, len(name))
+        queries.extend(name[:i] for i in range(1, typed + 1))
+    return queries[:count]
+
+
+def route_requests(route, elements, count, seed=0):
+    """(method, path, json body) tuples for one benchmarked route"""
+    rng = random.Random(seed)
+    if route == 'elements':
+        return [('GET', '/api/elements', None)] * count
+    if route == 'element':
+        weights = zipf_weights(len(elements), 0.8)
+        numbers = rng.choices([e['number'] for e in elements], weights=weights, k=count)
+        return [('GET', f"/api/element/{n}", None) for n in numbers]
+    if route == 'search':
+        return [('GET', f"/api/search?q={q}", None) for q in search_prefixes(elements, count, seed)]
+    if route == 'quiz':
+        return [('GET', '/api/quiz/random', None)] * count
+    if route == 'mix':
+        return [('POST', '/api/mix', {'elements': [{'symbol': s} for s in combo]})
+                for combo in mix_combinations(elements, count, seed)]
+    if route == 'random_compound':
+        return [('GET', '/api/random-compound', None)] * count
+    raise ValueError(f"Unknown route: {route}")
@@ -0,0 +1,675 @@
+"""Compound catalogue import and memory-mapped binary snapshots.
+
+A catalogue (JSON array, {"compounds": [...]}, or NDJSON) is streamed one
+compound at a time, validated, normalized and written to a snapshot file:
+
+    header | per-record columns | element counts | hash indexes | lattice |
+    search index | similarity index | blobs
+
+Per-record columns are fixed-width arrays (blob offset/length, offset into
+the counts array, molecular mass). Element counts are packed as one uint32
+per element (atomic number << 24 | count). The exact-composition and
+element-set indexes are arrays of 64-bit hashes sorted for bisect, each with
+a parallel array of record numbers. The lattice is a trie of the distinct
+element sets (atomic numbers ascending) stored breadth-first, so each
+node's children are a contiguous, sorted range; it answers "which compounds
+use only these elements" by walking just the branches inside the query set.
+The search and similarity indexes are compound_search's inverted index and
+compound_similarity's composition index, saved as flat arrays so they are
+mapped rather than rebuilt. Blobs hold each compound's compact JSON,
+joined by commas so that '[' + blobs + ']' is the whole catalogue as a JSON
+array.
+
+CompoundCatalog maps a snapshot with mmap, so opening one costs the same
+regardless of catalogue size and pages are only read when a lookup or
+response touches them. Worker processes forked after loading share them.
+
+Usage:
+    python compound_catalog.py catalogue.ndjson -o data/compounds.snapshot
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from compound_index import mask_numbers, ratio_string
+from compound_search import SECTIONS as SEARCH_SECTIONS
+from compound_search import CompoundSearchIndex, MappedSearchIndex
+from compound_similarity import SECTIONS as SIMILARITY_SECTIONS
+from compound_similarity import CompositionIndex, MappedCompositionIndex
+from formula_parser import FormulaError, FormulaParser
+
+MAGIC = b'CCSNAP01'
+VERSION = 6
+CHUNK_SIZE = 1 << 16
+MAX_COUNT = (1 << 24) - 1
+
+# Section name -> array typecode, in file order
+SECTIONS = (
+    ('blob_offsets', 'Q'),
+    ('blob_lengths', 'I'),
+    ('count_offsets', 'I'),      # record_count + 1 entries
+    ('masses', 'd'),
+    ('counts', 'I'),             # atomic number << 24 | count
+    ('composition_hashes', 'Q'),
+    ('composition_records', 'I'),
+    ('element_set_hashes', 'Q'),
+    ('element_set_records', 'I'),
+    ('lattice_numbers', 'H'),        # atomic number of each trie node (0 at the root)
+    ('lattice_children', 'I'),       # node count + 1 entries; children of n: [c[n], c[n + 1])
+    ('lattice_record_offsets', 'I'),  # node count + 1 entries into lattice_records
+    ('lattice_records', 'I'),        # records whose element set ends at each node
+    *SEARCH_SECTIONS,                # compound_search.MappedSearchIndex
+    *SIMILARITY_SECTIONS,            # compound_similarity.MappedCompositionIndex
+    ('blobs', 'B'),
+)
+# magic, version, byte order, record count, source size, source mtime (ns),
+# element data digest, source digest, blobs digest
+HEADER = struct.Struct('<8sIcxxxIQq16s16s16s')
+# Where the source mtime sits in the header, for updating it in place
+MTIME_OFFSET = struct.calcsize('<8sIcxxxIQ')
+SECTION_ENTRY = struct.Struct('<QQ')  # offset, byte length
+HEADER_SIZE = HEADER.size + SECTION_ENTRY.size * len(SECTIONS)
+
+
+# What a snapshot or database was built from: the catalogue's size, mtime
+# and content digest, and a digest of the element data
+SourceFingerprint = namedtuple('SourceFingerprint', 'size mtime_ns elements digest')
+NO_SOURCE = SourceFingerprint(0, 0, bytes(16), bytes(16))
+
+
+class CatalogError(ValueError):
+    """Raised for unreadable catalogues or snapshots"""
+
+
+# Streaming readers
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """Yield the objects of a JSON array (or of its "compounds" key) one at a time"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    # Find the opening bracket of the array
+    skip(' \t\r\n')
+    if pos >= len(buf):
+        raise CatalogError('Catalogue is empty')
+    if buf[pos] == '{':
+        while True:
+            key = buf.find('"compounds"', pos)
+            if key >= 0:
+                pos = key + len('"compounds"')
+                break
+            if eof:
+                raise CatalogError('No "compounds" array in catalogue')
+            pos = max(pos, len(buf) - len('"compounds"'))
+            fill()
+        skip(' \t\r\n:')
+    if pos >= len(buf) or buf[pos] != '[':
+        raise CatalogError('Expected a JSON array of compounds')
+    pos += 1
+
+    while True:
+        skip(' \t\r\n,')
+        if pos >= len(buf):
+            raise CatalogError('Unterminated compounds array')
+        if buf[pos] == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise CatalogError(f'Invalid JSON near offset {pos}')
+                fill()
+        pos = end
+        if len(buf) - pos < chunk_size and pos > chunk_size:
+            buf = buf[pos:]
+            pos = 0
+        yield item
+
+
+def iter_ndjson(f):
+    """Yield one object per non-blank line"""
+    for number, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise CatalogError(f'Invalid JSON on line {number}')
+
+
+def iter_catalogue(path):
+    """Stream compounds from a .json or .ndjson/.jsonl catalogue"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            yield from iter_ndjson(f)
+        else:
+            yield from iter_json_array(f)
+
+
+# Normalization
+
+class CompoundNormalizer:
+    """Validates compounds and puts element_counts in canonical form.
+
+    Counts become positive ints ordered by atomic number; compounds without
+    element_counts get them from their formula. Missing 'elements' and
+    'molecular_mass' are filled in from the counts.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.parser = FormulaParser(table.symbols, cache_size=0)
+
+    def normalize(self, compound):
+        """Return (compound, [(atomic number, count), ...]); raises ValueError if invalid"""
+        if not isinstance(compound, dict):
+            raise ValueError('Compound must be an object')
+        if not isinstance(compound.get('name'), str) or not compound['name']:
+            raise ValueError('Compound needs a name')
+
+        counts = compound.get('element_counts')
+        if counts is None:
+            if not isinstance(compound.get('formula'), str):
+                raise ValueError(f"{compound['name']}: needs element_counts or a formula")
+            try:
+                counts = dict(self.parser.parse(compound['formula']).counts)
+            except FormulaError as e:
+                raise ValueError(f"{compound['name']}: {e}")
+        if not isinstance(counts, dict) or not counts:
+            raise ValueError(f"{compound['name']}: element_counts must be a non-empty object")
+
+        index = self.table.index
+        pairs = {}
+        for symbol, count in counts.items():
+            if symbol not in index:
+                raise ValueError(f"{compound['name']}: unknown element {symbol!r}")
+            if isinstance(count, float) and count.is_integer():
+                count = int(count)
+            if not isinstance(count, int) or isinstance(count, bool) or not 0 < count <= MAX_COUNT:
+                raise ValueError(f"{compound['name']}: invalid count for {symbol}")
+            pairs[symbol] = pairs.get(symbol, 0) + count
+
+        symbols = sorted(pairs, key=index.__getitem__)
+        compound = dict(compound)
+        compound['element_counts'] = {symbol: pairs[symbol] for symbol in symbols}
+        if not compound.get('elements'):
+            compound['elements'] = symbols
+        if compound.get('molecular_mass') is None:
+            compound['molecular_mass'] = round(self.table.molecular_mass(pairs.items()), 3)
+        if not compound.get('formula'):
+            compound['formula'] = ''.join(s if pairs[s] == 1 else f"{s}{pairs[s]}" for s in symbols)
+
+        numbers = self.table.numbers
+        return compound, [(numbers[index[s]], pairs[s]) for s in symbols]
+
+
+def composition_hash(pairs):
+    """Stable 64-bit hash of sorted (atomic number, count) pairs"""
+    data = array('I', sorted(number << 24 | count for number, count in pairs)).tobytes()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def element_set_hash(numbers):
+    """Stable 64-bit hash of a set of atomic numbers"""
+    data = array('I', sorted(numbers)).tobytes()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def build_lattice(element_sets):
+    """Breadth-first trie arrays for {sorted atomic-number tuple: [records]}.
+
+    Returns (numbers, children, record_offsets, records) as arrays. Nodes are
+    numbered by (depth, prefix), so the children of each node are contiguous
+    and sorted by atomic number, and parents come before their children.
+    """
+    numbers = array('H', [0])
+    children = array('I')
+    record_offsets = array('I', [0])
+    records = array('I')
+
+    level = [()]
+    depth = 0
+    while level:
+        # Children of the nodes in `level`, in the same order as their parents
+        deeper = sorted({key[:depth + 1] for key in element_sets if len(key) > depth})
+        position = 0
+        next_node = len(numbers)
+        for prefix in level:
+            children.append(next_node + position)
+            while position < len(deeper) and deeper[position][:depth] == prefix:
+                position += 1
+            records.extend(sorted(element_sets.get(prefix, ())))
+            record_offsets.append(len(records))
+        numbers.extend(prefix[-1] for prefix in deeper)
+        level = deeper
+        depth += 1
+    children.append(len(numbers))
+    return numbers, children, record_offsets, records
+
+
+# Snapshot writer
+
+def write_snapshot(compounds, table, out, source=None, log=None):
+    """Normalize `compounds` (any iterable) and write a snapshot to binary file `out`.
+
+    Only the fixed-width columns and the search and similarity indexes are
+    kept in memory; blobs are spooled to a temporary file. Returns (records
+    written, invalid compounds skipped).
+    """
+    normalizer = CompoundNormalizer(table)
+    search = CompoundSearchIndex()
+    similarity = CompositionIndex()
+    columns = {name: array(typecode) for name, typecode in SECTIONS if name != 'blobs'}
+    columns['count_offsets'].append(0)
+    composition_hashes = array('Q')
+    element_set_hashes = array('Q')
+    element_sets = {}
+    digest = hashlib.blake2b(digest_size=16)
+    skipped = 0
+
+    with tempfile.TemporaryFile() as blobs:
+        blob_size = 0
+        for compound in compounds:
+            try:
+                compound, pairs = normalizer.normalize(compound)
+            except ValueError as e:
+                skipped += 1
+                if log and skipped <= 10:
+                    log(f"Skipping compound: {e}")
+                continue
+            blob = json.dumps(compound, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if columns['masses']:
+                blob_size += blobs.write(b',')
+                digest.update(b',')
+            columns['blob_offsets'].append(blob_size)
+            columns['blob_lengths'].append(len(blob))
+            blob_size += blobs.write(blob)
+            digest.update(blob)
+
+            columns['counts'].extend(number << 24 | count for number, count in pairs)
+            columns['count_offsets'].append(len(columns['counts']))
+            columns['masses'].append(float(compound['molecular_mass'] or 0))
+            search.add(compound)
+            similarity.add(pairs)
+            composition_hashes.append(composition_hash(pairs))
+            element_set_hashes.append(element_set_hash(number for number, _ in pairs))
+            element_sets.setdefault(tuple(number for number, _ in pairs), []).append(len(columns['masses']) - 1)
+
+        record_count = len(columns['masses'])
+        # Sort by (hash, record) so the first catalogue entry wins among equal keys
+        for name, hashes in (('composition', composition_hashes), ('element_set', element_set_hashes)):
+            order = sorted(range(record_count), key=hashes.__getitem__)
+            columns[f'{name}_hashes'] = array('Q', (hashes[i] for i in order))
+            columns[f'{name}_records'] = array('I', order)
+            del order
+        (columns['lattice_numbers'], columns['lattice_children'],
+         columns['lattice_record_offsets'], columns['lattice_records']) = build_lattice(element_sets)
+        del element_sets
+        columns.update(search.sections())
+        columns.update(similarity.sections())
+        del search, similarity
+
+        # Lay out the sections, each 8-byte aligned
+        entries = []
+        offset = HEADER_SIZE
+        for name, _ in SECTIONS:
+            length = blob_size if name == 'blobs' else len(columns[name]) * columns[name].itemsize
+            offset += -offset % 8
+            entries.append((offset, length))
+            offset += length
+
+        source = source or NO_SOURCE
+        byteorder = b'L' if sys.byteorder == 'little' else b'B'
+        out.write(HEADER.pack(MAGIC, VERSION, byteorder, record_count, source.size, source.mtime_ns,
+                              source.elements, source.digest, digest.digest()))
+        for entry in entries:
+            out.write(SECTION_ENTRY.pack(*entry))
+        position = HEADER_SIZE
+        for (name, _), (offset, length) in zip(SECTIONS, entries):
+            out.write(b'\0' * (offset - position))
+            if name == 'blobs':
+                blobs.seek(0)
+                shutil.copyfileobj(blobs, out, CHUNK_SIZE)
+            else:
+                columns[name].tofile(out)
+            position = offset + length
+    return record_count, skipped
+
+
+def elements_digest(table):
+    """16-byte digest of the element data compounds are normalized against"""
+    data = json.dumps(table.to_dicts(), sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def source_fingerprint(path, table):
+    """SourceFingerprint of the catalogue at `path`, hashing its whole content"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return SourceFingerprint(stat.st_size, stat.st_mtime_ns, elements_digest(table), digest.digest())
+
+
+def current_fingerprint(recorded, path, table):
+    """`recorded`, updated to the source's mtime, if it still describes `path`; else None.
+
+    The catalogue is only hashed when its size or mtime differ from the
+    recorded ones, so checking an untouched catalogue costs a stat. A
+    catalogue that was touched or copied without changing keeps its
+    snapshot, and the caller records the new mtime.
+    """
+    if recorded.elements != elements_digest(table):
+        return None
+    stat = os.stat(path)
+    if stat.st_size != recorded.size:
+        return None
+    if stat.st_mtime_ns == recorded.mtime_ns:
+        return recorded
+    current = source_fingerprint(path, table)
+    return current if current.digest == recorded.digest else None
+
+
+def build_snapshot(source, snapshot, table, log=None):
+    """Stream `source` into `snapshot`, replacing it atomically"""
+    directory = os.path.dirname(os.path.abspath(snapshot))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.compounds-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            result = write_snapshot(iter_catalogue(source), table, out, source_fingerprint(source, table), log)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, snapshot)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return result
+
+
+# Snapshot reader
+
+class CompoundCatalog:
+    """Read-only compound catalogue backed by a memory-mapped snapshot.
+
+    Behaves like a sequence of compound dicts (each access decodes a fresh
+    dict from its blob) and offers the exact/ratio lookups used by /api/mix.
+    """
+
+    def __init__(self, f, table):
+        self.table = table
+        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if len(view) < HEADER_SIZE:
+            raise CatalogError('Snapshot is truncated')
+        magic, version, byteorder, count, *source, digest = HEADER.unpack_from(view)
+        expected = b'L' if sys.byteorder == 'little' else b'B'
+        if magic != MAGIC or version != VERSION or byteorder != expected:
+            raise CatalogError('Not a compatible compound snapshot')
+        self.record_count = count
+        self.source_fingerprint = SourceFingerprint(*source)
+        self.digest = digest.hex()
+
+        self.sections = {}
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(view, HEADER.size + i * SECTION_ENTRY.size)
+            if offset + length > len(view):
+                raise CatalogError('Snapshot is truncated')
+            self.sections[name] = view[offset:offset + length].cast(typecode)
+        self.blobs = self.sections['blobs']
+
+    @classmethod
+    def open(cls, path, table):
+        with open(path, 'rb') as f:
+            return cls(f, table)
+
+    @classmethod
+    def from_compounds(cls, compounds, table, log=None):
+        """Snapshot an iterable of compounds into an anonymous temporary file"""
+        with tempfile.TemporaryFile() as f:
+            write_snapshot(compounds, table, f, log=log)
+            f.flush()
+            return cls(f, table)
+
+    def __len__(self):
+        return self.record_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.record_count
+        if not 0 <= index < self.record_count:
+            raise IndexError('compound index out of range')
+        return json.loads(self.blob(index))
+
+    def __iter__(self):
+        for index in range(self.record_count):
+            yield self[index]
+
+    def blob(self, index):
+        """Compact JSON bytes of one compound"""
+        offset = self.sections['blob_offsets'][index]
+        return self.blobs[offset:offset + self.sections['blob_lengths'][index]].tobytes()
+
+    def counts(self, index):
+        """[(atomic number, count), ...] of one compound, by atomic number"""
+        offsets, packed = self.sections['count_offsets'], self.sections['counts']
+        return [(value >> 24, value & MAX_COUNT) for value in packed[offsets[index]:offsets[index + 1]]]
+
+    def search_index(self):
+        """compound_search.MappedSearchIndex over the snapshot's search sections"""
+        return MappedSearchIndex(self.sections)
+
+    def similarity_index(self):
+        """compound_similarity.MappedCompositionIndex over the snapshot's similarity sections"""
+        return MappedCompositionIndex(self.sections)
+
+    def compositions(self):
+        """counts() of every compound, in record order"""
+        for index in range(self.record_count):
+            yield self.counts(index)
+
+    @property
+    def body_size(self):
+        """Size in bytes of the catalogue as one JSON array"""
+        return len(self.blobs) + 2
+
+    def json_chunks(self, chunk_size=CHUNK_SIZE):
+        """The catalogue as a JSON array, in chunks sliced straight from the map"""
+        yield b'['
+        blobs = self.blobs
+        for start in range(0, len(blobs), chunk_size):
+            yield blobs[start:start + chunk_size].tobytes()
+        yield b']'
+
+    def _pairs(self, element_counts):
+        """Selection as (atomic number, count) pairs, or None if it has unknown symbols"""
+        index, numbers = self.table.index, self.table.numbers
+        pairs = []
+        for symbol, count in element_counts.items():
+            if count:
+                if symbol not in index:
+                    return None
+                pairs.append((numbers[index[symbol]], count))
+        return pairs
+
+    def _candidates(self, name, key):
+        hashes, records = self.sections[f'{name}_hashes'], self.sections[f'{name}_records']
+        i = bisect_left(hashes, key)
+        while i < len(hashes) and hashes[i] == key:
+            yield records[i]
+            i += 1
+
+    def exact_index(self, element_counts):
+        """Record number of the first compound with exactly these counts, or None"""
+        pairs = self._pairs(element_counts)
+        if not pairs:
+            return None
+        wanted = sorted(pairs)
+        for record in self._candidates('composition', composition_hash(pairs)):
+            if self.counts(record) == wanted:
+                return record
+        return None
+
+    def ratio_index(self, element_counts):
+        """Record number of the first compound with the same element set, or None"""
+        pairs = self._pairs(element_counts)
+        if not pairs:
+            return None
+        wanted = sorted(number for number, _ in pairs)
+        for record in self._candidates('element_set', element_set_hash(wanted)):
+            if [number for number, _ in self.counts(record)] == wanted:
+                return record
+        return None
+
+    def formable_indexes(self, mask, limits=None):
+        """Record numbers, ascending, of compounds using only elements in `mask`.
+
+        `mask` is an element mask (compound_index.element_mask); `limits`
+        optionally maps atomic numbers to the most of each a compound may use.
+        """
+        wanted = mask_numbers(mask)
+        position = {number: i for i, number in enumerate(wanted)}
+        numbers, children = self.sections['lattice_numbers'], self.sections['lattice_children']
+        record_offsets, records = self.sections['lattice_record_offsets'], self.sections['lattice_records']
+
+        found = []
+        stack = [(0, 0)]  # (node, index in `wanted` after the node's element)
+        while stack:
+            node, start = stack.pop()
+            found.extend(records[record_offsets[node]:record_offsets[node + 1]])
+            first, last = children[node], children[node + 1]
+            if last - first <= len(wanted) - start:
+                for child in range(first, last):
+                    i = position.get(numbers[child])
+                    if i is not None:
+                        stack.append((child, i + 1))
+            else:
+                for i in range(start, len(wanted)):
+                    child = bisect_left(numbers, wanted[i], first, last)
+                    if child < last and numbers[child] == wanted[i]:
+                        stack.append((child, i + 1))
+                        first = child + 1
+
+        found.sort()
+        if limits:
+            found = [record for record in found
+                     if all(count <= limits[number] for number, count in self.counts(record))]
+        return found
+
+    def exact(self, element_counts):
+        """Compound whose element counts equal `element_counts`, or None"""
+        record = self.exact_index(element_counts)
+        return None if record is None else self[record]
+
+    def ratio(self, element_counts):
+        """(compound, suggested_ratio) for a compound with the same elements, or None"""
+        record = self.ratio_index(element_counts)
+        if record is None:
+            return None
+        compound = self[record]
+        return compound, ratio_string(compound['element_counts'])
+
+
+def record_source_mtime(snapshot, mtime_ns):
+    """Update the source mtime in a snapshot's header, in place"""
+    with open(snapshot, 'r+b') as f:
+        f.seek(MTIME_OFFSET)
+        f.write(struct.pack('<q', mtime_ns))
+
+
+def load_catalog(source, snapshot, table, log=None):
+    """Map `snapshot`, rebuilding it first if `source` or the element data changed.
+
+    A snapshot without its source (e.g. one shipped on its own) is used as
+    is. If the snapshot cannot be written, the catalogue is snapshotted into
+    an anonymous temporary file instead. See current_fingerprint() for how a
+    changed source is detected.
+    """
+    have_source = os.path.exists(source)
+    if os.path.exists(snapshot):
+        try:
+            catalog = CompoundCatalog.open(snapshot, table)
+            if not have_source:
+                return catalog
+            current = current_fingerprint(catalog.source_fingerprint, source, table)
+            if current is not None:
+                if current != catalog.source_fingerprint:
+                    try:
+                        record_source_mtime(snapshot, current.mtime_ns)
+                        catalog.source_fingerprint = current
+                    except OSError as e:
+                        if log:
+                            log(f"Cannot update snapshot {snapshot} ({e}); the catalogue will be hashed again")
+                return catalog
+        except (OSError, CatalogError) as e:
+            if log:
+                log(f"Ignoring unreadable snapshot {snapshot}: {e}")
+    if not have_source:
+        raise CatalogError(f'No compound catalogue at {source}')
+
+    start = time.perf_counter()
+    try:
+        count, skipped = build_snapshot(source, snapshot, table, log)
+        catalog = CompoundCatalog.open(snapshot, table)
+    except OSError as e:
+        if log:
+            log(f"Cannot write snapshot {snapshot} ({e}); using a temporary one")
+        catalog = CompoundCatalog.from_compounds(iter_catalogue(source), table, log)
+        count, skipped = len(catalog), None
+    if log:
+        log(f"Built compound snapshot with {count} compounds"
+            f"{f', skipped {skipped} invalid' if skipped else ''} in {time.perf_counter() - start:.2f}s")
+    return catalog
+
+
+def main():
+    from element_store import ElementStore
+
+    parser = argparse.ArgumentParser(description='Import a compound catalogue into a binary snapshot')
+    parser.add_argument('source', help='catalogue as a JSON array, {"compounds": [...]} or NDJSON')
+    parser.add_argument('-o', '--output', default=os.path.join('data', 'compounds.snapshot'))
+    parser.add_argument('--elements', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'data', 'elements.json'))
+    args = parser.parse_args()
+
+    with open(args.elements, encoding='utf-8') as f:
+        data = json.load(f)
+    table = ElementStore(data['elements'] if isinstance(data, dict) else data).table
+
+    start = time.perf_counter()
+    count, skipped = build_snapshot(args.source, args.output, table, log=print)
+    print(f"{count} compounds written to {args.output} ({os.path.getsize(args.output):,} bytes), "
+          f"{skipped} skipped, in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Canonical keys for element-count multisets"""
+
+
+def composition_key(element_counts):
+    """Canonical, hashable form of an element-count multiset"""
+    return frozenset((symbol, count) for symbol, count in element_counts.items() if count)
+
+
+def element_mask(numbers):
+    """Bitmask of a set of atomic numbers: bit n - 1 is set for element n (118 bits)"""
+    mask = 0
+    for number in numbers:
+        mask |= 1 << (number - 1)
+    return mask
+
+
+def mask_numbers(mask):
+    """Atomic numbers in an element mask, ascending"""
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length())
+        mask ^= low
+    return numbers
+
+
+def ratio_string(element_counts):
+    """Readable ratio such as '2H + O' for an element-count mapping"""
+    parts = []
+    for element in sorted(element_counts):
+        count = element_counts[element]
+        parts.append(element if count == 1 else f"{count}{element}")
+    return " + ".join(parts)
+
@@ -0,0 +1,302 @@
+"""Inverted index with BM25 ranking for compound search"""
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+# Field -> weight applied to term frequencies (BM25F-style)
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'formula': 2.5,
+    'category': 1.5,
+    'uses': 1.0,
+    'interesting_facts': 1.0,
+}
+STOPWORDS = frozenset('a an and are as at be by for from in is it of on or the to with'.split())
+TOKEN = re.compile(r'\w+')
+
+K1 = 1.2
+B = 0.75
+# A prefix matching more terms than this expands to the ones in the most documents
+MAX_PREFIX_TERMS = 64
+# Re-derive length normalisation once the average document length drifts this much
+AVERAGE_DRIFT = 0.05
+# Postings at least this long get their impact order built by extend()
+EAGER_IMPACT_ORDER = 256
+
+# (name, typecode) of the arrays an index is saved as, see CompoundSearchIndex.sections()
+SECTIONS = (
+    ('search_terms', 'B'),           # the vocabulary, '\n'-separated UTF-8
+    ('search_offsets', 'Q'),         # term count + 1 entries into the postings arrays
+    ('search_doc_ids', 'I'),         # each term's postings in document order
+    ('search_frequencies', 'f'),
+    ('search_impact_doc_ids', 'I'),  # the same postings in impact order
+    ('search_impacts', 'd'),
+    ('search_lengths', 'f'),         # per document
+    ('search_average', 'd'),         # one entry: the average length impacts were built with
+)
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _field_text(value):
+    if isinstance(value, list):
+        return ' '.join(str(v) for v in value)
+    return '' if value is None else str(value)
+
+
+def _scaled(impacts, idf):
+    doc_ids, normalised = impacts
+    for doc_id, impact in zip(doc_ids, normalised):
+        yield idf * impact, doc_id
+
+
+class CompoundSearchIndex:
+    """Term -> postings index over compound text fields.
+
+    Each term keeps its postings in document order (parallel arrays of doc
+    ids and weighted term frequencies) for lookups by bisect, and, built on
+    first use, in impact order (highest BM25 contribution first). add() only
+    appends to the new document's terms and drops their impact order.
+
+    Every query word must match, the last one also as a prefix; a prefix with
+    more than MAX_PREFIX_TERMS completions keeps the ones found in the most
+    documents, so a short prefix drops only its rarest completions.
+
+    ranked() runs the threshold algorithm: it reads each word's postings best
+    first, scores each new document in full by lookup, and stops as soon as
+    the k-th best score beats the best any unread document could still
+    reach, so common words do not mean scoring their whole postings list.
+    The lock covers prefix expansion and building impact orders; scoring
+    then runs without it, so concurrent queries do not queue behind each
+    other.
+    """
+
+    def __init__(self, compounds=()):
+        self.postings = {}      # term -> (array of doc ids, array of weighted tf)
+        self.vocabulary = []    # sorted terms, for prefix expansion
+        self.lengths = array('f')
+        self.total_length = 0.0
+        self.average = 1.0      # average length used for length normalisation
+        self._impacts = {}      # term -> (doc ids, normalised tf), best first
+        self._prefixes = {}     # prefix -> capped expansion, for prefixes over the cap
+        self._lock = threading.Lock()
+        self.extend(compounds)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, compound):
+        """Index one compound; its document id is its position in insertion order"""
+        frequencies = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(_field_text(compound.get(field))):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+
+        with self._lock:
+            doc_id = len(self.lengths)
+            for term, frequency in frequencies.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = (array('I'), array('f'))
+                    insort(self.vocabulary, term)
+                postings[0].append(doc_id)
+                postings[1].append(frequency)
+                self._impacts.pop(term, None)
+            self._prefixes.clear()
+            self.lengths.append(length)
+            self.total_length += length
+
+            average = self.total_length / len(self.lengths)
+            if abs(average - self.average) > AVERAGE_DRIFT * self.average:
+                self.average = average
+                self._impacts.clear()
+        return doc_id
+
+    def extend(self, compounds):
+        for compound in compounds:
+            self.add(compound)
+        # Sort long postings now rather than in the first request that reads them
+        with self._lock:
+            for term, (doc_ids, _) in self.postings.items():
+                if len(doc_ids) >= EAGER_IMPACT_ORDER:
+                    self._impact_order(term)
+
+    def sections(self):
+        """{name: array} for every entry of SECTIONS, to be read back by MappedSearchIndex"""
+        with self._lock:
+            offsets = array('Q', [0])
+            doc_ids, frequencies = array('I'), array('f')
+            impact_doc_ids, impacts = array('I'), array('d')
+            for term in self.vocabulary:
+                ids, tfs = self.postings[term]
+                doc_ids.extend(ids)
+                frequencies.extend(tfs)
+                ids, scores = self._impact_order(term)
+                impact_doc_ids.extend(ids)
+                impacts.extend(scores)
+                offsets.append(len(doc_ids))
+            return {
+                'search_terms': array('B', '\n'.join(self.vocabulary).encode('utf-8')),
+                'search_offsets': offsets,
+                'search_doc_ids': doc_ids,
+                'search_frequencies': frequencies,
+                'search_impact_doc_ids': impact_doc_ids,
+                'search_impacts': impacts,
+                'search_lengths': array('f', self.lengths),
+                'search_average': array('d', [self.average]),
+            }
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        vocabulary = self.vocabulary
+        start = bisect_left(vocabulary, token)
+        end = bisect_left(vocabulary, token + '\uffff', start)
+        if end - start <= MAX_PREFIX_TERMS:
+            return vocabulary[start:end]
+        terms = self._prefixes.get(token)
+        if terms is None:
+            postings = self.postings
+            terms = self._prefixes[token] = heapq.nlargest(
+                MAX_PREFIX_TERMS, vocabulary[start:end], key=lambda term: len(postings[term][0]))
+        return terms
+
+    def _normalised(self, tf, doc_id):
+        """BM25 term-frequency component; multiply by idf for the score"""
+        return tf * (K1 + 1) / (tf + K1 * (1 - B + B * self.lengths[doc_id] / self.average))
+
+    def _impact_order(self, term):
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            doc_ids, frequencies = self.postings[term]
+            scored = sorted(((self._normalised(tf, doc_id), doc_id)
+                             for doc_id, tf in zip(doc_ids, frequencies)),
+                            key=lambda item: (-item[0], item[1]))
+            impacts = self._impacts[term] = (array('I', (d for _, d in scored)),
+                                             array('d', (s for s, _ in scored)))
+        return impacts
+
+    def _idf(self, term):
+        matches = len(self.postings[term][0])
+        return math.log(1 + (len(self.lengths) - matches + 0.5) / (matches + 0.5))
+
+    def _stream(self, terms):
+        """(score, doc id) for every posting of `terms`, best first"""
+        streams = [_scaled(self._impact_order(term), self._idf(term)) for term in terms]
+        return heapq.merge(*streams, key=itemgetter(0), reverse=True)
+
+    def _score(self, terms, doc_id):
+        """Best score of `doc_id` over `terms`, or None if it contains none of them"""
+        best = None
+        for term in terms:
+            doc_ids, frequencies = self.postings[term]
+            position = bisect_left(doc_ids, doc_id)
+            if position < len(doc_ids) and doc_ids[position] == doc_id:
+                score = self._idf(term) * self._normalised(frequencies[position], doc_id)
+                if best is None or score > best:
+                    best = score
+        return best
+
+    def ranked(self, query, limit=10):
+        """[(score, doc id), ...] best first"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            if not self.lengths:
+                return []
+            expansions = [self._expand(token, position == len(tokens) - 1)
+                          for position, token in enumerate(tokens)]
+            if not all(expansions):
+                return []
+            streams = [self._stream(terms) for terms in expansions]
+
+        frontier = [0.0] * len(streams)
+        top = []    # min-heap of (score, -doc id)
+        seen = set()
+        while True:
+            for i, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    # Every document containing this word has been scored
+                    return [(score, -doc_id) for score, doc_id in sorted(top, reverse=True)]
+                frontier[i], doc_id = item
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                total = 0.0
+                for terms in expansions:
+                    score = self._score(terms, doc_id)
+                    if score is None:
+                        break
+                    total += score
+                else:
+                    if len(top) < limit:
+                        heapq.heappush(top, (total, -doc_id))
+                    elif (total, -doc_id) > top[0]:
+                        heapq.heapreplace(top, (total, -doc_id))
+            if len(top) == limit and top[0][0] >= sum(frontier):
+                return [(score, -doc_id) for score, doc_id in sorted(top, reverse=True)]
+
+
+class _MappedPostings:
+    """Read-only term -> (doc ids, values) over flat arrays sliced by per-term offsets"""
+
+    def __init__(self, vocabulary, offsets, doc_ids, values):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.values = values
+
+    def _position(self, term):
+        i = bisect_left(self.vocabulary, term)
+        return i if i < len(self.vocabulary) and self.vocabulary[i] == term else None
+
+    def __contains__(self, term):
+        return self._position(term) is not None
+
+    def __getitem__(self, term):
+        i = self._position(term)
+        if i is None:
+            raise KeyError(term)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.doc_ids[start:end], self.values[start:end]
+
+
+class MappedSearchIndex(CompoundSearchIndex):
+    """Read-only CompoundSearchIndex over the arrays written by sections().
+
+    The arrays are typically memoryviews into a compound snapshot, so
+    opening an index only decodes its vocabulary; postings, impact orders
+    and document lengths are read from the map as queries touch them and
+    are shared by every process that maps the same file.
+    """
+
+    def __init__(self, sections):
+        terms = sections['search_terms'].tobytes()
+        self.vocabulary = terms.decode('utf-8').split('\n') if terms else []
+        offsets = sections['search_offsets']
+        self.postings = _MappedPostings(self.vocabulary, offsets, sections['search_doc_ids'],
+                                        sections['search_frequencies'])
+        self._impact_postings = _MappedPostings(self.vocabulary, offsets, sections['search_impact_doc_ids'],
+                                                sections['search_impacts'])
+        self.lengths = sections['search_lengths']
+        self.average = sections['search_average'][0]
+        self._impacts = None
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    def add(self, compound):
+        raise TypeError('A mapped search index is read-only')
+
+    def _impact_order(self, term):
+        return self._impact_postings[term]
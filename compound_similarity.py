@@ -0,0 +1,231 @@
+"""Nearest known compounds by composition (cosine similarity)"""
+import heapq
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import combinations, repeat
+from operator import mul
+
+# (name, typecode) of the arrays an index is saved as, see CompositionIndex.sections()
+SECTIONS = (
+    ('similar_row_offsets', 'I'),     # compound count + 1 entries into the row arrays
+    ('similar_row_numbers', 'H'),
+    ('similar_row_weights', 'd'),
+    ('similar_column_keys', 'I'),     # atomic numbers with a column, ascending
+    ('similar_column_offsets', 'Q'),  # key count + 1 entries into the column arrays
+    ('similar_column_doc_ids', 'I'),
+    ('similar_column_weights', 'd'),
+    ('similar_pair_keys', 'I'),       # first << 16 | second atomic number, ascending
+    ('similar_pair_offsets', 'Q'),
+    ('similar_pair_doc_ids', 'I'),
+)
+
+
+def composition_vector(pairs):
+    """{atomic number: weight} for (atomic number, count) pairs, scaled to unit length"""
+    norm = math.sqrt(sum(count * count for _, count in pairs))
+    return {number: count / norm for number, count in pairs} if norm else {}
+
+
+class CompositionIndex:
+    """Sparse compound x element matrix of unit-length composition vectors.
+
+    A compound's vector has one entry per element, proportional to its count,
+    so cosine similarity compares proportions: Fe2O3 and Fe4O6 score 1.0,
+    FeO against Fe2O3 about 0.98, compounds with no element in common 0.
+
+    Rows (per compound, in record order) score one compound in full. Columns
+    (per element) list the compounds containing that element, largest entry
+    first, and pair postings list the compounds containing both elements of
+    each pair. A compound that shares a single element with the query scores
+    exactly query weight * entry, so the best of those are the first entries
+    of each column; only compounds sharing two or more elements, found
+    through the pair postings, are scored in full. A query touches those few
+    rows rather than every compound containing a common element.
+
+    The lock covers add() and merging newly added compounds into a column;
+    queries otherwise run without it, so they do not queue behind each other.
+    """
+
+    def __init__(self, compositions=()):
+        self.row_offsets = array('I', [0])
+        self.row_numbers = array('H')
+        self.row_weights = array('d')
+        self.columns = {}       # atomic number -> (doc ids, entries), largest entry first
+        self.pair_postings = {}  # (atomic number, atomic number) -> doc ids
+        self._pending = {}      # atomic number -> [(entry, doc id)] not yet in the column
+        self._lock = threading.Lock()
+        self.extend(compositions)
+
+    def __len__(self):
+        return len(self.row_offsets) - 1
+
+    def add(self, pairs):
+        """Add one compound's (atomic number, count) pairs; returns its document id"""
+        vector = composition_vector(pairs)
+        numbers = sorted(vector)
+        with self._lock:
+            doc_id = len(self)
+            # The row is complete before any posting can lead a query to it
+            for number in numbers:
+                self.row_numbers.append(number)
+                self.row_weights.append(vector[number])
+            self.row_offsets.append(len(self.row_numbers))
+            for number in numbers:
+                self._pending.setdefault(number, []).append((vector[number], doc_id))
+            for pair in combinations(numbers, 2):
+                postings = self.pair_postings.get(pair)
+                if postings is None:
+                    postings = self.pair_postings[pair] = array('I')
+                postings.append(doc_id)
+        return doc_id
+
+    def extend(self, compositions):
+        for pairs in compositions:
+            self.add(pairs)
+        for number in list(self._pending):
+            self._column(number)
+
+    def _column(self, number):
+        """Column of `number`, merging in compounds added since the last read"""
+        if number not in self._pending:
+            return self.columns.get(number)
+        with self._lock:
+            pending = self._pending.pop(number, None)
+            column = self.columns.get(number)
+            if pending:
+                entries = pending
+                if column is not None:
+                    entries.extend(zip(column[1], column[0]))
+                entries.sort(key=lambda entry: (-entry[0], entry[1]))
+                column = self.columns[number] = (array('I', (d for _, d in entries)),
+                                                 array('d', (w for w, _ in entries)))
+            return column
+
+    def sections(self):
+        """{name: array} for every entry of SECTIONS, to be read back by MappedCompositionIndex"""
+        for number in list(self._pending):
+            self._column(number)
+        with self._lock:
+            saved = {
+                'similar_row_offsets': array('I', self.row_offsets),
+                'similar_row_numbers': array('H', self.row_numbers),
+                'similar_row_weights': array('d', self.row_weights),
+                'similar_column_keys': array('I', sorted(self.columns)),
+                'similar_column_offsets': array('Q', [0]),
+                'similar_column_doc_ids': array('I'),
+                'similar_column_weights': array('d'),
+                'similar_pair_keys': array('I'),
+                'similar_pair_offsets': array('Q', [0]),
+                'similar_pair_doc_ids': array('I'),
+            }
+            for number in saved['similar_column_keys']:
+                doc_ids, entries = self.columns[number]
+                saved['similar_column_doc_ids'].extend(doc_ids)
+                saved['similar_column_weights'].extend(entries)
+                saved['similar_column_offsets'].append(len(saved['similar_column_doc_ids']))
+            for first, second in sorted(self.pair_postings):
+                saved['similar_pair_keys'].append(first << 16 | second)
+                saved['similar_pair_doc_ids'].extend(self.pair_postings[first, second])
+                saved['similar_pair_offsets'].append(len(saved['similar_pair_doc_ids']))
+            return saved
+
+    def similarity(self, vector, doc_id):
+        """Cosine similarity between a unit `vector` and a compound"""
+        start, end = self.row_offsets[doc_id], self.row_offsets[doc_id + 1]
+        return sum(map(mul, map(vector.get, self.row_numbers[start:end], repeat(0.0)),
+                       self.row_weights[start:end]))
+
+    def nearest(self, pairs, limit=10, exclude=()):
+        """[(similarity, doc id), ...] of the `limit` closest compounds, best first.
+
+        `pairs` are the query's (atomic number, count) pairs; compounds with
+        no element in common are never returned, and doc ids in `exclude`
+        are skipped. Ties go to the lower doc id.
+        """
+        vector = composition_vector(pairs)
+        if limit < 1:
+            return []
+        excluded = set(exclude)
+        # Compounds sharing two or more of the query's elements
+        shared = set()
+        for pair in combinations(sorted(vector), 2):
+            shared.update(self.pair_postings.get(pair, ()))
+        shared -= excluded
+        candidates = [(self.similarity(vector, doc_id), -doc_id) for doc_id in shared]
+
+        # The rest share one element: each column yields them best first
+        skip = shared | excluded
+        for number, weight in vector.items():
+            column = self._column(number)
+            if column is None:
+                continue
+            taken = 0
+            for doc_id, entry in zip(*column):
+                if doc_id in skip:
+                    continue
+                candidates.append((weight * entry, -doc_id))
+                taken += 1
+                if taken == limit:
+                    break
+        return [(score, -doc_id) for score, doc_id in heapq.nlargest(limit, candidates)]
+
+
+def _find(keys, key):
+    """Position of `key` in the sorted sequence `keys`, or None"""
+    i = bisect_left(keys, key)
+    return i if i < len(keys) and keys[i] == key else None
+
+
+class _MappedColumns:
+    """Read-only atomic number -> (doc ids, entries) over the column sections"""
+
+    def __init__(self, sections):
+        self.keys = sections['similar_column_keys']
+        self.offsets = sections['similar_column_offsets']
+        self.doc_ids = sections['similar_column_doc_ids']
+        self.weights = sections['similar_column_weights']
+
+    def get(self, number, default=None):
+        i = _find(self.keys, number)
+        if i is None:
+            return default
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+
+class _MappedPairs:
+    """Read-only (atomic number, atomic number) -> doc ids over the pair sections"""
+
+    def __init__(self, sections):
+        self.keys = sections['similar_pair_keys']
+        self.offsets = sections['similar_pair_offsets']
+        self.doc_ids = sections['similar_pair_doc_ids']
+
+    def get(self, pair, default=None):
+        i = _find(self.keys, pair[0] << 16 | pair[1])
+        if i is None:
+            return default
+        return self.doc_ids[self.offsets[i]:self.offsets[i + 1]]
+
+
+class MappedCompositionIndex(CompositionIndex):
+    """Read-only CompositionIndex over the arrays written by sections().
+
+    The arrays are typically memoryviews into a compound snapshot, so
+    opening an index costs nothing and its rows, columns and pair postings
+    are shared by every process that maps the same file.
+    """
+
+    def __init__(self, sections):
+        self.row_offsets = sections['similar_row_offsets']
+        self.row_numbers = sections['similar_row_numbers']
+        self.row_weights = sections['similar_row_weights']
+        self.columns = _MappedColumns(sections)
+        self.pair_postings = _MappedPairs(sections)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, pairs):
+        raise TypeError('A mapped composition index is read-only')
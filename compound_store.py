@@ -0,0 +1,485 @@
+"""Optional SQLite backend for the compound catalogue.
+
+Tables:
+    compounds           one row per compound: name, formula, category, the
+                        canonical composition signature and element-set
+                        signature (both indexed), its element_set_nodes
+                        node, and the compound as JSON
+    compound_elements   (compound, atomic number, count, weight) rows, indexed
+                        by element; weight is the compound's unit-length
+                        composition vector entry (compound_similarity)
+    compound_pairs      (atomic number, atomic number, compound) for every
+                        pair of elements in a compound
+    element_set_nodes   trie of the distinct element sets (atomic numbers
+                        ascending), for "what can these elements make" queries
+    compounds_fts       FTS5 index over name, formula, category and uses
+    meta                schema version, catalogue size, content digest and
+                        source fingerprint (size, mtime, element data and
+                        content digests)
+
+SQLiteCompoundStore has the same interface as compound_catalog.CompoundCatalog,
+so app.py can use either (COMPOUND_STORE=sqlite selects this one). Each thread
+opens its own read-only connection on first use and keeps it, and SQLite's
+page cache is capped per connection, so worker memory does not grow with
+the catalogue.
+
+Usage:
+    python compound_store.py catalogue.ndjson -o data/compounds.sqlite
+"""
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from operator import itemgetter
+
+from compound_catalog import (MAX_COUNT, NO_SOURCE, CompoundNormalizer, SourceFingerprint, current_fingerprint,
+                              iter_catalogue, source_fingerprint)
+from compound_index import mask_numbers, ratio_string
+from compound_similarity import composition_vector
+
+SCHEMA = '''
+CREATE TABLE compounds (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    formula TEXT NOT NULL,
+    category TEXT,
+    signature TEXT NOT NULL,
+    element_set TEXT NOT NULL,
+    element_set_node INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE compound_elements (
+    compound_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (compound_id, number)
+) WITHOUT ROWID;
+CREATE TABLE compound_pairs (
+    first INTEGER NOT NULL,
+    second INTEGER NOT NULL,
+    compound_id INTEGER NOT NULL,
+    PRIMARY KEY (first, second, compound_id)
+) WITHOUT ROWID;
+CREATE TABLE element_set_nodes (
+    id INTEGER PRIMARY KEY,     -- the root, 0, has no row
+    parent INTEGER NOT NULL,
+    number INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE compounds_fts USING fts5(name, formula, category, uses);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+'''
+# Created after the bulk insert, which is faster than maintaining them row by row
+INDEXES = '''
+CREATE INDEX compounds_signature ON compounds (signature, id);
+CREATE INDEX compounds_element_set ON compounds (element_set, id);
+CREATE INDEX compound_elements_number ON compound_elements (number, compound_id);
+CREATE INDEX compound_elements_weight ON compound_elements (number, weight DESC, compound_id);
+CREATE INDEX compounds_element_set_node ON compounds (element_set_node, id);
+CREATE UNIQUE INDEX element_set_nodes_parent ON element_set_nodes (parent, number);
+'''
+# bm25() column weights: name, formula, category, uses
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+# Bumped when the schema changes; older databases are rebuilt on load
+SCHEMA_VERSION = '4'
+CACHE_KIB = 2048
+BATCH_SIZE = 5000
+TOKEN = re.compile(r'\w+')
+
+
+def composition_signature(pairs):
+    """Canonical text key such as '1:2,8:1' for (atomic number, count) pairs"""
+    return ','.join(f"{number}:{count}" for number, count in sorted(pairs))
+
+
+def element_set_signature(numbers):
+    """Canonical text key such as '1,8' for a set of atomic numbers"""
+    return ','.join(str(number) for number in sorted(numbers))
+
+
+def fts_query(text):
+    """FTS5 MATCH expression: every word must match, the last one as a prefix"""
+    words = TOKEN.findall(text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def build_database(compounds, path, table, source=None, log=None):
+    """Normalize `compounds` and write them to a new SQLite database at `path`.
+
+    Returns (compounds written, invalid compounds skipped).
+    """
+    normalizer = CompoundNormalizer(table)
+    digest = hashlib.blake2b(digest_size=16)
+    body_size = 2
+    count = skipped = 0
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript('PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;' + SCHEMA)
+        rows, elements, element_pairs, documents, new_nodes = [], [], [], [], []
+        nodes = {(): 0}     # element-set prefix -> element_set_nodes id
+
+        def flush():
+            connection.executemany('INSERT INTO compounds VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            connection.executemany('INSERT INTO compound_elements VALUES (?, ?, ?, ?)', elements)
+            connection.executemany('INSERT INTO compound_pairs VALUES (?, ?, ?)', element_pairs)
+            connection.executemany('INSERT INTO element_set_nodes VALUES (?, ?, ?)', new_nodes)
+            connection.executemany(
+                'INSERT INTO compounds_fts (rowid, name, formula, category, uses) VALUES (?, ?, ?, ?, ?)',
+                documents)
+            rows.clear()
+            elements.clear()
+            element_pairs.clear()
+            new_nodes.clear()
+            documents.clear()
+
+        for compound in compounds:
+            try:
+                compound, pairs = normalizer.normalize(compound)
+            except ValueError as e:
+                skipped += 1
+                if log and skipped <= 10:
+                    log(f"Skipping compound: {e}")
+                continue
+            count += 1
+            data = json.dumps(compound, ensure_ascii=False, separators=(',', ':'))
+            encoded = data.encode('utf-8')
+            if count > 1:
+                digest.update(b',')
+                body_size += 1
+            digest.update(encoded)
+            body_size += len(encoded)
+
+            # pairs are ordered by atomic number, so each prefix is a trie path
+            numbers = tuple(number for number, _ in pairs)
+            for depth in range(1, len(numbers) + 1):
+                prefix = numbers[:depth]
+                if prefix not in nodes:
+                    nodes[prefix] = len(nodes)
+                    new_nodes.append((nodes[prefix], nodes[prefix[:-1]], prefix[-1]))
+
+            uses = compound.get('uses')
+            rows.append((count, compound['name'], compound['formula'], compound.get('category'),
+                         composition_signature(pairs), element_set_signature(numbers), nodes[numbers], data))
+            vector = composition_vector(pairs)
+            elements.extend((count, number, n, vector[number]) for number, n in pairs)
+            element_pairs.extend((first, second, count) for first, second in itertools.combinations(numbers, 2))
+            documents.append((count, compound['name'], compound['formula'], compound.get('category') or '',
+                              ' '.join(uses) if isinstance(uses, list) else str(uses or '')))
+            if len(rows) >= BATCH_SIZE:
+                flush()
+        flush()
+
+        source = source or NO_SOURCE
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('schema', SCHEMA_VERSION),
+            ('count', str(count)),
+            ('body_size', str(body_size)),
+            ('digest', digest.hexdigest()),
+            ('source_size', str(source.size)),
+            ('source_mtime_ns', str(source.mtime_ns)),
+            ('source_elements', source.elements.hex()),
+            ('source_digest', source.digest.hex()),
+        ])
+        connection.executescript(INDEXES + "INSERT INTO compounds_fts (compounds_fts) VALUES ('optimize');")
+        connection.commit()
+    finally:
+        connection.close()
+    return count, skipped
+
+
+def build_store(source, path, table, log=None):
+    """Stream `source` into a database at `path`, replacing it atomically"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    try:
+        result = build_database(iter_catalogue(source), tmp, table, source_fingerprint(source, table), log)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return result
+
+
+class SQLiteCompoundStore:
+    """Read-only compound catalogue served from a SQLite database"""
+
+    def __init__(self, path, table):
+        self.path = os.path.abspath(path)
+        self.table = table
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+        meta = dict(self._connection().execute('SELECT key, value FROM meta'))
+        if meta.get('schema') != SCHEMA_VERSION:
+            raise ValueError(f"database schema {meta.get('schema')!r}, expected {SCHEMA_VERSION!r}")
+        self.record_count = int(meta['count'])
+        self.body_size = int(meta['body_size'])
+        self.digest = meta['digest']
+        self.source_fingerprint = SourceFingerprint(
+            int(meta['source_size']), int(meta['source_mtime_ns']),
+            bytes.fromhex(meta['source_elements']), bytes.fromhex(meta['source_digest']))
+
+    def _connection(self):
+        """This thread's connection, opened on first use and kept for reuse"""
+        if os.getpid() != self._pid:
+            # Connections must not cross a fork; drop any inherited ones
+            self._pid = os.getpid()
+            self._local = threading.local()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            connection.execute(f'PRAGMA cache_size=-{CACHE_KIB}')
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        return self.record_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.record_count
+        if not 0 <= index < self.record_count:
+            raise IndexError('compound index out of range')
+        row = self._connection().execute('SELECT data FROM compounds WHERE id = ?', (index + 1,)).fetchone()
+        return json.loads(row[0])
+
+    def __iter__(self):
+        for (data,) in self._connection().execute('SELECT data FROM compounds ORDER BY id'):
+            yield json.loads(data)
+
+    def compositions(self):
+        """[(atomic number, count), ...] of every compound, in record order"""
+        rows = self._connection().execute(
+            'SELECT compound_id, number, count FROM compound_elements ORDER BY compound_id, number')
+        for _, group in itertools.groupby(rows, key=itemgetter(0)):
+            yield [(number, count) for _, number, count in group]
+
+    def similarity_index(self):
+        """SQLiteCompositionIndex answering similar-compound queries from this database"""
+        return SQLiteCompositionIndex(self)
+
+    def json_chunks(self, batch_size=500):
+        """The catalogue as a JSON array, read in batches"""
+        yield b'['
+        cursor = self._connection().execute('SELECT data FROM compounds ORDER BY id')
+        first = True
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            chunk = ','.join(data for (data,) in batch).encode('utf-8')
+            yield chunk if first else b',' + chunk
+            first = False
+        yield b']'
+
+    def _pairs(self, element_counts):
+        index, numbers = self.table.index, self.table.numbers
+        pairs = []
+        for symbol, count in element_counts.items():
+            if count:
+                if symbol not in index:
+                    return None
+                pairs.append((numbers[index[symbol]], count))
+        return pairs
+
+    def exact(self, element_counts):
+        """Compound whose element counts equal `element_counts`, or None"""
+        pairs = self._pairs(element_counts)
+        if not pairs:
+            return None
+        row = self._connection().execute(
+            'SELECT data FROM compounds WHERE signature = ? ORDER BY id LIMIT 1',
+            (composition_signature(pairs),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def ratio(self, element_counts):
+        """(compound, suggested_ratio) for a compound with the same elements, or None"""
+        pairs = self._pairs(element_counts)
+        if not pairs:
+            return None
+        row = self._connection().execute(
+            'SELECT data FROM compounds WHERE element_set = ? ORDER BY id LIMIT 1',
+            (element_set_signature(number for number, _ in pairs),)).fetchone()
+        if row is None:
+            return None
+        compound = json.loads(row[0])
+        return compound, ratio_string(compound['element_counts'])
+
+    def formable_indexes(self, mask, limits=None):
+        """Record numbers, ascending, of compounds using only elements in `mask`.
+
+        Walks the element-set trie from the root, following only children
+        whose element is in the query set, so the work grows with the number
+        of matches rather than the catalogue. `limits` optionally maps atomic
+        numbers to the most of each a compound may use.
+        """
+        numbers = mask_numbers(mask)
+        if not numbers:
+            return []
+        params = []
+        for number in numbers:
+            params.extend((number, limits[number] if limits else MAX_COUNT))
+        within_limits = ''
+        if limits:
+            within_limits = ('WHERE NOT EXISTS (SELECT 1 FROM compound_elements e JOIN wanted w '
+                             'ON w.number = e.number WHERE e.compound_id = c.id AND e.count > w.most) ')
+        rows = self._connection().execute(
+            f'WITH RECURSIVE wanted(number, most) AS (VALUES {", ".join("(?, ?)" for _ in numbers)}), '
+            f'walk(id) AS (SELECT 0 UNION ALL SELECT n.id FROM walk CROSS JOIN wanted '
+            f'CROSS JOIN element_set_nodes n ON n.parent = walk.id AND n.number = wanted.number) '
+            f'SELECT c.id FROM walk JOIN compounds c ON c.element_set_node = walk.id '
+            f'{within_limits}ORDER BY c.id', params)
+        return [compound_id - 1 for (compound_id,) in rows]
+
+    def search(self, query, limit=10):
+        """Top compounds for a text query, ranked by FTS5 bm25"""
+        match = fts_query(query)
+        if match is None:
+            return []
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        rows = self._connection().execute(
+            f'SELECT c.data FROM compounds_fts JOIN compounds c ON c.id = compounds_fts.rowid '
+            f'WHERE compounds_fts MATCH ? ORDER BY bm25(compounds_fts, {weights}) LIMIT ?',
+            (match, limit))
+        return [json.loads(data) for (data,) in rows]
+
+
+class SQLiteCompositionIndex:
+    """compound_similarity.CompositionIndex.nearest() answered by a SQLiteCompoundStore.
+
+    compound_pairs stands in for the pair postings and the
+    compound_elements_weight index for the columns, so a query reads the
+    same few rows the in-memory index would and returns the same results.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def nearest(self, pairs, limit=10, exclude=()):
+        """[(similarity, doc id), ...] of the `limit` closest compounds, best first"""
+        vector = composition_vector(pairs)
+        if limit < 1:
+            return []
+        excluded = set(exclude)
+        connection = self.store._connection()
+
+        # Compounds sharing two or more of the query's elements, scored in full
+        candidates = []
+        shared = set()
+        element_pairs = list(itertools.combinations(sorted(vector), 2))
+        if element_pairs:
+            union = ' UNION '.join('SELECT compound_id FROM compound_pairs WHERE first = ? AND second = ?'
+                                   for _ in element_pairs)
+            rows = connection.execute(
+                f'WITH shared(id) AS ({union}) '
+                f'SELECT e.compound_id, e.number, e.weight FROM shared '
+                f'JOIN compound_elements e ON e.compound_id = shared.id ORDER BY e.compound_id, e.number',
+                [number for pair in element_pairs for number in pair])
+            for compound_id, row in itertools.groupby(rows, key=itemgetter(0)):
+                doc_id = compound_id - 1
+                shared.add(doc_id)
+                if doc_id not in excluded:
+                    score = sum(vector.get(number, 0.0) * weight for _, number, weight in row)
+                    candidates.append((score, -doc_id))
+
+        # The rest share one element: the weight index yields them best first
+        skip = shared | excluded
+        for number, weight in vector.items():
+            taken = 0
+            rows = connection.execute(
+                'SELECT compound_id, weight FROM compound_elements WHERE number = ? '
+                'ORDER BY weight DESC, compound_id', (number,))
+            for compound_id, entry in rows:
+                doc_id = compound_id - 1
+                if doc_id in skip:
+                    continue
+                candidates.append((weight * entry, -doc_id))
+                taken += 1
+                if taken == limit:
+                    break
+        return [(score, -doc_id) for score, doc_id in heapq.nlargest(limit, candidates)]
+
+
+def record_source_mtime(path, mtime_ns):
+    """Update the source mtime recorded in a database's meta table"""
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'source_mtime_ns'", (str(mtime_ns),))
+    finally:
+        connection.close()
+
+
+def load_store(source, path, table, log=None):
+    """Open the database at `path`, rebuilding it first if `source` or the element data changed.
+
+    See compound_catalog.current_fingerprint() for how a changed source is detected.
+    """
+    have_source = os.path.exists(source)
+    if os.path.exists(path):
+        try:
+            store = SQLiteCompoundStore(path, table)
+            if not have_source:
+                return store
+            current = current_fingerprint(store.source_fingerprint, source, table)
+            if current is not None:
+                if current != store.source_fingerprint:
+                    try:
+                        record_source_mtime(path, current.mtime_ns)
+                        store.source_fingerprint = current
+                    except sqlite3.Error as e:
+                        if log:
+                            log(f"Cannot update compound database {path} ({e}); the catalogue will be hashed again")
+                return store
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            if log:
+                log(f"Ignoring unreadable compound database {path}: {e}")
+    if not have_source:
+        raise FileNotFoundError(f'No compound catalogue at {source}')
+
+    start = time.perf_counter()
+    count, skipped = build_store(source, path, table, log)
+    if log:
+        log(f"Built compound database with {count} compounds"
+            f"{f', skipped {skipped} invalid' if skipped else ''} in {time.perf_counter() - start:.2f}s")
+    return SQLiteCompoundStore(path, table)
+
+
+def main():
+    from element_store import ElementStore
+
+    parser = argparse.ArgumentParser(description='Import a compound catalogue into a SQLite database')
+    parser.add_argument('source', help='catalogue as a JSON array, {"compounds": [...]} or NDJSON')
+    parser.add_argument('-o', '--output', default=os.path.join('data', 'compounds.sqlite'))
+    parser.add_argument('--elements', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'data', 'elements.json'))
+    args = parser.parse_args()
+
+    with open(args.elements, encoding='utf-8') as f:
+        data = json.load(f)
+    table = ElementStore(data['elements'] if isinstance(data, dict) else data).table
+
+    start = time.perf_counter()
+    count, skipped = build_store(args.source, args.output, table, log=print)
+    print(f"{count} compounds written to {args.output} ({os.path.getsize(args.output):,} bytes), "
+          f"{skipped} skipped, in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
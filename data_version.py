@@ -0,0 +1,152 @@
+"""Versioned datasets: immutable snapshots that are rebuilt and swapped atomically.
+
+A DataSnapshot bundles the element store, the compound catalogue and every
+index, parser cache and response payload derived from them. Snapshots are
+never modified once built, so a request that picked one up keeps a
+consistent view for its whole lifetime.
+
+DataReloader holds the current snapshot. check() polls the data files' size
+and mtime (at most once per interval, so it is cheap enough to call on every
+request) and, once a change has held still for a full interval, builds a new
+snapshot on a background thread and swaps it in with a single assignment.
+Requests are never blocked by a rebuild, a failed rebuild keeps the old
+snapshot, and caches are invalidated by being part of the snapshot.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cache import LRUCache
+from element_query import ElementQueryIndex
+from equation_balancer import EquationBalancer
+from formula_parser import FormulaParser
+from precompressed import PrecompressedJSON
+from quiz_engine import QuizEngine
+from search_index import ElementSearchIndex
+
+
+class DataSnapshot:
+    """One immutable version of the datasets and everything derived from them"""
+
+    def __init__(self, elements, compounds, search_compounds=True, precompress_limit=8 * 1024 * 1024,
+                 dynamic_cache_size=1024, quiz_seed=None, mix_table=None, dumps=json.dumps):
+        self.elements = elements
+        self.compounds = compounds
+        self.loaded_at = time.time()
+
+        self.element_search = ElementSearchIndex(elements)
+        self.element_query = ElementQueryIndex(elements.table)
+        self.formula_parser = FormulaParser(elements.by_symbol)
+        self.balancer = EquationBalancer(self.formula_parser)
+        self.quiz = QuizEngine(elements, seed=quiz_seed)
+        # Mapped from the snapshot; stores with their own full-text search (SQLite FTS5) go without
+        self.compound_search = compounds.search_index() if search_compounds else None
+        # Mapped from the snapshot, or queried from the database
+        self.compound_similarity = compounds.similarity_index()
+        self.dynamic_compounds = LRUCache(maxsize=dynamic_cache_size)
+        # Precomputed dynamic compounds (mix_table.MixTable), or None
+        self.mix_table = mix_table
+        # Rendered pages embedding this data, filled in by the app on first request
+        self.pages = {}
+
+        # Serialized and compressed once per snapshot; large catalogues are
+        # streamed from the store instead of held compressed in memory
+        self.elements_payload = PrecompressedJSON(dumps(elements.table.to_dicts(), separators=(',', ':')))
+        self.compounds_payload = None
+        if compounds.body_size <= precompress_limit:
+            self.compounds_payload = PrecompressedJSON(b''.join(compounds.json_chunks()))
+
+        # Content-derived, so every worker (and host) reports the same version
+        self.version = hashlib.blake2b(
+            f"{self.elements_payload.etag}:{compounds.digest}".encode(), digest_size=6).hexdigest()
+
+
+def file_fingerprint(paths):
+    """(path, size, mtime_ns) for each path; missing files have size and mtime None"""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class DataReloader:
+    """Serves the current DataSnapshot and replaces it when the data files change"""
+
+    def __init__(self, snapshot, build, paths, interval=2.0, log=None):
+        self.current = snapshot
+        self.build = build
+        self.paths = tuple(paths)
+        self.interval = interval
+        self.log = log
+        self.last_error = None
+        self._loaded = file_fingerprint(self.paths)
+        self._pending = None
+        self._next_check = time.monotonic() + interval
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def reloading(self):
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def check(self):
+        """Start a rebuild if the data files changed and have since settled.
+
+        Returns True if a rebuild was started. A no-op unless `interval`
+        seconds have passed since the last check, or if interval is 0.
+        """
+        now = time.monotonic()
+        if not self.interval or now < self._next_check:
+            return False
+        self._next_check = now + self.interval
+
+        fingerprint = file_fingerprint(self.paths)
+        if fingerprint == self._loaded:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            # Changed since the last look; wait until writers are done
+            self._pending = fingerprint
+            return False
+        self._pending = None
+        return self.reload()
+
+    def reload(self, wait=False):
+        """Rebuild in the background; returns False if a rebuild is already running"""
+        with self._lock:
+            if self.reloading:
+                started = False
+            else:
+                self._thread = threading.Thread(target=self._rebuild, name='data-reload', daemon=True)
+                self._thread.start()
+                started = True
+            thread = self._thread
+        if wait:
+            thread.join()
+        return started
+
+    def _rebuild(self):
+        # Taken before building, so a change made during the build triggers another one
+        fingerprint = file_fingerprint(self.paths)
+        start = time.perf_counter()
+        try:
+            snapshot = self.build()
+        except Exception as e:
+            self.last_error = str(e)
+            if self.log:
+                self.log(f"Data reload failed, keeping version {self.current.version}: {e}")
+        else:
+            previous, self.current = self.current, snapshot
+            self.last_error = None
+            if self.log:
+                self.log(f"Data reloaded: version {previous.version} -> {snapshot.version} "
+                         f"in {time.perf_counter() - start:.2f}s")
+        finally:
+            self._loaded = fingerprint
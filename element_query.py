@@ -0,0 +1,204 @@
+"""Filter, sort, project and paginate elements using precomputed row bitmasks"""
+import math
+from bisect import bisect_left, bisect_right
+
+from element_table import FIELDS
+
+RANGE_FIELDS = ('number', 'atomic_mass', 'density', 'melt', 'boil')
+EQUALITY_FIELDS = ('group', 'period', 'block', 'category', 'phase')
+SORT_FIELDS = ('number', 'name', 'symbol', 'atomic_mass', 'density', 'melt', 'boil',
+               'group', 'period')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 118
+
+
+class QueryError(ValueError):
+    """Raised for malformed query parameters"""
+
+
+class ElementQueryIndex:
+    """Precomputed indexes for /api/elements/query.
+
+    Every filter resolves to an int bitmask over table rows: equality filters
+    are a dict lookup, and range filters are two bisects into a sorted column
+    plus an AND of prefix masks. Combining filters is a bitwise AND, and
+    sorting uses precomputed rank arrays, so a query never loops over every
+    element in Python.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.all_rows = (1 << len(table)) - 1
+
+        # Range fields: sorted values with the mask of the first k rows in that order
+        self.sorted_values = {}
+        self.prefix_masks = {}
+        for field in RANGE_FIELDS:
+            column = table.columns[field]
+            order = sorted((i for i in range(len(table)) if not _missing(column[i])),
+                           key=column.__getitem__)
+            prefix = [0]
+            for i in order:
+                prefix.append(prefix[-1] | (1 << i))
+            self.sorted_values[field] = [column[i] for i in order]
+            self.prefix_masks[field] = prefix
+
+        # Equality fields: value -> mask of rows holding it
+        self.value_masks = {}
+        for field in EQUALITY_FIELDS:
+            masks = {}
+            for i in range(len(table)):
+                value = table.value(field, i)
+                masks[value] = masks.get(value, 0) | (1 << i)
+            self.value_masks[field] = masks
+
+        # Sort fields: rank of each row (equal values share a rank, so ties keep
+        # atomic-number order); missing values rank after all others
+        self.ranks = {}
+        self.present = {}
+        for field in SORT_FIELDS:
+            column = table.columns[field]
+            present = sorted((i for i in range(len(table)) if not _missing(column[i])),
+                             key=column.__getitem__)
+            rank = [len(present)] * len(table)
+            for position, i in enumerate(present):
+                if position and column[i] == column[present[position - 1]]:
+                    rank[i] = rank[present[position - 1]]
+                else:
+                    rank[i] = position
+            self.ranks[field] = rank
+            self.present[field] = len(present)
+
+    def range_mask(self, field, low=None, high=None):
+        """Rows with low <= field <= high; rows missing the value never match"""
+        values, prefix = self.sorted_values[field], self.prefix_masks[field]
+        start = 0 if low is None else bisect_left(values, low)
+        end = len(values) if high is None else bisect_right(values, high)
+        if start >= end:
+            return 0
+        return prefix[end] & ~prefix[start]
+
+    def equality_mask(self, field, values):
+        """Rows whose field equals any of `values`"""
+        masks = self.value_masks[field]
+        mask = 0
+        for value in values:
+            mask |= masks.get(value, 0)
+        return mask
+
+    def query(self, ranges=(), equals=(), sort='number', descending=False,
+              fields=None, offset=0, limit=DEFAULT_LIMIT):
+        """Run a query; returns {'total', 'offset', 'limit', 'results'}"""
+        mask = self.all_rows
+        for field, low, high in ranges:
+            mask &= self.range_mask(field, low, high)
+        for field, values in equals:
+            mask &= self.equality_mask(field, values)
+
+        rows = _bits(mask)
+        rank = self.ranks[sort]
+        if descending:
+            # Missing values stay last when sorting in descending order too
+            present = self.present[sort]
+            rows.sort(key=lambda i: -rank[i] if rank[i] < present else rank[i])
+        else:
+            rows.sort(key=rank.__getitem__)
+
+        page = rows[offset:offset + limit]
+        value = self.table.value
+        fields = fields or FIELDS
+        return {
+            'total': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'results': [{field: value(field, i) for field in fields} for i in page],
+        }
+
+
+def query_from_args(args):
+    """Keyword arguments for ElementQueryIndex.query from request query args.
+
+    Supported parameters: min_<field>/max_<field> for RANGE_FIELDS,
+    <field>=value (repeatable or comma-separated) for EQUALITY_FIELDS,
+    sort=<field> or sort=-<field>, fields=a,b,c, offset and limit. A
+    min_/max_ parameter for any other field is an error.
+    """
+    for name in args:
+        if name.startswith(('min_', 'max_')) and name[4:] not in RANGE_FIELDS:
+            raise QueryError(f"Cannot filter by range on '{name[4:]}'; choose from {', '.join(RANGE_FIELDS)}")
+
+    ranges = []
+    for field in RANGE_FIELDS:
+        low = _number(args, f"min_{field}")
+        high = _number(args, f"max_{field}")
+        if low is not None or high is not None:
+            ranges.append((field, low, high))
+
+    equals = []
+    for field in EQUALITY_FIELDS:
+        values = [v.strip() for raw in args.getlist(field) for v in raw.split(',') if v.strip()]
+        if values:
+            if field in ('group', 'period'):
+                try:
+                    values = [int(v) for v in values]
+                except ValueError:
+                    raise QueryError(f"'{field}' must be an integer")
+            equals.append((field, values))
+
+    sort = args.get('sort', 'number')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_FIELDS:
+        raise QueryError(f"Cannot sort by '{sort}'; choose from {', '.join(SORT_FIELDS)}")
+
+    fields = None
+    if args.get('fields'):
+        fields = tuple(f.strip() for f in args['fields'].split(',') if f.strip())
+        unknown = [f for f in fields if f not in FIELDS]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+
+    offset = _integer(args, 'offset', 0)
+    limit = _integer(args, 'limit', DEFAULT_LIMIT)
+    if offset < 0 or not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"'offset' must be >= 0 and 'limit' between 1 and {MAX_LIMIT}")
+
+    return {'ranges': ranges, 'equals': equals, 'sort': sort, 'descending': descending,
+            'fields': fields, 'offset': offset, 'limit': limit}
+
+
+def _missing(value):
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _bits(mask):
+    """Row indexes of the set bits in `mask`, ascending"""
+    rows = []
+    while mask:
+        low = mask & -mask
+        rows.append(low.bit_length() - 1)
+        mask ^= low
+    return rows
+
+
+def _number(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise QueryError(f"'{name}' must be a number")
+    if math.isnan(number):
+        raise QueryError(f"'{name}' must be a number")
+    return number
+
+
+def _integer(args, name, default):
+    value = args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"'{name}' must be an integer")
@@ -0,0 +1,70 @@
+"""Read-only, indexed view over the periodic table data"""
+from types import MappingProxyType
+
+from element_table import ElementTable
+
+
+class ElementStore:
+    """Immutable element collection with O(1) lookups.
+
+    Built once by load_elements(); the indexes are read-only mappings so the
+    store can be shared freely between requests and threads. Records are
+    ElementRow views over a columnar ElementTable; call to_dict() on one (or
+    table.to_dicts()) to serialize.
+    """
+
+    __slots__ = ('table', 'elements', 'by_number', 'by_symbol', 'by_name',
+                 'by_category', 'by_phase')
+
+    def __init__(self, elements):
+        table = ElementTable(elements)
+        elements = table.rows
+
+        by_category = {}
+        by_phase = {}
+        for element in elements:
+            by_category.setdefault(element['category'], []).append(element)
+            by_phase.setdefault(element['phase'], []).append(element)
+
+        set_attr = object.__setattr__
+        set_attr(self, 'table', table)
+        set_attr(self, 'elements', elements)
+        set_attr(self, 'by_number', MappingProxyType({e['number']: e for e in elements}))
+        set_attr(self, 'by_symbol', MappingProxyType({e['symbol']: e for e in elements}))
+        set_attr(self, 'by_name', MappingProxyType({e['name'].lower(): e for e in elements}))
+        set_attr(self, 'by_category', MappingProxyType({k: tuple(v) for k, v in by_category.items()}))
+        set_attr(self, 'by_phase', MappingProxyType({k: tuple(v) for k, v in by_phase.items()}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ElementStore is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('ElementStore is immutable')
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def get_by_number(self, number):
+        """Return the element with the given atomic number, or None"""
+        return self.by_number.get(number)
+
+    def get_by_symbol(self, symbol):
+        """Return the element with the given (case-sensitive) symbol, or None"""
+        return self.by_symbol.get(symbol)
+
+    def get_by_name(self, name):
+        """Return the element with the given name (case-insensitive), or None"""
+        return self.by_name.get(name.lower())
+
+    @property
+    def categories(self):
+        """All distinct element categories"""
+        return tuple(self.by_category)
+
+    @property
+    def phases(self):
+        """All distinct element phases"""
+        return tuple(self.by_phase)
@@ -0,0 +1,157 @@
+"""Columnar periodic table: one compact array per element property"""
+import math
+from array import array
+
+# JSON field order of an element record
+FIELDS = ('name', 'symbol', 'number', 'atomic_mass', 'category', 'group', 'period',
+          'block', 'phase', 'density', 'melt', 'boil', 'summary', 'cpk-hex')
+
+# Column storage by kind; missing floats are NaN, missing integers 0
+FLOAT_FIELDS = ('atomic_mass', 'density', 'melt', 'boil')
+INT_FIELDS = {'number': 'H', 'group': 'b', 'period': 'b'}
+CODED_FIELDS = ('category', 'phase', 'block')
+STRING_FIELDS = ('name', 'symbol', 'summary', 'cpk-hex')
+
+NAN = float('nan')
+
+
+def _float(value):
+    return NAN if value is None else float(value)
+
+
+class ElementRow:
+    """Read-only record view of one row of an ElementTable.
+
+    Supports `row['name']` and `row.get('density')` so code written against
+    the JSON dicts keeps working; to_dict() rebuilds the dict for responses.
+    """
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, field):
+        return self.table.value(field, self.index)
+
+    def __contains__(self, field):
+        return field in self.table.columns
+
+    def __repr__(self):
+        return f"<ElementRow {self.symbol}>"
+
+    def get(self, field, default=None):
+        if field not in self.table.columns:
+            return default
+        return self.table.value(field, self.index)
+
+    def keys(self):
+        return FIELDS
+
+    @property
+    def symbol(self):
+        return self.table.symbols[self.index]
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def number(self):
+        return self.table.numbers[self.index]
+
+    def to_dict(self):
+        """The element as a plain dict for JSON responses"""
+        value, index = self.table.value, self.index
+        return {field: value(field, index) for field in FIELDS}
+
+
+class ElementTable:
+    """Element properties stored column-wise, one row per element.
+
+    Numeric properties live in `array` columns, categories, phases and blocks
+    are small integer codes into `labels`, and strings are tuples. Rows are
+    ordered by atomic number; `index` maps symbols to row numbers. The mixing
+    pipeline works on whole selections at once (molecular_mass,
+    category_mask, max_value) rather than on per-element dicts.
+    """
+
+    def __init__(self, elements):
+        elements = sorted(elements, key=lambda e: e['number'])
+        self.size = len(elements)
+
+        columns = {}
+        for field in FLOAT_FIELDS:
+            columns[field] = array('d', (_float(e.get(field)) for e in elements))
+        for field, typecode in INT_FIELDS.items():
+            columns[field] = array(typecode, (e.get(field) or 0 for e in elements))
+        self.labels = {}
+        for field in CODED_FIELDS:
+            labels = tuple(sorted({e.get(field) or '' for e in elements}))
+            codes = {label: code for code, label in enumerate(labels)}
+            self.labels[field] = labels
+            columns[field] = array('B', (codes[e.get(field) or ''] for e in elements))
+        for field in STRING_FIELDS:
+            columns[field] = tuple(e.get(field) or '' for e in elements)
+        self.columns = columns
+
+        self.symbols = columns['symbol']
+        self.names = columns['name']
+        self.numbers = columns['number']
+        self.masses = columns['atomic_mass']
+        self.categories = columns['category']
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.rows = tuple(ElementRow(self, i) for i in range(self.size))
+        self._category_bits = {}
+
+    def __len__(self):
+        return self.size
+
+    def row(self, symbol):
+        """The row view for a symbol (KeyError if unknown)"""
+        return self.rows[self.index[symbol]]
+
+    def value(self, field, index):
+        """One cell decoded to its JSON value"""
+        value = self.columns[field][index]
+        if field in self.labels:
+            return self.labels[field][value]
+        if field in FLOAT_FIELDS and math.isnan(value):
+            return None
+        return value
+
+    def to_dicts(self):
+        """Every row as a plain dict, in atomic-number order"""
+        return [row.to_dict() for row in self.rows]
+
+    def molecular_mass(self, counts):
+        """Sum of atomic masses for ((symbol, count), ...) pairs"""
+        masses, index = self.masses, self.index
+        return sum(masses[index[symbol]] * count for symbol, count in counts)
+
+    def category_bits(self, categories):
+        """Bitmask with one bit per category code, for use with category_mask()"""
+        key = tuple(categories)
+        bits = self._category_bits.get(key)
+        if bits is None:
+            codes = {label: code for code, label in enumerate(self.labels['category'])}
+            bits = 0
+            for category in key:
+                if category in codes:
+                    bits |= 1 << codes[category]
+            self._category_bits[key] = bits
+        return bits
+
+    def category_mask(self, symbols):
+        """Bitmask of the categories present among `symbols`"""
+        categories, index = self.categories, self.index
+        mask = 0
+        for symbol in symbols:
+            mask |= 1 << categories[index[symbol]]
+        return mask
+
+    def max_value(self, field, symbols):
+        """Largest value of a numeric column among `symbols`"""
+        column, index = self.columns[field], self.index
+        return max(column[index[symbol]] for symbol in symbols)
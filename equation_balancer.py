@@ -0,0 +1,164 @@
+"""Chemical equation balancing by exact integer nullspace"""
+import math
+import re
+from collections import namedtuple
+
+from cache import LRUCache
+from formula_parser import FormulaError
+
+# species: ((coefficient, formula), ...) per side, in the order given
+BalancedEquation = namedtuple('BalancedEquation', 'reactants products')
+
+ARROW = re.compile(r'\s*(?:<=>|<->|->|=>|→|⟶|⇌|⇄|=)\s*')
+# ' + ' between species, or a bare '+' directly followed by the next species ('H2+O2');
+# '+' signs that end a charge ('Fe^3+ + Cl-', 'NH4+') are left alone
+PLUS = re.compile(r'\s+\+\s+|(?<=[A-Za-z0-9)\]}])\+(?=[A-Z(\[{])')
+# Coefficients already written in front of a species are ignored
+COEFFICIENT = re.compile(r'^(?:\d+(?:/\d+)?|[½⅓⅔¼¾])\s*(?=[A-Z(\[{])')
+
+
+class BalanceError(ValueError):
+    """Raised for equations that cannot be parsed or balanced"""
+
+
+def split_equation(equation):
+    """(reactant formulas, product formulas) of an equation such as 'H2 + O2 -> H2O'"""
+    if not isinstance(equation, str):
+        raise BalanceError('Equation must be a string')
+    if not equation.strip():
+        raise BalanceError('Equation is empty')
+    sides = ARROW.split(equation.strip())
+    if len(sides) != 2:
+        raise BalanceError(f"Equation needs exactly one arrow: '{equation}'")
+    reactants, products = ([COEFFICIENT.sub('', species.strip()) for species in PLUS.split(side)]
+                           for side in sides)
+    if not all(reactants) or not all(products):
+        raise BalanceError(f"Empty species in '{equation}'")
+    return reactants, products
+
+
+def nullspace_vector(matrix, columns):
+    """Smallest integer vector x, first nonzero entry positive, with matrix · x = 0.
+
+    Gauss-Jordan elimination over the integers: rows are combined by cross
+    multiplication and divided by their gcd, so every step is exact without
+    Fraction arithmetic. Raises BalanceError unless the nullspace has
+    exactly one dimension.
+    """
+    rows = [list(row) for row in matrix if any(row)]
+    pivots = []
+    for column in range(columns):
+        rank = len(pivots)
+        pivot = next((i for i in range(rank, len(rows)) if rows[i][column]), None)
+        if pivot is None:
+            continue
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        pivot_row = rows[rank]
+        lead = pivot_row[column]
+        for i, row in enumerate(rows):
+            factor = row[column]
+            if i != rank and factor:
+                row = [lead * a - factor * b for a, b in zip(row, pivot_row)]
+                divisor = math.gcd(*row)
+                rows[i] = [a // divisor for a in row] if divisor > 1 else row
+        pivots.append(column)
+        if len(pivots) == len(rows):
+            break
+
+    free = [column for column in range(columns) if column not in pivots]
+    if not free:
+        raise BalanceError('The equation cannot be balanced')
+    if len(free) > 1:
+        raise BalanceError('The equation has more than one independent balance')
+    free = free[0]
+
+    # Each pivot row now reads lead * x[pivot] + row[free] * x[free] = 0
+    scale = math.lcm(*(abs(row[column]) for row, column in zip(rows, pivots)))
+    solution = [0] * columns
+    solution[free] = scale
+    for row, column in zip(rows, pivots):
+        solution[column] = -row[free] * scale // row[column]
+    divisor = math.gcd(*solution)
+    sign = 1 if next(x for x in solution if x) > 0 else -1
+    return [sign * x // divisor for x in solution]
+
+
+class EquationBalancer:
+    """Balances equations like 'KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2'.
+
+    Builds the element x species matrix (plus a charge row when ions are
+    present), with products negated, and takes its nullspace: the smallest
+    whole-number coefficients that conserve every element and the charge.
+    Results are cached by the multisets of reactant and product species, so
+    reordered or differently written forms of an equation share an entry.
+    """
+
+    def __init__(self, parser, cache_size=4096):
+        self.parser = parser
+        self.cache = LRUCache(cache_size)
+
+    def _species(self, formula):
+        try:
+            parsed = self.parser.parse(formula)
+        except FormulaError as e:
+            raise BalanceError(str(e))
+        return tuple(sorted(parsed.counts)), parsed.charge
+
+    def balance(self, reactants, products):
+        """BalancedEquation for lists of reactant and product formulas; raises BalanceError"""
+        if not reactants or not products:
+            raise BalanceError('An equation needs at least one reactant and one product')
+        reactant_species = [self._species(formula) for formula in reactants]
+        product_species = [self._species(formula) for formula in products]
+
+        key = (tuple(sorted(reactant_species)), tuple(sorted(product_species)))
+        coefficients = self.cache.get(key)
+        if coefficients is None:
+            try:
+                coefficients = self._solve(*key)
+            except BalanceError as e:
+                coefficients = e
+            self.cache.put(key, coefficients)
+        if isinstance(coefficients, BalanceError):
+            raise coefficients
+
+        reactant_coefficients, product_coefficients = coefficients
+        return BalancedEquation(
+            tuple((reactant_coefficients[species], formula)
+                  for species, formula in zip(reactant_species, reactants)),
+            tuple((product_coefficients[species], formula)
+                  for species, formula in zip(product_species, products)))
+
+    def balance_equation(self, equation):
+        """BalancedEquation for an equation string; raises BalanceError"""
+        return self.balance(*split_equation(equation))
+
+    def _solve(self, reactants, products):
+        """({species: coefficient} for reactants, same for products)"""
+        if len(set(reactants + products)) < len(reactants) + len(products):
+            raise BalanceError('Each species may appear only once')
+        species = reactants + products
+        elements = sorted({symbol for counts, _ in species for symbol, _ in counts})
+        row_of = {symbol: i for i, symbol in enumerate(elements)}
+        charged = any(charge for _, charge in species)
+        matrix = [[0] * len(species) for _ in range(len(elements) + charged)]
+        for column, (counts, charge) in enumerate(species):
+            sign = 1 if column < len(reactants) else -1
+            for symbol, count in counts:
+                matrix[row_of[symbol]][column] = sign * count
+            if charged:
+                matrix[-1][column] = sign * charge
+
+        solution = nullspace_vector(matrix, len(species))
+        if any(x <= 0 for x in solution):
+            raise BalanceError('The equation cannot be balanced with these species on these sides')
+        return (dict(zip(reactants, solution[:len(reactants)])),
+                dict(zip(products, solution[len(reactants):])))
+
+
+def format_equation(balanced, arrow='→'):
+    """'2H2 + O2 → 2H2O' for a BalancedEquation"""
+    def side(terms):
+        return ' + '.join(formula if coefficient == 1 else f"{coefficient}{formula}"
+                          for coefficient, formula in terms)
+    return f"{side(balanced.reactants)} {arrow} {side(balanced.products)}"
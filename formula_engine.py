@@ -0,0 +1,267 @@
+"""Charge-balanced formula search over common oxidation states"""
+import heapq
+from collections import namedtuple
+
+from cache import LRUCache
+
+# Common oxidation states for elements
+OXIDATION_STATES = {
+    # Group 1 - Alkali metals
+    'H': [1, -1], 'Li': [1], 'Na': [1], 'K': [1], 'Rb': [1], 'Cs': [1], 'Fr': [1],
+
+    # Group 2 - Alkaline earth metals
+    'Be': [2], 'Mg': [2], 'Ca': [2], 'Sr': [2], 'Ba': [2], 'Ra': [2],
+
+    # Group 13
+    'B': [3], 'Al': [3], 'Ga': [3], 'In': [3], 'Tl': [1, 3],
+
+    # Group 14
+    'C': [4, -4], 'Si': [4], 'Ge': [2, 4], 'Sn': [2, 4], 'Pb': [2, 4],
+
+    # Group 15
+    'N': [3, 5, -3], 'P': [3, 5, -3], 'As': [3, 5, -3], 'Sb': [3, 5], 'Bi': [3, 5],
+
+    # Group 16
+    'O': [-2], 'S': [2, 4, 6, -2], 'Se': [2, 4, 6, -2], 'Te': [2, 4, 6], 'Po': [2, 4],
+
+    # Group 17 - Halogens
+    'F': [-1], 'Cl': [1, 3, 5, 7, -1], 'Br': [1, 3, 5, 7, -1], 'I': [1, 3, 5, 7, -1], 'At': [1, 3, 5, 7, -1],
+
+    # Group 18 - Noble gases
+    'He': [0], 'Ne': [0], 'Ar': [0], 'Kr': [2], 'Xe': [2, 4, 6], 'Rn': [2], 'Og': [0],
+
+    # Transition metals (common oxidation states)
+    'Sc': [3], 'Ti': [2, 3, 4], 'V': [2, 3, 4, 5], 'Cr': [2, 3, 6], 'Mn': [2, 3, 4, 6, 7],
+    'Fe': [2, 3], 'Co': [2, 3], 'Ni': [2, 3], 'Cu': [1, 2], 'Zn': [2],
+    'Y': [3], 'Zr': [4], 'Nb': [3, 5], 'Mo': [2, 3, 4, 5, 6], 'Tc': [4, 7], 'Ru': [2, 3, 4, 8],
+    'Rh': [3], 'Pd': [2, 4], 'Ag': [1], 'Cd': [2],
+    'Hf': [4], 'Ta': [5], 'W': [2, 3, 4, 5, 6], 'Re': [4, 6, 7], 'Os': [2, 3, 4, 6, 8],
+    'Ir': [3, 4], 'Pt': [2, 4], 'Au': [1, 3], 'Hg': [1, 2],
+
+    # Lanthanides (mostly +3)
+    'La': [3], 'Ce': [3, 4], 'Pr': [3], 'Nd': [3], 'Pm': [3], 'Sm': [2, 3], 'Eu': [2, 3],
+    'Gd': [3], 'Tb': [3, 4], 'Dy': [3], 'Ho': [3], 'Er': [3], 'Tm': [3], 'Yb': [2, 3], 'Lu': [3],
+
+    # Actinides
+    'Ac': [3], 'Th': [4], 'Pa': [4, 5], 'U': [3, 4, 5, 6], 'Np': [3, 4, 5, 6, 7], 'Pu': [3, 4, 5, 6],
+    'Am': [3, 4, 5, 6], 'Cm': [3], 'Bk': [3, 4], 'Cf': [3], 'Es': [3], 'Fm': [3], 'Md': [3], 'No': [2, 3], 'Lr': [3],
+
+    # Super-heavy elements (predicted)
+    'Rf': [4], 'Db': [5], 'Sg': [6], 'Bh': [7], 'Hs': [8], 'Mt': [9], 'Ds': [10], 'Rg': [11], 'Cn': [12],
+    'Nh': [13], 'Fl': [14], 'Mc': [15], 'Lv': [16], 'Ts': [17]
+}
+
+# Pauling electronegativities for the non-metals and metalloids; everything
+# else (the metals) is treated as DEFAULT_ELECTRONEGATIVITY. Used to decide
+# which elements take the negative oxidation states.
+ELECTRONEGATIVITY = {
+    'H': 2.20, 'B': 2.04, 'C': 2.55, 'N': 3.04, 'O': 3.44, 'F': 3.98,
+    'Si': 1.90, 'P': 2.19, 'S': 2.58, 'Cl': 3.16, 'Ge': 2.01, 'As': 2.18,
+    'Se': 2.55, 'Br': 2.96, 'Kr': 3.00, 'Sb': 2.05, 'Te': 2.10, 'I': 2.66,
+    'Xe': 2.60, 'Po': 2.00, 'At': 2.20,
+}
+DEFAULT_ELECTRONEGATIVITY = 1.5
+
+# Elements whose negative state is preferred even when a positive one would balance
+HALOGENS = frozenset({'F', 'Cl', 'Br', 'I', 'At'})
+
+# States only reached in oxides and oxoanions (HNO3 and N2O5, but NF3 rather than NF5)
+OXO_STATES = {'N': frozenset({5})}
+# The only states left next to hydrogen without oxygen (NH3 and NH4Cl rather than NHCl4)
+HYDRIDE_STATES = {'N': frozenset({-3})}
+
+# (symbol, oxidation state, count) per element, sorted by symbol
+Formula = namedtuple('Formula', 'parts')
+
+
+def electronegativity(symbol):
+    """Pauling electronegativity, approximated as DEFAULT_ELECTRONEGATIVITY for metals"""
+    return ELECTRONEGATIVITY.get(symbol, DEFAULT_ELECTRONEGATIVITY)
+
+
+def preferred_states(symbol, states):
+    """Oxidation states in order of preference, cheapest first.
+
+    Halogens prefer their negative state (chlorides rather than chlorine
+    oxides next to O or F), then their lowest positive one (ClF, Cl2O).
+    Everything else prefers its highest state, as in KMnO4, Na2SO4 and
+    Fe2O3, then lower ones and finally negative ones (Na2S, CH4).
+    """
+    negative = sorted(s for s in states if s < 0)
+    if symbol in HALOGENS:
+        return negative + sorted(s for s in states if s >= 0)
+    return sorted((s for s in states if s >= 0), reverse=True) + negative
+
+
+def _sum_table(magnitudes, max_count, limit):
+    """Fewest atoms reaching each total charge <= limit for one side of a formula.
+
+    Returns (best, layers): best maps a reachable total to its minimal atom
+    count and layers holds the back-pointers to recover the counts.
+    """
+    # Smallest charge the elements after position i still have to add
+    rest_min = [0] * (len(magnitudes) + 1)
+    for i in range(len(magnitudes) - 1, -1, -1):
+        rest_min[i] = rest_min[i + 1] + magnitudes[i]
+
+    frontier = {0: 0}
+    layers = []
+    for i, m in enumerate(magnitudes):
+        cap = limit - rest_min[i + 1]
+        best = {}
+        layer = {}
+        for total, atoms in frontier.items():
+            for count in range(1, max_count + 1):
+                q = total + count * m
+                if q > cap:
+                    break
+                if atoms + count < best.get(q, atoms + count + 1):
+                    best[q] = atoms + count
+                    layer[q] = (count, total)
+        if not best:
+            return {}, layers
+        layers.append(layer)
+        frontier = best
+    return frontier, layers
+
+
+def _unwind(layers, total):
+    counts = [0] * len(layers)
+    for i in range(len(layers) - 1, -1, -1):
+        counts[i], total = layers[i][total]
+    return counts
+
+
+def _min_counts(states, max_count):
+    """Smallest positive counts (each <= max_count) with sum(count * state) == 0.
+
+    Solves each side (cations, anions) separately, bounding the partial sums
+    by the most the other side can ever cancel, then matches equal totals.
+    The fewest-atoms match is also the primitive (smallest integer) ratio.
+    """
+    pos = [i for i, s in enumerate(states) if s > 0]
+    neg = [i for i, s in enumerate(states) if s < 0]
+    if not pos or not neg:
+        return None
+    pos_mag = [states[i] for i in pos]
+    neg_mag = [-states[i] for i in neg]
+    limit = min(sum(pos_mag), sum(neg_mag)) * max_count
+
+    pos_best, pos_layers = _sum_table(pos_mag, max_count, limit)
+    neg_best, neg_layers = _sum_table(neg_mag, max_count, limit)
+    match = min(((atoms + neg_best[total], total)
+                 for total, atoms in pos_best.items() if total in neg_best), default=None)
+    if match is None:
+        return None
+
+    total = match[1]
+    counts = [1] * len(states)  # zero-state elements appear once
+    for i, count in zip(pos, _unwind(pos_layers, total)):
+        counts[i] = count
+    for i, count in zip(neg, _unwind(neg_layers, total)):
+        counts[i] = count
+    return counts
+
+
+def _hydrated_halide(states, cations, h, o, halides):
+    """True if hydrogen is the only cation for both an oxide and a halide"""
+    return (cations == 1 and states[h] > 0 and states[o] < 0
+            and any(states[i] < 0 for i in halides))
+
+
+class FormulaEngine:
+    """Finds charge-neutral, minimal-ratio formulas for sets of elements.
+
+    Each oxidation-state assignment is scored by the sum of every element's
+    rank in preferred_states(), and assignments are explored best-first by
+    that score. The best-scoring one that balances wins, skipping
+    assignments without both a positive and a negative state or that put a
+    negative state on a less electronegative element than a positive one.
+    Without oxygen, OXO_STATES are dropped and HYDRIDE_STATES are the only
+    ones offered next to hydrogen; with it, hydrogen alone never balances a
+    halide next to an oxide (HClO rather than H3ClO).
+    Results are memoized per element set.
+    """
+
+    def __init__(self, oxidation_states=None, electronegativity=None,
+                 max_count=12, max_assignments=256, cache_size=4096):
+        self.oxidation_states = OXIDATION_STATES if oxidation_states is None else oxidation_states
+        self.electronegativity = ELECTRONEGATIVITY if electronegativity is None else electronegativity
+        self.max_count = max_count
+        self.max_assignments = max_assignments
+        self.cache = LRUCache(cache_size)
+
+    def balance(self, symbols):
+        """Formula for the element set `symbols`, or None if none is found"""
+        key = frozenset(symbols)
+        result = self.cache.get(key, False)
+        if result is False:
+            result = self._search(sorted(key))
+            self.cache.put(key, result)
+        return result
+
+    def _search(self, symbols):
+        if len(symbols) < 2:
+            return None
+        oxide = 'O' in symbols
+        options = []
+        for symbol in symbols:
+            states = self.oxidation_states.get(symbol)
+            if not oxide and symbol in OXO_STATES:
+                states = [s for s in states if s not in OXO_STATES[symbol]]
+            if not oxide and 'H' in symbols and symbol in HYDRIDE_STATES:
+                states = [s for s in states if s in HYDRIDE_STATES[symbol]]
+            if not states:
+                return None
+            options.append(preferred_states(symbol, states))
+        # Elements that can only be cations (or only anions) contribute at
+        # least their smallest charge; reject sets the other side can never cancel
+        min_positive = sum(min(states) for states in options if min(states) > 0)
+        min_negative = -sum(max(states) for states in options if max(states) < 0)
+        max_positive = self.max_count * sum(max(max(states), 0) for states in options)
+        max_negative = -self.max_count * sum(min(min(states), 0) for states in options)
+        if not max_positive or not max_negative:
+            return None
+        if min_positive > max_negative or min_negative > max_positive:
+            return None
+
+        en = [self.electronegativity.get(s, DEFAULT_ELECTRONEGATIVITY) for s in symbols]
+        # Indexes of hydrogen, oxygen and the halogens when all are present
+        acid = None
+        halides = [i for i, s in enumerate(symbols) if s in HALOGENS]
+        if oxide and halides and 'H' in symbols:
+            acid = (symbols.index('H'), symbols.index('O'), halides)
+        fallback = None
+        n = len(symbols)
+        start = (0,) * n
+        heap = [(0, start)]
+        seen = {start}
+        explored = 0
+        while heap and explored < self.max_assignments:
+            cost, picks = heapq.heappop(heap)
+            explored += 1
+            for i in range(n):
+                if picks[i] + 1 < len(options[i]):
+                    nxt = picks[:i] + (picks[i] + 1,) + picks[i + 1:]
+                    if nxt not in seen:
+                        seen.add(nxt)
+                        heapq.heappush(heap, (cost + 1, nxt))
+
+            states = [options[i][p] for i, p in enumerate(picks)]
+            positive = [en[i] for i, s in enumerate(states) if s > 0]
+            negative = [en[i] for i, s in enumerate(states) if s < 0]
+            if not positive or not negative:
+                continue
+            if acid is not None and _hydrated_halide(states, len(positive), *acid):
+                continue
+            ordered = max(positive) <= min(negative)
+            if not ordered and fallback is not None:
+                continue
+            counts = _min_counts(states, self.max_count)
+            if counts is None:
+                continue
+            formula = Formula(tuple(zip(symbols, states, counts)))
+            if ordered:
+                return formula
+            fallback = formula
+        return fallback
@@ -0,0 +1,185 @@
+"""Single-pass chemical formula parser"""
+import re
+from collections import namedtuple
+
+from cache import LRUCache
+
+# counts: ((symbol, count), ...) in first-seen order; charge: net ionic charge
+ParsedFormula = namedtuple('ParsedFormula', 'counts charge')
+
+OPENING = {'(': ')', '[': ']', '{': '}'}
+CLOSING = ')]}'
+HYDRATE = '·•.*'
+# One scan splits a formula into tokens: element + count, opening bracket,
+# closing bracket + count, hydrate separator + multiplier, a bare number (the
+# leading multiplier) and a charge. Anything else is left out, which the
+# parser detects by comparing the joined tokens with the formula.
+SCAN = re.compile(r'[A-Z][a-z]?\d*|[(\[{]|[)\]}]\d*|[·•.*]\d*|\d+|\^\d*[+-]\d*|[+-]+')
+NAME = re.compile(r'(\D+)(\d*)')
+CHARGE = re.compile(r'\^(\d*)([+-])(\d*)')
+# Token kinds
+ELEMENT, OPEN, CLOSE, PART = range(4)
+# Counts up to this are looked up in the token table; larger ones are parsed
+TABLE_COUNT = 24
+# Largest count, multiplier or charge accepted; far above any real compound
+MAX_COUNT = 99999
+MAX_DIGITS = len(str(MAX_COUNT))
+SUBSCRIPTS = str.maketrans('₀₁₂₃₄₅₆₇₈₉', '0123456789')
+SUPERSCRIPTS = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻', '0123456789+-')
+SUPERSCRIPT_RUN = re.compile('[⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻]+')
+SCRIPT = re.compile('[₀₁₂₃₄₅₆₇₈₉⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻]')
+
+
+class FormulaError(ValueError):
+    """Raised for formulas that cannot be parsed"""
+
+
+class FormulaParser:
+    """Parses formulas like 'Ca(OH)2·2H2O' or 'SO4^2-' into element counts.
+
+    Handles nested (), [] and {} groups, hydrate dots with a leading
+    multiplier, and a trailing charge ('^2-', '2+' after '^', or bare
+    '+'/'-' signs). Unicode subscript digits and superscript charges such as
+    'SO₄²⁻' are accepted. Results are cached by formula string.
+    """
+
+    def __init__(self, symbols, cache_size=65536):
+        self.symbols = frozenset(symbols)
+        self.cache = LRUCache(cache_size)
+        self.tokens = _token_table(self.symbols)
+
+    def parse(self, formula):
+        """Return the ParsedFormula for `formula`, raising FormulaError if invalid"""
+        if not isinstance(formula, str):
+            raise FormulaError('Formula must be a string')
+        if not self.cache.maxsize:
+            return self._parse(formula)
+        result = self.cache.get(formula)
+        if result is None:
+            result = self._parse(formula)
+            self.cache.put(formula, result)
+        return result
+
+    def _parse(self, formula):
+        text = formula
+        if not text.isascii() and SCRIPT.search(text):
+            text = _normalize(text)
+        text = text.strip()
+        if not text:
+            raise FormulaError('Formula is empty')
+        scanned = SCAN.findall(text)
+        if ''.join(scanned) != text:
+            if any(c.isspace() for c in text):
+                raise FormulaError(f"Whitespace inside formula '{formula}'")
+            raise FormulaError(f"Malformed formula '{formula}'")
+        # A leading multiplier and a trailing charge are only allowed at the ends
+        leading = scanned[0] if scanned[0][0].isdigit() else ''
+        ion = scanned[-1] if scanned[-1][0] in '^+-' else ''
+        body = scanned[bool(leading):len(scanned) - bool(ion)]
+        if not body:
+            raise FormulaError(f"Malformed formula '{formula}'")
+
+        tokens = self.tokens
+        totals = {}
+        counts = {}
+        stack = []  # (enclosing counts, expected closing bracket)
+        part_multiplier = _count(leading, formula)
+
+        for token in body:
+            kind, value, count = tokens.get(token) or self._token(token, formula)
+            if not kind:  # ELEMENT
+                counts[value] = counts.get(value, 0) + count
+            elif kind == OPEN:
+                stack.append((counts, value))
+                counts = {}
+            elif kind == CLOSE:
+                if not stack or stack[-1][1] != value:
+                    raise FormulaError(f"Unbalanced '{value}' in '{formula}'")
+                if not counts:
+                    raise FormulaError(f"Empty group in '{formula}'")
+                group = counts
+                counts = stack.pop()[0]
+                for symbol, n in group.items():
+                    counts[symbol] = counts.get(symbol, 0) + n * count
+            else:
+                # Hydrate separator: fold the finished part into the totals
+                if stack:
+                    raise FormulaError(f"Unclosed group in '{formula}'")
+                _add_part(totals, counts, part_multiplier, formula)
+                counts = {}
+                part_multiplier = count
+
+        if stack:
+            raise FormulaError(f"Unclosed group in '{formula}'")
+        if totals or part_multiplier != 1 or not counts:
+            _add_part(totals, counts, part_multiplier, formula)
+            counts = totals
+        return ParsedFormula(tuple(counts.items()), _parse_charge(ion, formula) if ion else 0)
+
+    def _token(self, token, formula):
+        """(kind, value, count) for a body token missing from the token table"""
+        if token[0].isdigit() or token[0] in '^+-':
+            raise FormulaError(f"Malformed formula '{formula}'")
+        name, number = NAME.fullmatch(token).groups()
+        count = _count(number, formula)
+        if name in self.symbols:
+            return ELEMENT, name, count
+        if name in CLOSING:
+            return CLOSE, name, count
+        if name in HYDRATE:
+            return PART, name, count
+        raise FormulaError(f"Unknown element '{name}' in '{formula}'")
+
+
+def _token_table(symbols):
+    """(kind, value, count) for every body token with a count up to TABLE_COUNT.
+
+    An opening bracket's value is the bracket that closes it.
+    """
+    table = {opening: (OPEN, closing, 1) for opening, closing in OPENING.items()}
+    for count in range(1, TABLE_COUNT + 1):
+        for suffix in ('', '1') if count == 1 else (str(count),):
+            table.update((symbol + suffix, (ELEMENT, symbol, count)) for symbol in symbols)
+            table.update((closing + suffix, (CLOSE, closing, count)) for closing in CLOSING)
+            table.update((separator + suffix, (PART, separator, count)) for separator in HYDRATE)
+    return table
+
+
+def _count(number, formula):
+    """A count or multiplier: 1 when omitted, never zero and at most MAX_COUNT"""
+    if not number:
+        return 1
+    # Long digit runs are rejected before int(), which refuses very long ones
+    count = int(number) if len(number) <= MAX_DIGITS else MAX_COUNT + 1
+    if count > MAX_COUNT:
+        raise FormulaError(f"Count {number} exceeds {MAX_COUNT} in '{formula}'")
+    if count == 0:
+        raise FormulaError(f"Zero count in '{formula}'")
+    return count
+
+
+def _add_part(totals, counts, multiplier, formula):
+    if not counts:
+        raise FormulaError(f"Empty formula part in '{formula}'")
+    for symbol, count in counts.items():
+        totals[symbol] = totals.get(symbol, 0) + count * multiplier
+
+
+def _parse_charge(ion, formula):
+    """Charge for '^2-', '^-2', '^+', '+', '--' ..."""
+    if ion[0] != '^':
+        if ion.count(ion[0]) != len(ion):
+            raise FormulaError(f"Mixed charge signs in '{formula}'")
+        return len(ion) * (1 if ion[0] == '+' else -1)
+    before, sign, after = CHARGE.fullmatch(ion).groups()
+    if before and after:
+        raise FormulaError(f"Malformed charge in '{formula}'")
+    magnitude = _count(before or after, formula)
+    return magnitude if sign == '+' else -magnitude
+
+
+def _normalize(formula):
+    """Unicode subscripts become digits; a superscript run becomes a '^' charge"""
+    formula = SUPERSCRIPT_RUN.sub(lambda m: '^' + m.group().translate(SUPERSCRIPTS), formula)
+    return formula.translate(SUBSCRIPTS)
+
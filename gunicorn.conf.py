@@ -0,0 +1,52 @@
+"""Gunicorn settings for running ChemCraft in production"""
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+from metrics import retire
+
+# App factory; with preload_app it runs once in the master, which loads every dataset
+wsgi_app = 'app:create_app()'
+
+# Workers share request metrics through files in this directory
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'chemcraft-metrics'))
+os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Mixing and quiz generation are CPU-bound Python, so scale with processes;
+# a few threads per worker cover slow clients and keep-alive connections.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Load datasets and indexes once in the master, then fork
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+max_requests = 10000
+max_requests_jitter = 1000
+
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+accesslog = '-' if os.environ.get('GUNICORN_ACCESS_LOG') else None
+
+
+def on_starting(server):
+    # Drop totals left behind by a previous run of the server
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], 'metrics-*.json')):
+        os.remove(path)
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far into the permanent generation so the
+    # cyclic GC in workers does not touch (and copy) the shared pages
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # In the master, once the worker is reaped (and so has written its final
+    # totals on exit): fold them into the shared aggregate so restarted
+    # workers do not leave files behind
+    retire(os.environ['METRICS_DIR'], worker.pid)
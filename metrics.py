@@ -0,0 +1,296 @@
+"""Low-overhead request metrics with Prometheus text exposition.
+
+Each thread records into its own dictionaries, so the hot path takes no
+locks; readers sum the per-thread stores when /metrics is scraped. With
+METRICS_DIR set, every process periodically writes its totals to
+METRICS_DIR/metrics-<pid>.json and a scrape merges all of them, so the
+numbers are correct across gunicorn workers. A worker writes its file once
+more as it exits, and the master then folds it into metrics-retired.json
+(see retire()), so restarted workers neither lose counts nor leave files.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+FLUSH_INTERVAL = 5.0
+RETIRED_FILE = 'metrics-retired.json'
+# Ids of the most recently retired snapshots kept in the aggregate
+RETIRED_IDS = 256
+
+
+class _ThreadStore:
+    """Counters owned by a single thread"""
+
+    __slots__ = ('requests', 'errors', 'latency', 'size', 'counters')
+
+    def __init__(self):
+        self.requests = {}   # (endpoint, method, status) -> count
+        self.errors = {}     # endpoint -> count
+        self.latency = {}    # endpoint -> bucket counts + [sum]
+        self.size = {}       # endpoint -> bucket counts + [sum]
+        self.counters = {}   # (name, label name, label value) -> count
+
+
+def _observe(histograms, key, buckets, value):
+    hist = histograms.get(key)
+    if hist is None:
+        hist = histograms[key] = [0] * (len(buckets) + 2)
+    hist[bisect_left(buckets, value)] += 1
+    hist[-1] += value
+
+
+class Metrics:
+    """Per-process registry of request metrics"""
+
+    def __init__(self, enabled=True, directory=None):
+        self.enabled = enabled
+        self.directory = directory
+        self._local = threading.local()
+        self._stores = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._id = _snapshot_id()
+        self._flusher = None
+
+    def _store(self):
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            if os.getpid() != self._pid:
+                self._after_fork()
+            store = self._local.store = _ThreadStore()
+            with self._lock:
+                self._stores.append(store)
+            if self.directory and self._flusher is None:
+                self._start_flusher()
+        return store
+
+    def _after_fork(self):
+        # Counts recorded before fork belong to the parent process
+        with self._lock:
+            self._pid = os.getpid()
+            self._id = _snapshot_id()
+            self._stores = []
+            self._flusher = None
+            self._local = threading.local()
+
+    def observe_request(self, endpoint, method, status, seconds, size=None):
+        """Record one finished request"""
+        if not self.enabled:
+            return
+        store = self._store()
+        key = (endpoint, method, status)
+        store.requests[key] = store.requests.get(key, 0) + 1
+        if status >= 500:
+            store.errors[endpoint] = store.errors.get(endpoint, 0) + 1
+        _observe(store.latency, endpoint, LATENCY_BUCKETS, seconds)
+        if size is not None:
+            _observe(store.size, endpoint, SIZE_BUCKETS, size)
+
+    def inc(self, name, label_name, label_value, amount=1):
+        """Increment a labelled counter, e.g. inc('mix_results', 'match_type', 'exact')"""
+        if not self.enabled:
+            return
+        store = self._store()
+        key = (name, label_name, label_value)
+        store.counters[key] = store.counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """Totals for this process as plain JSON-serializable lists"""
+        with self._lock:
+            stores = list(self._stores)
+        totals = _Totals()
+        for store in stores:
+            totals.add(store.requests, store.errors, store.counters, store.latency, store.size)
+        return totals.snapshot()
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR"""
+        if not self.directory:
+            return
+        if os.getpid() != self._pid:
+            self._after_fork()
+        snapshot = self.snapshot()
+        snapshot['id'] = self._id
+        with self._flush_lock:
+            _write(os.path.join(self.directory, f"metrics-{self._pid}.json"), snapshot)
+
+    def _start_flusher(self):
+        def run():
+            while True:
+                time.sleep(FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+                self._flusher.start()
+                # Runs after the interpreter has joined the request threads,
+                # so requests still finishing when the worker exits are kept
+                atexit.register(self._final_flush)
+
+    def _final_flush(self):
+        if os.getpid() == self._pid:
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def collect(self):
+        """Snapshots from every process (just this one without METRICS_DIR)"""
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.startswith('metrics-') and name.endswith('.json') and name != RETIRED_FILE:
+                try:
+                    snapshots.append(_read(os.path.join(self.directory, name)))
+                except (OSError, ValueError):
+                    # Including files retired since the listing: the
+                    # aggregate, read last, already holds their counts
+                    continue
+        retired = _read_retired(self.directory)
+        merged = set(retired['merged'])
+        return [retired] + [snap for snap in snapshots if snap.get('id') not in merged]
+
+    def render(self, namespace='chemcraft'):
+        """All metrics in the Prometheus text exposition format"""
+        totals = _Totals()
+        for snap in self.collect():
+            totals.add_snapshot(snap)
+        requests, errors, counters = totals.requests, totals.errors, totals.counters
+        latency, size = totals.latency, totals.size
+
+        lines = []
+        name = f"{namespace}_http_requests_total"
+        lines += [f"# HELP {name} HTTP requests by endpoint, method and status.",
+                  f"# TYPE {name} counter"]
+        for (endpoint, method, status), value in sorted(requests.items()):
+            lines.append(f'{name}{{endpoint="{endpoint}",method="{method}",status="{status}"}} {value}')
+
+        name = f"{namespace}_http_request_errors_total"
+        lines += [f"# HELP {name} HTTP requests that ended in a 5xx response.",
+                  f"# TYPE {name} counter"]
+        for endpoint, value in sorted(errors.items()):
+            lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+        lines += _render_histogram(f"{namespace}_http_request_duration_seconds",
+                                   'Request latency in seconds.', LATENCY_BUCKETS, latency)
+        lines += _render_histogram(f"{namespace}_http_response_size_bytes",
+                                   'Response body size in bytes.', SIZE_BUCKETS, size)
+
+        by_name = {}
+        for (counter, label_name, label_value), value in counters.items():
+            by_name.setdefault(counter, []).append((label_name, label_value, value))
+        for counter, values in sorted(by_name.items()):
+            name = f"{namespace}_{counter}_total"
+            lines += [f"# TYPE {name} counter"]
+            for label_name, label_value, value in sorted(values):
+                lines.append(f'{name}{{{label_name}="{label_value}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Totals:
+    """Sums of the counters and histograms of several stores or snapshots"""
+
+    def __init__(self):
+        self.requests, self.errors, self.counters = {}, {}, {}
+        self.latency, self.size = {}, {}
+
+    def add(self, requests, errors, counters, latency, size):
+        for target, source in ((self.requests, requests), (self.errors, errors), (self.counters, counters)):
+            for key, value in list(source.items()):
+                target[key] = target.get(key, 0) + value
+        for target, source in ((self.latency, latency), (self.size, size)):
+            for key, hist in list(source.items()):
+                merged = target.setdefault(key, [0] * len(hist))
+                for i, v in enumerate(hist):
+                    merged[i] += v
+
+    def add_snapshot(self, snap):
+        self.add({tuple(key): value for *key, value in snap['requests']},
+                 dict(snap['errors']),
+                 {tuple(key): value for *key, value in snap['counters']},
+                 dict(snap['latency']), dict(snap['size']))
+
+    def snapshot(self):
+        return {
+            'requests': [[*k, v] for k, v in self.requests.items()],
+            'errors': [[k, v] for k, v in self.errors.items()],
+            'counters': [[*k, v] for k, v in self.counters.items()],
+            'latency': [[k, v] for k, v in self.latency.items()],
+            'size': [[k, v] for k, v in self.size.items()],
+        }
+
+
+def retire(directory, pid):
+    """Fold a dead process's totals into METRICS_DIR/metrics-retired.json and delete its file.
+
+    The gunicorn master calls this once it has reaped a worker, before the
+    pid can be handed to a new process. The aggregate remembers the ids of
+    the snapshots merged into it and collect() skips files with those ids,
+    so a scrape racing the merge does not count the worker twice.
+    """
+    path = os.path.join(directory, f"metrics-{pid}.json")
+    try:
+        snap = _read(path)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        snap = None
+    if snap is not None:
+        retired = _read_retired(directory)
+        totals = _Totals()
+        totals.add_snapshot(retired)
+        totals.add_snapshot(snap)
+        aggregate = totals.snapshot()
+        aggregate['merged'] = (retired['merged'] + [snap.get('id')])[-RETIRED_IDS:]
+        _write(os.path.join(directory, RETIRED_FILE), aggregate)
+    os.remove(path)
+
+
+def _snapshot_id():
+    return f"{os.getpid()}-{os.urandom(4).hex()}"
+
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _read_retired(directory):
+    try:
+        return _read(os.path.join(directory, RETIRED_FILE))
+    except (OSError, ValueError):
+        return {**_Totals().snapshot(), 'merged': []}
+
+
+def _write(path, snapshot):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def _render_histogram(name, help_text, buckets, histograms):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for endpoint, hist in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(buckets, hist):
+            cumulative += count
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+        cumulative += hist[len(buckets)]
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {hist[-1]}')
+        lines.append(f'{name}_count{{endpoint="{endpoint}"}} {cumulative}')
+    return lines
@@ -0,0 +1,270 @@
+"""Precomputed /api/mix results for small compositions, in a memory-mapped table.
+
+The set of compositions people can mix is bounded: 118 elements, a few of
+each. build_table() enumerates every 1- and 2-element composition up to a
+count limit (and 3-element ones up to their own, usually smaller, limit),
+generates each result across a process pool and writes:
+
+    header | keys | offsets | dictionary | blobs
+
+Keys are sorted 64-bit composition keys (composition_key), offsets point
+into the blobs (record count + 1 entries), and each blob is the result's
+compact JSON compressed with zlib against a shared preset dictionary of
+sample results, which brings a typical result from ~650 to ~85 bytes.
+
+MixTable maps the file with mmap: opening costs the same whatever its size,
+a lookup is one bisect over the keys plus one small decompression, and
+worker processes forked after loading share the pages.
+"""
+import hashlib
+import json
+import mmap
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import combinations, islice, product
+from multiprocessing import Pool
+
+MAGIC = b'MIXTAB01'
+VERSION = 1
+MAX_NUMBER = (1 << 7) - 1
+MAX_COUNT = (1 << 8) - 1
+MAX_ELEMENTS = 3
+DICTIONARY_SIZE = 8192
+DICTIONARY_SAMPLES = 200
+CHUNK_SIZE = 1000
+COPY_SIZE = 1 << 16
+
+# Section name -> array typecode, in file order
+SECTIONS = (
+    ('keys', 'Q'),
+    ('offsets', 'Q'),       # record count + 1 entries
+    ('dictionary', 'B'),
+    ('blobs', 'B'),
+)
+# magic, version, byte order, record count, fingerprint of the data and code that made the results
+HEADER = struct.Struct('<8sIcxxxI16s')
+SECTION_ENTRY = struct.Struct('<QQ')  # offset, byte length
+HEADER_SIZE = HEADER.size + SECTION_ENTRY.size * len(SECTIONS)
+
+
+class MixTableError(ValueError):
+    """Raised for missing, damaged or stale mix tables"""
+
+
+def composition_key(pairs):
+    """64-bit key of (atomic number, count) pairs, or None if the table cannot hold them.
+
+    Atomic numbers (7 bits each, ascending) come first and counts (8 bits
+    each) after, so keys sort in the order enumerate_compositions() yields
+    them: by element count, then elements, then counts.
+    """
+    if not 0 < len(pairs) <= MAX_ELEMENTS:
+        return None
+    key = 0
+    for number, count in sorted(pairs):
+        if not (0 < number <= MAX_NUMBER and 0 < count <= MAX_COUNT):
+            return None
+        key = key << 7 | number
+    for _, count in sorted(pairs):
+        key = key << 8 | count
+    return key
+
+
+def enumerate_compositions(numbers, max_counts):
+    """Every composition as sorted (atomic number, count) pairs, in key order.
+
+    max_counts[k - 1] caps the count of each element in k-element
+    compositions; a limit of 0 leaves that size out.
+    """
+    numbers = sorted(numbers)
+    for size, limit in enumerate(max_counts, 1):
+        if limit < 1:
+            continue
+        for chosen in combinations(numbers, size):
+            for counts in product(range(1, limit + 1), repeat=size):
+                yield tuple(zip(chosen, counts))
+
+
+def _encode(result):
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+_worker = None
+
+
+def _start_worker(generate, symbols, dictionary):
+    global _worker
+    _worker = (generate, symbols, dictionary)
+
+
+def _generate_chunk(compositions):
+    """Compressed results for a chunk of compositions, run in a pool worker"""
+    generate, symbols, dictionary = _worker
+    blobs = []
+    for pairs in compositions:
+        compressor = zlib.compressobj(9, zdict=dictionary)
+        blob = _encode(generate({symbols[number]: count for number, count in pairs}))
+        blobs.append(compressor.compress(blob) + compressor.flush())
+    return blobs
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_table(generate, symbols, max_counts, fingerprint, out, processes=None, log=None):
+    """Generate every composition's result and write a table to binary file `out`.
+
+    `generate` maps {symbol: count} to a JSON-serializable result and must be
+    picklable (a module-level function), `symbols` maps atomic numbers to
+    symbols. Returns the number of records written.
+    """
+    # Preset dictionary: the end of a run of typical results
+    rng = random.Random(0)
+    numbers = sorted(symbols)
+    samples = []
+    for _ in range(DICTIONARY_SAMPLES):
+        size = rng.choice([k for k, limit in enumerate(max_counts, 1) if limit])
+        chosen = rng.sample(numbers, size)
+        samples.append(_encode(generate({symbols[n]: rng.randint(1, max_counts[size - 1]) for n in chosen})))
+    dictionary = b''.join(samples)[-DICTIONARY_SIZE:]
+
+    keys = array('Q')
+    offsets = array('Q', [0])
+    compositions = enumerate_compositions(numbers, max_counts)
+    with tempfile.TemporaryFile() as blobs, \
+            Pool(processes, initializer=_start_worker, initargs=(generate, symbols, dictionary)) as pool:
+        batches = _chunks(compositions, CHUNK_SIZE)
+        # Compositions are enumerated again alongside, in the same (key) order
+        expected = enumerate_compositions(numbers, max_counts)
+        for batch, results in enumerate(pool.imap(_generate_chunk, batches), 1):
+            for blob, pairs in zip(results, expected):
+                key = composition_key(pairs)
+                if key is None or (keys and key <= keys[-1]):
+                    raise MixTableError(f'Cannot store composition {pairs}')
+                keys.append(key)
+                offsets.append(offsets[-1] + blobs.write(blob))
+            if log and batch % 100 == 0:
+                log(f"{len(keys):,} results generated")
+
+        columns = {'keys': keys, 'offsets': offsets, 'dictionary': array('B', dictionary)}
+        entries = []
+        offset = HEADER_SIZE
+        for name, _ in SECTIONS:
+            length = offsets[-1] if name == 'blobs' else len(columns[name]) * columns[name].itemsize
+            offset += -offset % 8
+            entries.append((offset, length))
+            offset += length
+
+        byteorder = b'L' if sys.byteorder == 'little' else b'B'
+        out.write(HEADER.pack(MAGIC, VERSION, byteorder, len(keys), fingerprint))
+        for entry in entries:
+            out.write(SECTION_ENTRY.pack(*entry))
+        position = HEADER_SIZE
+        for (name, _), (offset, length) in zip(SECTIONS, entries):
+            out.write(b'\0' * (offset - position))
+            if name == 'blobs':
+                blobs.seek(0)
+                shutil.copyfileobj(blobs, out, COPY_SIZE)
+            else:
+                columns[name].tofile(out)
+            position = offset + length
+    return len(keys)
+
+
+def build_table(path, generate, symbols, max_counts, fingerprint, processes=None, log=None):
+    """write_table() to `path`, replacing it atomically"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.mix-table-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            count = write_table(generate, symbols, max_counts, fingerprint, out, processes, log)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return count
+
+
+def generator_fingerprint(*parts):
+    """16-byte digest identifying what a table's results were generated from"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.digest()
+
+
+class MixTable:
+    """Read-only composition -> result lookups backed by a memory-mapped table"""
+
+    def __init__(self, f, expected_fingerprint=None):
+        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if len(view) < HEADER_SIZE:
+            raise MixTableError('Mix table is truncated')
+        magic, version, byteorder, count, table_fingerprint = HEADER.unpack_from(view)
+        expected = b'L' if sys.byteorder == 'little' else b'B'
+        if magic != MAGIC or version != VERSION or byteorder != expected:
+            raise MixTableError('Not a compatible mix table')
+        if expected_fingerprint is not None and table_fingerprint != expected_fingerprint:
+            raise MixTableError('Mix table was generated from different data or code')
+        self.record_count = count
+
+        self.sections = {}
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(view, HEADER.size + i * SECTION_ENTRY.size)
+            if offset + length > len(view):
+                raise MixTableError('Mix table is truncated')
+            self.sections[name] = view[offset:offset + length].cast(typecode)
+        self.keys = self.sections['keys']
+        self.dictionary = self.sections['dictionary'].tobytes()
+
+    @classmethod
+    def open(cls, path, expected_fingerprint=None):
+        with open(path, 'rb') as f:
+            return cls(f, expected_fingerprint)
+
+    def __len__(self):
+        return self.record_count
+
+    def get(self, pairs):
+        """Stored result for (atomic number, count) pairs, decoded fresh, or None"""
+        key = composition_key(pairs)
+        if key is None:
+            return None
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return None
+        offsets = self.sections['offsets']
+        blob = self.sections['blobs'][offsets[i]:offsets[i + 1]]
+        return json.loads(zlib.decompressobj(zdict=self.dictionary).decompress(blob))
+
+
+def load_table(path, expected_fingerprint, log=None):
+    """The MixTable at `path`, or None if there is none or it is unusable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        table = MixTable.open(path, expected_fingerprint)
+    except (OSError, MixTableError) as e:
+        if log:
+            log(f"Ignoring mix table {path}: {e}")
+        return None
+    if log:
+        log(f"Loaded {len(table):,} precomputed mix results from {path}")
+    return table
@@ -0,0 +1,50 @@
+"""Response bodies (JSON API payloads, rendered pages) compressed once, served with ETags"""
+import gzip
+import hashlib
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class PrecompressedJSON:
+    """Immutable response body with gzip/brotli variants and a content ETag"""
+
+    def __init__(self, body, cache_control='public, no-cache', mimetype='application/json'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.cache_control = cache_control
+        self.mimetype = mimetype
+        self.variants = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+
+    def __len__(self):
+        return len(self.body)
+
+    def _pick_encoding(self, accept_encodings):
+        best, best_size = None, len(self.body)
+        for encoding, payload in self.variants.items():
+            if accept_encodings[encoding] and len(payload) < best_size:
+                best, best_size = encoding, len(payload)
+        return best
+
+    def make_response(self, request):
+        """Build a response for `request`, honouring If-None-Match and Accept-Encoding"""
+        if request.if_none_match.contains_weak(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = self._pick_encoding(request.accept_encodings)
+            payload = self.variants[encoding] if encoding else self.body
+            response = Response(payload, mimetype=self.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
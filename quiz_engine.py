@@ -0,0 +1,120 @@
+"""Precomputed quiz question bank with constant-time distractor sampling"""
+import os
+import random
+import weakref
+
+QUESTION_TYPES = (
+    'symbol_to_name',
+    'name_to_symbol',
+    'atomic_number_to_name',
+    'category_question',
+    'property_question',
+)
+
+# 'Plasma' is never a correct answer but keeps phase questions at four choices
+PHASE_CHOICES = ('Solid', 'Liquid', 'Gas', 'Plasma')
+
+ANSWER_COUNT = 4
+
+
+def sample_excluding(rng, n, k, excluded):
+    """Pick k distinct indices from range(n) other than `excluded`.
+
+    Floyd's algorithm over n - 1 slots, shifted past the excluded index:
+    exactly k draws, no rejection loop.
+    """
+    chosen = []
+    seen = set()
+    for j in range(n - 1 - k, n - 1):
+        t = rng.randint(0, j)
+        pick = j if t in seen else t
+        seen.add(pick)
+        chosen.append(pick)
+    return [i + 1 if i >= excluded else i for i in chosen]
+
+
+# Engines without a seed; each forked process (e.g. a gunicorn worker of a
+# preloaded app) reseeds them so workers do not repeat each other's questions
+_unseeded = weakref.WeakSet()
+
+
+def _reseed_unseeded():
+    for engine in _unseeded:
+        engine.rng.seed()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_unseeded)
+
+
+class QuizEngine:
+    """Generates quiz questions from answer pools built once at startup"""
+
+    def __init__(self, elements, seed=None):
+        self.elements = tuple(elements)
+        self.rng = random.Random(seed)
+        if seed is None:
+            _unseeded.add(self)
+
+        self.names = tuple(e['name'] for e in self.elements)
+        self.symbols = tuple(e['symbol'] for e in self.elements)
+        self.categories = tuple(sorted({e['category'] for e in self.elements}))
+        self.phases = PHASE_CHOICES
+
+        # Index of each element's correct answer within the shared pools
+        category_index = {c: i for i, c in enumerate(self.categories)}
+        phase_index = {p: i for i, p in enumerate(self.phases)}
+        self.element_category = tuple(category_index[e['category']] for e in self.elements)
+        self.element_phase = tuple(phase_index.get(e['phase']) for e in self.elements)
+
+        self.explanations = tuple(
+            f"{e['name']} ({e['symbol']}) is {e['summary'][:100]}..." for e in self.elements)
+
+    def _pool(self, question_type, index):
+        """(question, pool, correct index in pool) for an element and question type"""
+        element = self.elements[index]
+        if question_type == 'symbol_to_name':
+            return (f"What is the name of the element with symbol '{element['symbol']}'?",
+                    self.names, index)
+        if question_type == 'name_to_symbol':
+            return (f"What is the chemical symbol for {element['name']}?",
+                    self.symbols, index)
+        if question_type == 'atomic_number_to_name':
+            return (f"Which element has atomic number {element['number']}?",
+                    self.names, index)
+        if question_type == 'category_question':
+            return (f"What category does {element['name']} belong to?",
+                    self.categories, self.element_category[index])
+        return (f"What is the phase of {element['name']} at room temperature?",
+                self.phases, self.element_phase[index])
+
+    def correct_answer(self, question_type, element_index):
+        """The correct answer string for a question type and element"""
+        _, pool, correct = self._pool(question_type, element_index)
+        return pool[correct]
+
+    def question(self, seed=None, question_type=None, element_index=None):
+        """Build a random question; pass `seed` for a reproducible one"""
+        rng = self.rng if seed is None else random.Random(seed)
+        if element_index is None:
+            element_index = rng.randrange(len(self.elements))
+        if question_type is None:
+            question_type = QUESTION_TYPES[rng.randrange(len(QUESTION_TYPES))]
+        if question_type == 'property_question' and self.element_phase[element_index] is None:
+            # Fallback to symbol question
+            question_type = 'name_to_symbol'
+
+        text, pool, correct = self._pool(question_type, element_index)
+        distractors = sample_excluding(rng, len(pool), min(ANSWER_COUNT - 1, len(pool) - 1), correct)
+        slot = rng.randint(0, len(distractors))
+        choices = distractors[:slot] + [correct] + distractors[slot:]
+
+        return {
+            'type': question_type,
+            'question': text,
+            'answers': [pool[i] for i in choices],
+            'correct_index': slot,
+            'element_index': element_index,
+            'element': self.elements[element_index],
+            'explanation': self.explanations[element_index],
+        }
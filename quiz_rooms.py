@@ -0,0 +1,388 @@
+"""Multiplayer quiz rooms: one question at a time for every participant, and a live leaderboard.
+
+All rooms live on a single asyncio event loop (see room_server.py), so room
+state needs no locks. Each broadcast is serialized once into a Server-Sent
+Events frame, and that same bytes object is written to every subscriber's
+transport. A subscriber whose socket cannot keep up gets a bounded backlog
+in which progress updates replace each other. One that falls further behind
+is disconnected, and it catches up from the room state when its EventSource
+reconnects.
+"""
+import asyncio
+import json
+import secrets
+import time
+from collections import deque
+
+ROOM_CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+ROOM_CODE_LENGTH = 6
+NAME_LENGTH = 24
+LEADERBOARD_SIZE = 10
+MAX_QUESTIONS = 50
+MIN_SECONDS, MAX_SECONDS = 5, 120
+
+# Points for a correct answer, plus up to SPEED_POINTS for answering early
+BASE_POINTS = 500
+SPEED_POINTS = 500
+
+# Answered counts are broadcast at most this often while a question is open
+PROGRESS_INTERVAL = 0.5
+# Buffered bytes at which a subscriber's messages are held back instead of
+# written, and held-back bytes at which it is disconnected
+HIGH_WATER = 64 * 1024
+MAX_BACKLOG = 256 * 1024
+
+HEARTBEAT = b': ping\n\n'
+
+
+class RoomError(ValueError):
+    """Raised for requests a room cannot accept; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_event(event, data):
+    """One SSE frame; compact JSON has no newlines, so a single data line carries it"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    """One open event stream, written without waiting and held back while its client lags"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.transport = writer.transport
+        self.transport.set_write_buffer_limits(high=HIGH_WATER)
+        self.backlog = deque()  # (frame, coalesce key)
+        self.backlog_bytes = 0
+        self.closed = False
+        self.dropped = False
+        self._flusher = None
+
+    def send(self, frame, key=None):
+        """Write `frame`, or queue it behind earlier frames the client has not taken yet.
+
+        A frame with a `key` supersedes any queued frame with the same key.
+        """
+        if self.closed:
+            return
+        if not self.backlog and self.transport.get_write_buffer_size() <= HIGH_WATER:
+            self.transport.write(frame)
+            return
+        if key is not None:
+            for queued in self.backlog:
+                if queued[1] == key:
+                    self.backlog.remove(queued)
+                    self.backlog_bytes -= len(queued[0])
+                    break
+        self.backlog.append((frame, key))
+        self.backlog_bytes += len(frame)
+        if self.backlog_bytes > MAX_BACKLOG:
+            self.dropped = True
+            self.close()
+        elif self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            while self.backlog and not self.closed:
+                await self.writer.drain()
+                while self.backlog and self.transport.get_write_buffer_size() <= HIGH_WATER:
+                    frame, _ = self.backlog.popleft()
+                    self.backlog_bytes -= len(frame)
+                    self.transport.write(frame)
+        except ConnectionError:
+            self.close()
+        finally:
+            self._flusher = None
+
+    @property
+    def lagging(self):
+        return bool(self.backlog)
+
+    def close(self):
+        """Disconnect at once, discarding anything still buffered"""
+        if not self.closed:
+            self.closed = True
+            self.backlog.clear()
+            self.backlog_bytes = 0
+            self.transport.abort()
+
+
+class Participant:
+    __slots__ = ('name', 'order', 'score', 'correct', 'rank')
+
+    def __init__(self, name, order):
+        self.name = name
+        self.order = order
+        self.score = 0
+        self.correct = 0
+        self.rank = None
+
+    def to_dict(self):
+        return {'name': self.name, 'score': self.score, 'correct': self.correct, 'rank': self.rank}
+
+
+class Room:
+    """A host-driven quiz for any number of participants.
+
+    Phases: 'lobby' -> 'question' -> 'reveal' -> 'question' ... -> 'finished'.
+    The host moves on with advance(); a question also closes when its time
+    is up or when every participant has answered.
+    """
+
+    def __init__(self, code, quiz, questions=10, seconds=20, max_participants=1000):
+        self.code = code
+        self.quiz = quiz
+        self.total = questions
+        self.seconds = seconds
+        self.max_participants = max_participants
+        self.host_token = secrets.token_urlsafe(16)
+        self.participants = {}  # token -> Participant
+        self.subscribers = set()
+        self.phase = 'lobby'
+        self.number = 0
+        self.question = None  # QuizEngine question being asked or just revealed
+        self.answers = {}  # token -> (answer index, seconds taken) for the current question
+        self.answer_counts = []
+        self.opened_at = None
+        self.reveal = None
+        self.leaderboard = []
+        self.last_active = time.monotonic()
+        self.frames_sent = 0
+        self.dropped_subscribers = 0
+        self._close_timer = None
+        self._progress_timer = None
+        self._state = None  # cached 'state' frame between questions, cleared whenever the state changes
+
+    def check_host(self, token):
+        if not isinstance(token, str) or not secrets.compare_digest(token, self.host_token):
+            raise RoomError('Only the host can do that', 403)
+
+    def participant(self, token):
+        participant = self.participants.get(token) if isinstance(token, str) else None
+        if participant is None:
+            raise RoomError('Unknown participant token', 403)
+        return participant
+
+    # Broadcasting
+
+    def broadcast(self, event, data, key=None):
+        frame = encode_event(event, data)
+        for subscriber in self.subscribers:
+            subscriber.send(frame, key)
+        self.frames_sent += len(self.subscribers)
+        self._state = None
+
+    def subscribe(self, subscriber):
+        self.subscribers.add(subscriber)
+        state = self._state
+        if state is None:
+            state = encode_event('state', self.status())
+            # An open question's remaining time keeps changing, so that state is not kept
+            if self.phase != 'question':
+                self._state = state
+        subscriber.send(state)
+        self.frames_sent += 1
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        self.dropped_subscribers += subscriber.dropped
+
+    def _schedule_progress(self):
+        self._state = None
+        if self._progress_timer is None:
+            self._progress_timer = asyncio.get_running_loop().call_later(PROGRESS_INTERVAL, self._send_progress)
+
+    def _send_progress(self):
+        self._progress_timer = None
+        self.broadcast('progress', {'number': self.number, 'answered': len(self.answers),
+                                    'participants': len(self.participants)}, key='progress')
+
+    # Views
+
+    def public_question(self):
+        remaining = max(0.0, self.seconds - (time.monotonic() - self.opened_at))
+        return {'number': self.number, 'total': self.total, 'question': self.question['question'],
+                'answers': self.question['answers'], 'seconds': self.seconds,
+                'remaining': round(remaining, 1)}
+
+    def status(self):
+        return {
+            'room': self.code,
+            'phase': self.phase,
+            'number': self.number,
+            'total': self.total,
+            'participants': len(self.participants),
+            'answered': len(self.answers),
+            'question': self.public_question() if self.phase == 'question' else None,
+            'reveal': self.reveal if self.phase != 'question' else None,
+            'leaderboard': self.leaderboard,
+        }
+
+    # Participants
+
+    def join(self, name):
+        """Add a participant; returns their token"""
+        if self.phase == 'finished':
+            raise RoomError('This quiz has finished', 409)
+        if len(self.participants) >= self.max_participants:
+            raise RoomError('This room is full', 409)
+        name = ' '.join(str(name or '').split())[:NAME_LENGTH]
+        if not name:
+            raise RoomError('A name is required')
+        token = secrets.token_urlsafe(16)
+        self.participants[token] = Participant(name, len(self.participants))
+        self.last_active = time.monotonic()
+        self._schedule_progress()
+        return token
+
+    def answer(self, token, number, answer_index):
+        """Record a participant's answer to the open question"""
+        self.participant(token)
+        if self.phase != 'question' or number != self.number:
+            raise RoomError('That question is not open', 409)
+        if token in self.answers:
+            raise RoomError('Already answered', 409)
+        if not isinstance(answer_index, int) or isinstance(answer_index, bool) \
+                or not 0 <= answer_index < len(self.answer_counts):
+            raise RoomError('answer_index must be one of the answer positions')
+        self.answers[token] = (answer_index, time.monotonic() - self.opened_at)
+        self.answer_counts[answer_index] += 1
+        self.last_active = time.monotonic()
+        if len(self.answers) == len(self.participants):
+            self.close_question()
+        else:
+            self._schedule_progress()
+
+    # Host actions
+
+    def advance(self):
+        """Reveal the open question, or ask the next one"""
+        if self.phase == 'question':
+            self.close_question()
+        elif self.phase == 'finished':
+            raise RoomError('This quiz has finished', 409)
+        else:
+            self.open_question()
+        self.last_active = time.monotonic()
+
+    def open_question(self):
+        self.number += 1
+        self.question = self.quiz.question()
+        self.answers = {}
+        self.answer_counts = [0] * len(self.question['answers'])
+        self.opened_at = time.monotonic()
+        self.phase = 'question'
+        self._close_timer = asyncio.get_running_loop().call_later(self.seconds, self.close_question)
+        self.broadcast('question', self.public_question())
+
+    def close_question(self):
+        if self.phase != 'question':
+            return
+        if self._close_timer is not None:
+            self._close_timer.cancel()
+            self._close_timer = None
+        if self._progress_timer is not None:
+            self._progress_timer.cancel()
+            self._progress_timer = None
+
+        correct = self.question['correct_index']
+        for token, (answer_index, taken) in self.answers.items():
+            if answer_index == correct:
+                participant = self.participants[token]
+                participant.correct += 1
+                participant.score += BASE_POINTS + round(SPEED_POINTS * max(0.0, 1 - taken / self.seconds))
+        self._rank()
+
+        self.phase = 'reveal' if self.number < self.total else 'finished'
+        self.reveal = {
+            'number': self.number,
+            'correct_index': correct,
+            'correct_answer': self.question['answers'][correct],
+            'explanation': self.question['explanation'],
+            'answer_counts': self.answer_counts,
+            'answered': len(self.answers),
+            'participants': len(self.participants),
+            'leaderboard': self.leaderboard,
+        }
+        self.broadcast('reveal', self.reveal)
+        if self.phase == 'finished':
+            self.broadcast('finished', {'leaderboard': self.leaderboard})
+
+    def _rank(self):
+        """Rank everyone once per question so score lookups are constant time; ties share a rank"""
+        ranked = sorted(self.participants.values(), key=lambda p: (-p.score, p.order))
+        previous = None
+        for position, participant in enumerate(ranked, 1):
+            if participant.score != previous:
+                rank, previous = position, participant.score
+            participant.rank = rank
+        self.leaderboard = [p.to_dict() for p in ranked[:LEADERBOARD_SIZE]]
+
+    def close(self):
+        for timer in (self._close_timer, self._progress_timer):
+            if timer is not None:
+                timer.cancel()
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        self.subscribers.clear()
+
+
+class RoomHub:
+    """Every room on the event loop, with creation limits and expiry of idle rooms"""
+
+    def __init__(self, quiz, max_rooms=500, max_participants=1000, room_ttl=4 * 3600):
+        self.quiz = quiz
+        self.max_rooms = max_rooms
+        self.max_participants = max_participants
+        self.room_ttl = room_ttl
+        self.rooms = {}
+
+    def create(self, questions=10, seconds=20):
+        if len(self.rooms) >= self.max_rooms:
+            self.expire()
+            if len(self.rooms) >= self.max_rooms:
+                raise RoomError('Too many open rooms', 503)
+        if not isinstance(questions, int) or not 1 <= questions <= MAX_QUESTIONS:
+            raise RoomError(f'questions must be between 1 and {MAX_QUESTIONS}')
+        if not isinstance(seconds, (int, float)) or not MIN_SECONDS <= seconds <= MAX_SECONDS:
+            raise RoomError(f'seconds must be between {MIN_SECONDS} and {MAX_SECONDS}')
+        code = None
+        while code is None or code in self.rooms:
+            code = ''.join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+        room = self.rooms[code] = Room(code, self.quiz, questions, seconds, self.max_participants)
+        return room
+
+    def get(self, code):
+        room = self.rooms.get(code.upper())
+        if room is None:
+            raise RoomError('Room not found', 404)
+        return room
+
+    def expire(self):
+        """Close rooms nobody has used for room_ttl seconds"""
+        cutoff = time.monotonic() - self.room_ttl
+        for code, room in list(self.rooms.items()):
+            if room.last_active < cutoff:
+                room.close()
+                del self.rooms[code]
+
+    def heartbeat(self):
+        """Comment frame to every stream so proxies do not time idle ones out"""
+        for room in self.rooms.values():
+            for subscriber in room.subscribers:
+                subscriber.send(HEARTBEAT, key='heartbeat')
+
+    def stats(self):
+        subscribers = [s for room in self.rooms.values() for s in room.subscribers]
+        return {
+            'rooms': len(self.rooms),
+            'participants': sum(len(room.participants) for room in self.rooms.values()),
+            'subscribers': len(subscribers),
+            'lagging_subscribers': sum(s.lagging for s in subscribers),
+            'dropped_subscribers': sum(room.dropped_subscribers for room in self.rooms.values()),
+            'frames_sent': sum(room.frames_sent for room in self.rooms.values()),
+        }
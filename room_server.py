@@ -0,0 +1,246 @@
+"""Asyncio HTTP server for multiplayer quiz rooms, streamed to clients as Server-Sent Events.
+
+Usage: python room_server.py [--host 0.0.0.0] [--port 5001]
+
+Runs beside the Flask app rather than inside it. A single process holds
+every room, so all of a room's participants share one state no matter how
+many gunicorn workers serve the rest of the site. The open event streams
+are sockets on one event loop rather than one thread each. Route /rooms to
+it from the reverse proxy in front of the app (with response buffering off),
+or let browsers call it directly; CORS allows ROOMS_ALLOW_ORIGIN.
+
+    POST /rooms                   {"questions": 10, "seconds": 20} -> room code and host token
+    GET  /rooms/<code>            phase, current question and leaderboard
+    POST /rooms/<code>/join       {"name": "Ada"} -> participant token
+    GET  /rooms/<code>/events     text/event-stream of state, question, progress, reveal, finished
+    POST /rooms/<code>/answer     {"token": ..., "question": 1, "answer_index": 2}
+    GET  /rooms/<code>/me?token=  a participant's score, correct answers and rank
+    POST /rooms/<code>/next       {"host_token": ...}: reveal the open question or ask the next
+    GET  /health
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import signal
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from quiz_engine import QuizEngine
+from quiz_rooms import RoomError, RoomHub, Subscriber
+
+logger = logging.getLogger('room_server')
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'elements.json')
+ALLOW_ORIGIN = os.environ.get('ROOMS_ALLOW_ORIGIN', '*')
+# Seconds between keep-alive comments on idle event streams
+HEARTBEAT_INTERVAL = 15
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 16 * 1024
+
+ROUTE = re.compile(r'^/rooms(?:/([A-Za-z0-9]+)(?:/(join|events|answer|me|next))?)?/?$')
+
+CORS_HEADERS = (f"Access-Control-Allow-Origin: {ALLOW_ORIGIN}\r\n"
+                "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+                "Access-Control-Allow-Headers: Content-Type\r\n")
+# No length: the stream runs until either side closes it
+EVENT_STREAM_HEADERS = ("HTTP/1.1 200 OK\r\n"
+                        "Content-Type: text/event-stream\r\n"
+                        "Cache-Control: no-cache\r\n"
+                        "X-Accel-Buffering: no\r\n"
+                        f"{CORS_HEADERS}\r\n"
+                        "retry: 2000\n\n").encode('latin-1')
+
+
+def load_quiz(path=ELEMENTS_FILE, seed=None):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return QuizEngine(data['elements'] if isinstance(data, dict) else data, seed=seed)
+
+
+def response(status, payload, keep_alive=True):
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8') if payload is not None else b''
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"{CORS_HEADERS}"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def read_request(reader):
+    """(method, path, query, headers, body) of the next request, or None once the client is done"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise RoomError('Request headers too large', 431)
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise RoomError('Malformed request line')
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise RoomError('Invalid Content-Length')
+    if not 0 <= length <= MAX_BODY_SIZE:
+        raise RoomError('Request body too large', 413)
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), headers, body
+
+
+def json_body(body):
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        raise RoomError('Request body must be JSON')
+    if not isinstance(data, dict):
+        raise RoomError('Request body must be a JSON object')
+    return data
+
+
+class RoomServer:
+    """Routes HTTP requests on each connection to a RoomHub"""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.connections = {}  # writer -> task handling it
+
+    async def handle(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RoomError as e:
+                    writer.write(response(e.status, {'error': str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    result = self.dispatch(method, path, query, body)
+                except RoomError as e:
+                    result = e.status, {'error': str(e)}
+                if not isinstance(result, tuple):
+                    await self.stream_events(result, reader, writer)
+                    break
+                writer.write(response(*result, keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+    async def close(self):
+        """Drop every open connection and wait for its handler to finish"""
+        tasks = list(self.connections.values())
+        for writer in list(self.connections):
+            writer.transport.abort()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def dispatch(self, method, path, query, body):
+        """(status, payload) for a request, or the Room whose events to stream"""
+        if method == 'OPTIONS':
+            return 204, None
+        if path == '/health':
+            return 200, {'status': 'healthy', **self.hub.stats()}
+        match = ROUTE.match(path)
+        if match is None:
+            raise RoomError('Not found', 404)
+        code, action = match.groups()
+        expected = 'GET' if action in ('events', 'me') or (code and not action) else 'POST'
+        if method != expected:
+            raise RoomError('Method not allowed', 405)
+
+        if code is None:
+            data = json_body(body)
+            room = self.hub.create(data.get('questions', 10), data.get('seconds', 20))
+            logger.info(f"Room {room.code} created ({room.total} questions, {room.seconds}s each)")
+            return 201, {'room': room.code, 'host_token': room.host_token}
+
+        room = self.hub.get(code)
+        if action is None:
+            return 200, room.status()
+        if action == 'events':
+            return room
+        if action == 'me':
+            return 200, room.participant(query.get('token', [None])[0]).to_dict()
+
+        data = json_body(body)
+        if action == 'join':
+            token = room.join(data.get('name'))
+            return 201, {'room': room.code, 'token': token}
+        if action == 'answer':
+            room.answer(data.get('token'), data.get('question'), data.get('answer_index'))
+            return 200, {'accepted': True}
+        room.check_host(data.get('host_token'))
+        room.advance()
+        return 200, {'phase': room.phase, 'number': room.number, 'total': room.total}
+
+    async def stream_events(self, room, reader, writer):
+        writer.write(EVENT_STREAM_HEADERS)
+        subscriber = Subscriber(writer)
+        room.subscribe(subscriber)
+        try:
+            # Clients send nothing more; wait until they go
+            while await reader.read(1024):
+                pass
+        finally:
+            room.unsubscribe(subscriber)
+            subscriber.close()
+
+
+async def heartbeat(hub):
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        hub.heartbeat()
+        hub.expire()
+
+
+async def serve(host, port, hub):
+    room_server = RoomServer(hub)
+    server = await asyncio.start_server(room_server.handle, host, port,
+                                        limit=MAX_HEADER_SIZE, backlog=2048)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    pulse = loop.create_task(heartbeat(hub))
+    logger.info(f"Quiz rooms listening on {', '.join(str(s.getsockname()[:2]) for s in server.sockets)}")
+    async with server:
+        await stopping.wait()
+        pulse.cancel()
+        await room_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve multiplayer quiz rooms over Server-Sent Events')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('ROOMS_PORT', 5001)))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+    hub = RoomHub(load_quiz(seed=os.environ.get('QUIZ_SEED')),
+                  max_rooms=int(os.environ.get('ROOMS_MAX', 500)),
+                  max_participants=int(os.environ.get('ROOM_MAX_PARTICIPANTS', 1000)),
+                  room_ttl=int(os.environ.get('ROOM_TTL', 4 * 3600)))
+    asyncio.run(serve(args.host, args.port, hub))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Precomputed autocomplete index for element search"""
+from bisect import bisect_left
+
+# Rank tiers, lower is better
+EXACT_SYMBOL = 0
+EXACT_NUMBER = 1
+NUMBER_PREFIX = 2
+NAME_PREFIX = 3
+SYMBOL_PREFIX = 4
+FUZZY_NAME = 5
+
+FUZZY_MIN_LENGTH = 3
+
+
+def _deletions(word):
+    """All strings obtained by deleting exactly one character from `word`"""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a, b):
+    """True when a and b differ by at most one insertion, deletion or substitution"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class ElementSearchIndex:
+    """Sorted-key prefix index over element names, symbols and atomic numbers.
+
+    Prefix lookups are two bisects over presorted lowercase keys, so a query
+    only touches the elements it returns. Atomic numbers are indexed as
+    strings, so '1' also finds 10-19 and 100-118 (ascending). Fuzzy matching uses a deletion
+    neighbourhood table over name prefixes (edit distance 1).
+    """
+
+    def __init__(self, elements):
+        self.elements = {e['number']: e for e in elements}
+
+        name_keys = sorted((e['name'].lower(), e['number']) for e in elements)
+        symbol_keys = sorted((e['symbol'].lower(), e['number']) for e in elements)
+        number_keys = sorted((str(e['number']), e['number']) for e in elements)
+        self._names = [k for k, _ in name_keys]
+        self._name_numbers = [n for _, n in name_keys]
+        self._symbols = [k for k, _ in symbol_keys]
+        self._symbol_numbers = [n for _, n in symbol_keys]
+        self._number_keys = [k for k, _ in number_keys]
+        self._number_numbers = [n for _, n in number_keys]
+        self._exact_symbol = {e['symbol'].lower(): e['number'] for e in elements}
+        self._exact_number = {str(e['number']): e['number'] for e in elements}
+
+        # Every name prefix (and its one-character deletions) -> element numbers
+        fuzzy = {}
+        for e in elements:
+            name = e['name'].lower()
+            for end in range(FUZZY_MIN_LENGTH - 1, len(name) + 1):
+                prefix = name[:end]
+                for key in _deletions(prefix) | {prefix}:
+                    fuzzy.setdefault(key, set()).add(e['number'])
+        self._fuzzy = {k: tuple(sorted(v)) for k, v in fuzzy.items()}
+
+    def _prefix_range(self, keys, numbers, query):
+        lo = bisect_left(keys, query)
+        hi = bisect_left(keys, query + '\uffff', lo)
+        return sorted(numbers[lo:hi])
+
+    def _fuzzy_matches(self, query):
+        candidates = set()
+        for key in _deletions(query) | {query}:
+            candidates.update(self._fuzzy.get(key, ()))
+        matches = []
+        for number in sorted(candidates):
+            name = self.elements[number]['name'].lower()
+            lq = len(query)
+            if any(_within_one_edit(query, name[:end]) for end in (lq - 1, lq, lq + 1)):
+                matches.append(number)
+        return matches
+
+    def ranked(self, query, limit=10, fuzzy=False):
+        """Return up to `limit` (tier, number) pairs for `query`, best first"""
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        seen = set()
+        results = []
+
+        def take(tier, numbers):
+            for number in numbers:
+                if number not in seen:
+                    seen.add(number)
+                    results.append((tier, number))
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        if query in self._exact_symbol and take(EXACT_SYMBOL, (self._exact_symbol[query],)):
+            return results
+        if query.isdigit():
+            if query in self._exact_number and take(EXACT_NUMBER, (self._exact_number[query],)):
+                return results
+            take(NUMBER_PREFIX, self._prefix_range(self._number_keys, self._number_numbers, query))
+            return results
+        if take(NAME_PREFIX, self._prefix_range(self._names, self._name_numbers, query)):
+            return results
+        if take(SYMBOL_PREFIX, self._prefix_range(self._symbols, self._symbol_numbers, query)):
+            return results
+        if fuzzy and len(query) >= FUZZY_MIN_LENGTH:
+            take(FUZZY_NAME, self._fuzzy_matches(query))
+        return results
+
+    def search(self, query, limit=10, fuzzy=False):
+        """Return up to `limit` element records matching `query`, best first"""
+        return [self.elements[n] for _, n in self.ranked(query, limit, fuzzy)]
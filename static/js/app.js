@@ -4,16 +4,52 @@ let currentQuiz = null;
 let score = 0;
 let questionCount = 0;
 let selectedElements = [];
-let compoundsData = [];
+// Full element records by atomic number, fetched the first time one is opened
+const elementDetails = {};
 
 // Initialize the app when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
-    loadElements();
-    loadCompounds();
+    // The server renders both tables and embeds the per-cell fields, so the
+    // page is usable without waiting for /api/elements
+    const inline = document.getElementById('element-cells');
+    elementsData = inline ? JSON.parse(inline.textContent) : [];
+    if (elementsData.length > 0) {
+        bindPeriodicTables();
+    } else {
+        loadElements();
+    }
     setupEventListeners();
 });
 
-// Load elements data from API
+// Attach click handlers to the server-rendered periodic tables
+function bindPeriodicTables() {
+    const byNumber = {};
+    elementsData.forEach(element => { byNumber[element.number] = element; });
+
+    document.getElementById('periodic-table-grid').addEventListener('click', function(e) {
+        const cell = e.target.closest('.element[data-number]');
+        if (cell) openElementDetails(Number(cell.dataset.number));
+    });
+    document.getElementById('mini-periodic-table').addEventListener('click', function(e) {
+        const cell = e.target.closest('.mini-element[data-number]');
+        if (cell) selectElement(byNumber[cell.dataset.number]);
+    });
+}
+
+// Fetch an element's full record on first use, then show it
+async function openElementDetails(number) {
+    try {
+        if (!elementDetails[number]) {
+            const response = await fetch(`/api/element/${number}`);
+            elementDetails[number] = await response.json();
+        }
+        showElementDetails(elementDetails[number]);
+    } catch (error) {
+        console.error('Error loading element details:', error);
+    }
+}
+
+// Load elements data from API (fallback when the page has no inline data)
 async function loadElements() {
     try {
         console.log('Loading elements...');
@@ -41,17 +77,6 @@ async function loadElements() {
     }
 }
 
-// Load compounds data from API
-async function loadCompounds() {
-    try {
-        const response = await fetch('/api/compounds');
-        const data = await response.json();
-        compoundsData = data.compounds;
-    } catch (error) {
-        console.error('Error loading compounds:', error);
-    }
-}
-
 // Setup event listeners
 function setupEventListeners() {
     // Tab switching
@@ -378,11 +403,11 @@ function displayQuestion() {
     const answersContainer = document.getElementById('answers-container');
     answersContainer.innerHTML = '';
 
-    currentQuiz.answers.forEach(answer => {
+    currentQuiz.answers.forEach((answer, index) => {
         const button = document.createElement('button');
         button.className = 'answer-btn';
         button.textContent = answer;
-        button.addEventListener('click', () => checkAnswer(answer));
+        button.addEventListener('click', () => checkAnswer(index));
         answersContainer.appendChild(button);
     });
 
@@ -392,8 +417,33 @@ function displayQuestion() {
 }
 
 // Check quiz answer
-function checkAnswer(selectedAnswer) {
-    const isCorrect = selectedAnswer === currentQuiz.correct_answer;
+async function checkAnswer(selectedIndex) {
+    const buttons = document.querySelectorAll('.answer-btn');
+    buttons.forEach(btn => btn.disabled = true);
+
+    let result;
+    try {
+        const response = await fetch('/api/quiz/check', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                token: currentQuiz.token,
+                answer_index: selectedIndex
+            })
+        });
+        result = await response.json();
+        if (!response.ok) {
+            throw new Error(result.error || 'Unable to check answer');
+        }
+    } catch (error) {
+        console.error('Error checking answer:', error);
+        buttons.forEach(btn => btn.disabled = false);
+        return;
+    }
+
+    const isCorrect = result.correct;
     questionCount++;
 
     if (isCorrect) {
@@ -409,16 +459,15 @@ function checkAnswer(selectedAnswer) {
     feedback.className = `feedback ${isCorrect ? 'correct' : 'incorrect'}`;
     feedback.innerHTML = `
         <p>${isCorrect ? '🎉 Correct!' : '❌ Incorrect'}</p>
-        <p>The correct answer is: <strong>${currentQuiz.correct_answer}</strong></p>
-        ${currentQuiz.explanation ? `<p>${currentQuiz.explanation}</p>` : ''}
+        <p>The correct answer is: <strong>${result.correct_answer}</strong></p>
+        ${result.explanation ? `<p>${result.explanation}</p>` : ''}
     `;
 
     // Highlight answer buttons
-    document.querySelectorAll('.answer-btn').forEach(btn => {
-        btn.disabled = true;
-        if (btn.textContent === currentQuiz.correct_answer) {
+    buttons.forEach((btn, index) => {
+        if (index === result.correct_index) {
             btn.classList.add('correct');
-        } else if (btn.textContent === selectedAnswer && !isCorrect) {
+        } else if (index === selectedIndex && !isCorrect) {
             btn.classList.add('incorrect');
         }
     });
@@ -752,6 +801,7 @@ function displayCompoundResult(compound, isSuccess = true, apiResult = null) {
             <div class="compound-status ${statusClass}">${statusMessage}</div>
             ${apiResult && apiResult.note ? `<div class="educational-note">📚 ${apiResult.note}</div>` : ''}
             ${apiResult && apiResult.educational_note ? `<div class="educational-tip">💡 ${apiResult.educational_note}</div>` : ''}
+            ${apiResult && apiResult.similar && apiResult.similar.length ? `<div class="educational-tip">🔗 Similar known compounds: ${apiResult.similar.map(s => `${s.name} (${s.formula}, ${Math.round(s.similarity * 100)}%)`).join(', ')}</div>` : ''}
         </div>
 
         <div class="compound-details">
@@ -0,0 +1,37 @@
+"""Content-hashed static asset names, so assets can be cached for a year"""
+import hashlib
+import os
+
+HASH_LENGTH = 10
+
+
+class AssetManifest:
+    """Maps static files to names that embed a hash of their content.
+
+    'css/style.css' becomes 'css/style.1a2b3c4d5e.css'. A changed file gets a
+    new URL, so hashed URLs never go stale and can be served as immutable;
+    the manifest is built once at startup from the files on disk.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.hashed = {}    # original name -> hashed name
+        self.originals = {}  # hashed name -> original name
+        for root, _, files in os.walk(folder):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()[:HASH_LENGTH]
+                stem, ext = os.path.splitext(name)
+                hashed = f"{stem}.{digest}{ext}"
+                self.hashed[name] = hashed
+                self.originals[hashed] = name
+
+    def url_name(self, filename):
+        """The hashed name for `filename`, or `filename` itself if it is not an asset"""
+        return self.hashed.get(filename, filename)
+
+    def original(self, filename):
+        """The file a hashed name refers to, or None if `filename` is not hashed"""
+        return self.originals.get(filename)
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from app import create_app
+
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('METRICS_ENABLED', '0')
+    monkeypatch.setenv('COMPOUNDS_SNAPSHOT', str(tmp_path / 'compounds.snapshot'))
+    return create_app().test_client()
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from cache import LRUCache
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'  # a is now the most recently used
+    cache.put('d', 'D')
+    assert 'b' not in cache
+    assert [key for key in 'abcd' if key in cache] == ['a', 'c', 'd']
+
+    cache.put('c', 'C2')  # updating also refreshes
+    cache.put('e', 'E')
+    assert [key for key in 'acde' if key in cache] == ['c', 'd', 'e']
+    assert cache.get('c') == 'C2'
+    assert cache.stats() == {'size': 3, 'maxsize': 3, 'hits': 2, 'misses': 0, 'evictions': 2}
+
+
+def test_never_holds_more_than_maxsize():
+    cache = LRUCache(maxsize=10)
+    for i in range(100):
+        cache.put(i, i)
+        assert len(cache) == min(i + 1, 10)
+    assert [key for key in range(100) if key in cache] == list(range(90, 100))
+    assert cache.evictions == 90
+
+
+def test_counts_hits_and_misses():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('b', 'default') == 'default'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.clear()
+    assert len(cache) == 0 and cache.get('a') is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_zero_maxsize_stores_nothing():
+    cache = LRUCache(maxsize=0)
+    cache.put('a', 1)
+    assert len(cache) == 0 and cache.get('a') is None
+
+
+def test_negative_maxsize_is_rejected():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=-1)
+
+
+def test_concurrent_puts_stay_within_capacity():
+    cache = LRUCache(maxsize=50)
+
+    def fill(offset):
+        for i in range(2000):
+            cache.put((offset, i), i)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=fill, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 50
+    assert cache.evictions == 4 * 2000 - 50
@@ -0,0 +1,91 @@
+import json
+import os
+import random
+
+import pytest
+
+import compound_catalog
+from compound_catalog import load_catalog
+from compound_index import element_mask
+from compound_store import load_store
+from element_store import ElementStore
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+def element_table(**overrides):
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    elements = data['elements'] if isinstance(data, dict) else data
+    for element in elements:
+        element.update(overrides.get(element['symbol'], {}))
+    return ElementStore(elements).table
+
+
+def write_catalogue(path, compounds, mtime_ns):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(compounds, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def no_hashing(path, table):
+    raise AssertionError('catalogue was hashed')
+
+
+@pytest.mark.parametrize('load, name', [(load_catalog, 'compounds.snapshot'), (load_store, 'compounds.sqlite')])
+def test_catalogue_is_only_hashed_when_its_size_or_mtime_change(tmp_path, monkeypatch, load, name):
+    source, path = str(tmp_path / 'compounds.json'), str(tmp_path / name)
+    table = element_table()
+    write_catalogue(source, [{'name': 'Water', 'formula': 'H2O'}], 10**18)
+    assert load(source, path, table)[0]['name'] == 'Water'
+    built = os.stat(path).st_ino
+
+    # Touched but unchanged: hashed once, kept, and the new mtime recorded
+    os.utime(source, ns=(2 * 10**18, 2 * 10**18))
+    assert load(source, path, table).source_fingerprint.mtime_ns == 2 * 10**18
+    with monkeypatch.context() as m:
+        m.setattr(compound_catalog, 'source_fingerprint', no_hashing)
+        assert load(source, path, table)[0]['name'] == 'Water'
+    assert os.stat(path).st_ino == built
+
+    write_catalogue(source, [{'name': 'Wxter', 'formula': 'H2O'}], 3 * 10**18)
+    assert load(source, path, table)[0]['name'] == 'Wxter'
+
+
+def test_snapshot_rebuilds_when_element_data_changes(tmp_path):
+    source, snapshot = str(tmp_path / 'compounds.json'), str(tmp_path / 'compounds.snapshot')
+    write_catalogue(source, [{'name': 'Water', 'formula': 'H2O'}], 10**18)
+    water = load_catalog(source, snapshot, element_table())[0]
+    reweighed = load_catalog(source, snapshot, element_table(H={'atomic_mass': 2.014}))[0]
+    assert reweighed['molecular_mass'] > water['molecular_mass']
+
+
+def test_formable_compounds_agree_between_snapshot_and_sqlite(tmp_path):
+    table = element_table()
+    rng = random.Random(0)
+    numbers = [1, 6, 7, 8, 11, 16, 17, 26, 29]
+    compositions = [{number: rng.randint(1, 4) for number in rng.sample(numbers, rng.randint(1, 4))}
+                    for _ in range(300)]
+    source = tmp_path / 'compounds.json'
+    source.write_text(json.dumps([
+        {'name': f"Compound {i}",
+         'element_counts': {table.symbols[table.numbers.index(n)]: c for n, c in counts.items()}}
+        for i, counts in enumerate(compositions)]))
+    snapshot = load_catalog(str(source), str(tmp_path / 'compounds.snapshot'), table)
+    store = load_store(str(source), str(tmp_path / 'compounds.sqlite'), table)
+
+    for size in range(len(numbers) + 1):
+        wanted = rng.sample(numbers, size)
+        limits = {number: rng.randint(1, 4) for number in wanted}
+        usable = [i for i, counts in enumerate(compositions) if set(counts) <= set(wanted)]
+        within = [i for i in usable if all(c <= limits[n] for n, c in compositions[i].items())]
+        mask = element_mask(wanted)
+        assert snapshot.formable_indexes(mask) == store.formable_indexes(mask) == usable
+        assert snapshot.formable_indexes(mask, limits) == store.formable_indexes(mask, limits) == within
+
+
+@pytest.mark.parametrize('body', [[], ['H', 'O'], 'H', 3])
+def test_formable_endpoint_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.post('/api/compounds/formable', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,44 @@
+from compound_search import MAX_PREFIX_TERMS, CompoundSearchIndex, MappedSearchIndex
+
+
+def compound(name, uses=''):
+    return {'name': name, 'formula': '', 'category': '', 'uses': [uses], 'interesting_facts': []}
+
+
+def test_prefix_keeps_the_most_common_completions():
+    # Rare completions sort before the common one and outnumber the cap
+    rare = [compound(f"zinc{i:03d}") for i in range(MAX_PREFIX_TERMS * 2)]
+    common = [compound('Salt', 'zzz') for _ in range(3)]
+    index = CompoundSearchIndex(rare + common)
+    assert len(index._expand('z', True)) == MAX_PREFIX_TERMS
+    assert 'zzz' in index._expand('z', True)
+    found = {doc_id for _, doc_id in index.ranked('z', limit=1000)}
+    assert set(range(len(rare), len(rare) + 3)) <= found
+
+
+def test_new_documents_refresh_capped_prefixes():
+    index = CompoundSearchIndex(compound(f"zinc{i:03d}") for i in range(MAX_PREFIX_TERMS * 2))
+    assert 'zzz' not in index._expand('z', True)
+    index.add(compound('Zzz'))
+    index.add(compound('Zzz'))
+    assert 'zzz' in index._expand('z', True)
+
+
+def test_all_words_must_match_and_the_last_is_a_prefix():
+    index = CompoundSearchIndex([compound('Sodium Chloride', 'table salt'),
+                                 compound('Sodium Carbonate', 'glass'),
+                                 compound('Potassium Chloride', 'fertilizer salt')])
+    assert [doc_id for _, doc_id in index.ranked('sodium chlo')] == [0]
+    assert sorted(doc_id for _, doc_id in index.ranked('salt')) == [0, 2]
+    assert index.ranked('sodium xyz') == []
+
+
+
+def test_mapped_index_ranks_like_the_index_it_was_saved_from():
+    compounds = [compound(f"zinc{i:03d}", 'salt' if i % 3 else 'glass') for i in range(MAX_PREFIX_TERMS * 2)]
+    compounds += [compound('Sodium Chloride', 'table salt'), compound('Salt', 'zzz')]
+    index = CompoundSearchIndex(compounds)
+    mapped = MappedSearchIndex({name: memoryview(data) for name, data in index.sections().items()})
+    for query in ('z', 'zinc01', 'salt', 'sodium chlo', 'glass zi', 'xyz', ''):
+        assert mapped.ranked(query, limit=20) == index.ranked(query, limit=20)
+    assert MappedSearchIndex(CompoundSearchIndex().sections()).ranked('salt') == []
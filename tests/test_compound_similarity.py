@@ -0,0 +1,50 @@
+import json
+import os
+import random
+
+import pytest
+
+from compound_catalog import load_catalog
+from compound_similarity import CompositionIndex
+from compound_store import load_store
+from element_store import ElementStore
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+@pytest.fixture(scope='module')
+def catalogue(tmp_path_factory):
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    table = ElementStore(data['elements'] if isinstance(data, dict) else data).table
+    rng = random.Random(0)
+    symbols = ['H', 'C', 'N', 'O', 'Na', 'S', 'Cl', 'Fe', 'Cu']
+    compounds = [{'name': f"Compound {i}",
+                  'element_counts': {s: rng.randint(1, 4) for s in rng.sample(symbols, rng.randint(1, 4))}}
+                 for i in range(300)]
+    source = tmp_path_factory.mktemp('similarity') / 'compounds.json'
+    source.write_text(json.dumps(compounds))
+    return str(source), table
+
+
+def test_mapped_and_sqlite_indexes_match_the_in_memory_one(catalogue, tmp_path):
+    source, table = catalogue
+    snapshot = load_catalog(source, str(tmp_path / 'compounds.snapshot'), table)
+    store = load_store(source, str(tmp_path / 'compounds.sqlite'), table)
+    expected = CompositionIndex(snapshot.compositions())
+    indexes = (snapshot.similarity_index(), store.similarity_index())
+
+    rng = random.Random(1)
+    for _ in range(50):
+        pairs = [(number, rng.randint(1, 4)) for number in rng.sample([1, 6, 7, 8, 11, 16, 17, 26, 29, 30], 3)]
+        exclude = set(rng.sample(range(300), 20))
+        for index in indexes:
+            assert index.nearest(pairs, 10) == expected.nearest(pairs, 10)
+            assert index.nearest(pairs, 5, exclude) == expected.nearest(pairs, 5, exclude)
+
+
+@pytest.mark.parametrize('body', [[], ['H', 'O'], 'H2O', 3])
+def test_similar_endpoint_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.post('/api/compounds/similar', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
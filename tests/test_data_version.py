@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+
+import pytest
+
+import data_version
+from data_version import DataReloader
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(data_version.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text('1')
+    os.utime(path, ns=(10**18, 10**18))
+    return path
+
+
+def touch(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def check_until_reloaded(reloader, clock, checks=2):
+    """Run `checks` interval-spaced checks; True if one of them started a rebuild"""
+    started = False
+    for _ in range(checks):
+        clock.now += reloader.interval
+        started = reloader.check() or started
+    if reloader._thread is not None:
+        reloader._thread.join()
+    return started
+
+
+def test_an_mtime_change_swaps_in_a_new_snapshot(clock, data_file):
+    reloader = DataReloader({'value': 1}, lambda: {'value': int(data_file.read_text())},
+                            [str(data_file)], interval=2.0)
+    clock.now += 1
+    assert not reloader.check()  # within the interval
+    assert not check_until_reloaded(reloader, clock)  # nothing changed
+
+    touch(data_file, '2', 2 * 10**18)
+    clock.now += reloader.interval
+    assert not reloader.check()  # first sighting: wait for the change to settle
+    assert check_until_reloaded(reloader, clock, checks=1)
+    assert reloader.current == {'value': 2}
+    assert reloader.last_error is None
+    assert not check_until_reloaded(reloader, clock)
+
+
+def test_requests_keep_the_old_snapshot_until_the_swap(clock, data_file):
+    building, release = threading.Event(), threading.Event()
+
+    def build():
+        building.set()
+        release.wait(5)
+        return {'value': int(data_file.read_text())}
+
+    old = {'value': 1}
+    reloader = DataReloader(old, build, [str(data_file)], interval=2.0)
+    touch(data_file, '2', 2 * 10**18)
+    assert reloader.reload()
+    building.wait(5)
+    assert reloader.reloading
+    assert reloader.current is old
+    assert not reloader.reload()  # one rebuild at a time
+
+    release.set()
+    reloader._thread.join()
+    assert reloader.current == {'value': 2}
+    assert old == {'value': 1}
+
+
+def test_a_failed_rebuild_keeps_the_current_snapshot(clock, data_file):
+    def build():
+        return {'value': json.loads(data_file.read_text())['value']}
+
+    reloader = DataReloader({'value': 1}, build, [str(data_file)], interval=2.0)
+    touch(data_file, 'not json', 2 * 10**18)
+    assert check_until_reloaded(reloader, clock)
+    assert reloader.current == {'value': 1}
+    assert 'Expecting value' in reloader.last_error
+
+    # The failed version is not retried until the files change again
+    assert not check_until_reloaded(reloader, clock)
+    touch(data_file, '{"value": 3}', 3 * 10**18)
+    assert check_until_reloaded(reloader, clock)
+    assert reloader.current == {'value': 3}
+    assert reloader.last_error is None
+
+
+def test_a_change_during_a_rebuild_triggers_another(clock, data_file):
+    def build():
+        value = int(data_file.read_text())
+        if value == 2:
+            touch(data_file, '3', 3 * 10**18)
+        return {'value': value}
+
+    reloader = DataReloader({'value': 1}, build, [str(data_file)], interval=2.0)
+    touch(data_file, '2', 2 * 10**18)
+    assert check_until_reloaded(reloader, clock)
+    assert reloader.current == {'value': 2}
+    assert check_until_reloaded(reloader, clock)
+    assert reloader.current == {'value': 3}
+
+
+def test_a_zero_interval_never_checks(clock, data_file):
+    reloader = DataReloader({'value': 1}, lambda: {'value': 2}, [str(data_file)], interval=0)
+    touch(data_file, '2', 2 * 10**18)
+    clock.now += 100
+    assert not reloader.check()
+    assert not reloader.check()
+
+
+def test_the_app_serves_reloaded_compounds(tmp_path, monkeypatch, clock):
+    import app as app_module
+
+    source = tmp_path / 'compounds.json'
+    touch(source, json.dumps([{'name': 'Water', 'formula': 'H2O'}]), 10**18)
+    monkeypatch.setattr(app_module, 'COMPOUNDS_FILE', str(source))
+    monkeypatch.setattr(app_module, 'DATA_RELOAD_INTERVAL', 2.0)
+    monkeypatch.setenv('METRICS_ENABLED', '0')
+    monkeypatch.setenv('COMPOUNDS_SNAPSHOT', str(tmp_path / 'compounds.snapshot'))
+    app = app_module.create_app()
+    client = app.test_client()
+    reloader = app.extensions['data_reloader']
+    before = client.get('/health').get_json()['data_version']
+    assert [c['name'] for c in client.get('/api/compounds').get_json()] == ['Water']
+
+    touch(source, json.dumps([{'name': 'Ammonia', 'formula': 'NH3'}]), 2 * 10**18)
+    for _ in range(2):
+        clock.now += 2.0
+        client.get('/health')
+    reloader._thread.join()
+
+    assert [c['name'] for c in client.get('/api/compounds').get_json()] == ['Ammonia']
+    assert client.get('/health').get_json()['data_version'] != before
@@ -0,0 +1,82 @@
+import json
+import math
+import os
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from element_query import ElementQueryIndex, QueryError, query_from_args
+from element_store import ElementStore
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+@pytest.fixture(scope='module')
+def elements():
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    return data['elements'] if isinstance(data, dict) else data
+
+
+@pytest.fixture(scope='module')
+def index(elements):
+    return ElementQueryIndex(ElementStore(elements).table)
+
+
+def run(index, **args):
+    query = query_from_args(MultiDict({name: str(value) for name, value in args.items()}))
+    return [row['number'] for row in index.query(**dict(query, limit=118))['results']]
+
+
+def present(element, field):
+    value = element.get(field)
+    return value is not None and not (isinstance(value, float) and math.isnan(value))
+
+
+@pytest.mark.parametrize('field, low, high', [
+    ('number', 10, 20), ('atomic_mass', 50, 100.5), ('density', None, 1), ('melt', 1000, None),
+    ('boil', 300, 300), ('melt', 5000, 10),
+])
+def test_range_filters_match_a_scan(index, elements, field, low, high):
+    args = {f"{name}_{field}": value for name, value in (('min', low), ('max', high)) if value is not None}
+    expected = [e['number'] for e in elements if present(e, field)
+                and (low is None or e[field] >= low) and (high is None or e[field] <= high)]
+    assert run(index, **args) == expected
+
+
+def test_equality_filters_combine_with_ranges(index, elements):
+    expected = [e['number'] for e in elements
+                if e['period'] in (2, 3) and e['block'] == 'p' and e['atomic_mass'] > 20]
+    assert run(index, period='2,3', block='p', min_atomic_mass=20.0001) == expected
+    assert run(index, category='noble gas', phase='Gas') == [
+        e['number'] for e in elements if e['category'] == 'noble gas' and e['phase'] == 'Gas']
+    assert run(index, block='x') == []
+
+
+def test_sorting_keeps_missing_values_last(index, elements):
+    ascending = run(index, sort='density')
+    descending = run(index, sort='-density')
+    missing = [e['number'] for e in elements if not present(e, 'density')]
+    assert ascending[len(ascending) - len(missing):] == descending[len(descending) - len(missing):] == missing
+
+
+@pytest.mark.parametrize('args, message', [
+    ({'min_radius': 1}, "range on 'radius'"),
+    ({'max_group': 3}, "range on 'group'"),
+    ({'min_melt': 'hot'}, 'must be a number'),
+    ({'max_boil': 'nan'}, 'must be a number'),
+    ({'period': 'two'}, 'must be an integer'),
+    ({'sort': 'summary'}, 'Cannot sort'),
+    ({'fields': 'name,colour'}, 'Unknown fields: colour'),
+    ({'limit': 0}, "'limit'"),
+])
+def test_invalid_parameters_are_rejected(args, message):
+    with pytest.raises(QueryError, match=message):
+        query_from_args(MultiDict({name: str(value) for name, value in args.items()}))
+
+
+def test_query_endpoint_reports_invalid_parameters(client):
+    response = client.get('/api/elements/query?min_radius=1')
+    assert response.status_code == 400
+    assert 'radius' in response.get_json()['error']
+    assert client.get('/api/elements/query?min_number=1&max_number=3').get_json()['total'] == 3
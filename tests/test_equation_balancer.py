@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from equation_balancer import BalanceError, EquationBalancer, format_equation
+from formula_parser import FormulaParser
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+@pytest.fixture(scope='module')
+def balancer():
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    elements = data['elements'] if isinstance(data, dict) else data
+    return EquationBalancer(FormulaParser([e['symbol'] for e in elements]))
+
+
+@pytest.mark.parametrize('equation, balanced', [
+    ('KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2', '2KMnO4 + 16HCl → 2KCl + 2MnCl2 + 8H2O + 5Cl2'),
+    ('Cu + HNO3 -> Cu(NO3)2 + NO + H2O', '3Cu + 8HNO3 → 3Cu(NO3)2 + 2NO + 4H2O'),
+    ('C3H8+O2->CO2+H2O', 'C3H8 + 5O2 → 3CO2 + 4H2O'),
+    ('2H2 + O2 = 2H2O', '2H2 + O2 → 2H2O'),
+])
+def test_balances_redox_and_combustion_equations(balancer, equation, balanced):
+    assert format_equation(balancer.balance_equation(equation)) == balanced
+
+
+@pytest.mark.parametrize('equation, balanced', [
+    ('MnO4- + Fe^2+ + H+ -> Mn^2+ + Fe^3+ + H2O', 'MnO4- + 5Fe^2+ + 8H+ → Mn^2+ + 5Fe^3+ + 4H2O'),
+    ('Cr2O7^2- + H+ + I- -> Cr^3+ + I2 + H2O', 'Cr2O7^2- + 14H+ + 6I- → 2Cr^3+ + 3I2 + 7H2O'),
+    ('Fe^3+ + Cl- -> FeCl3', 'Fe^3+ + 3Cl- → FeCl3'),
+])
+def test_ionic_equations_conserve_charge(balancer, equation, balanced):
+    assert format_equation(balancer.balance_equation(equation)) == balanced
+
+
+@pytest.mark.parametrize('equation, message', [
+    ('NaCl -> H2O', 'cannot be balanced'),
+    ('H2O -> H2 + O2 + O3 + H2O2', 'more than one independent balance'),
+    ('H2 + O2 -> H2O2 + H2O', 'more than one independent balance'),
+    ('H2O -> H2O', 'only once'),
+    ('H2O + H2 -> O2', 'cannot be balanced'),
+    ('Na + Cl2 -> NaCl + Xy', 'Unknown element'),
+    ('H2 + O2', 'exactly one arrow'),
+])
+def test_unbalanceable_and_ambiguous_equations_raise(balancer, equation, message):
+    with pytest.raises(BalanceError, match=message):
+        balancer.balance_equation(equation)
+
+
+def test_reordered_equations_share_a_cached_result(balancer):
+    first = balancer.balance(['H2', 'O2'], ['H2O'])
+    second = balancer.balance(['O2', 'H2'], ['H2O'])
+    assert first.reactants == ((2, 'H2'), (1, 'O2'))
+    assert second.reactants == ((1, 'O2'), (2, 'H2'))
+
+
+@pytest.mark.parametrize('elements, reaction', [
+    (['O'], None), (['Fe', 'Fe'], None), (['S'] * 8, None),
+    (['Al', 'Br'], '2Al + 3Br2 → 2AlBr3'),
+])
+def test_formation_reactions_skip_single_elements(client, elements, reaction):
+    compound = client.post('/api/mix', json={'elements': elements}).get_json()['compound']
+    assert compound.get('formation_reaction') == reaction
+
+
+@pytest.mark.parametrize('path', ['/api/balance', '/api/balance/batch'])
+@pytest.mark.parametrize('body', [[], ['H2 + O2 -> H2O'], 'H2 + O2 -> H2O', 3])
+def test_balance_endpoints_reject_a_body_that_is_not_an_object(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,61 @@
+from formula_engine import FormulaEngine, preferred_states
+
+
+def balanced(symbols):
+    """{symbol: (state, count)} of the engine's formula for an element set"""
+    formula = FormulaEngine().balance(symbols)
+    return {symbol: (state, count) for symbol, state, count in formula.parts}
+
+
+def test_preferred_states():
+    assert preferred_states('Mn', [2, 3, 4, 6, 7]) == [7, 6, 4, 3, 2]
+    assert preferred_states('S', [2, 4, 6, -2]) == [6, 4, 2, -2]
+    assert preferred_states('Cl', [1, 3, 5, 7, -1]) == [-1, 1, 3, 5, 7]
+
+
+def test_oxoanions_take_the_highest_state():
+    assert balanced(['K', 'Mn', 'O']) == {'K': (1, 1), 'Mn': (7, 1), 'O': (-2, 4)}
+    assert balanced(['Na', 'S', 'O']) == {'Na': (1, 2), 'S': (6, 1), 'O': (-2, 4)}
+    assert balanced(['Ca', 'C', 'O']) == {'Ca': (2, 1), 'C': (4, 1), 'O': (-2, 3)}
+
+
+def test_halogens_stay_anions_next_to_fluorine_and_oxygen():
+    states = balanced(['F', 'Cl', 'Br', 'I', 'O', 'Na', 'K', 'Ca'])
+    assert {symbol: state for symbol, (state, _) in states.items() if state < 0} == {
+        'F': -1, 'Cl': -1, 'Br': -1, 'I': -1, 'O': -2}
+
+
+def test_binary_compounds():
+    assert balanced(['Na', 'Cl']) == {'Na': (1, 1), 'Cl': (-1, 1)}
+    assert balanced(['Al', 'O']) == {'Al': (3, 2), 'O': (-2, 3)}
+    assert balanced(['Fe', 'O']) == {'Fe': (3, 2), 'O': (-2, 3)}
+    assert balanced(['Na', 'S']) == {'Na': (1, 2), 'S': (-2, 1)}
+    assert balanced(['Na', 'H']) == {'Na': (1, 1), 'H': (-1, 1)}
+
+
+def test_hydrogen_compounds_put_the_negative_state_on_the_nonmetal():
+    assert balanced(['H', 'N']) == {'H': (1, 3), 'N': (-3, 1)}
+    assert balanced(['C', 'H']) == {'C': (-4, 1), 'H': (1, 4)}
+    assert balanced(['H', 'O']) == {'H': (1, 2), 'O': (-2, 1)}
+
+
+def test_nitrogen_takes_its_highest_state_only_with_oxygen():
+    assert balanced(['N', 'F']) == {'N': (3, 1), 'F': (-1, 3)}
+    assert balanced(['N', 'Cl']) == {'N': (3, 1), 'Cl': (-1, 3)}
+    assert balanced(['H', 'N', 'O']) == {'H': (1, 1), 'N': (5, 1), 'O': (-2, 3)}
+
+
+def test_nitrogen_next_to_hydrogen_forms_ammonium():
+    assert balanced(['H', 'N', 'Cl']) == {'H': (1, 4), 'N': (-3, 1), 'Cl': (-1, 1)}
+    assert balanced(['H', 'N', 'F']) == {'H': (1, 4), 'N': (-3, 1), 'F': (-1, 1)}
+
+
+def test_halogen_oxoacids():
+    assert balanced(['H', 'Cl', 'O']) == {'H': (1, 1), 'Cl': (1, 1), 'O': (-2, 1)}
+    assert balanced(['H', 'Br', 'O']) == {'H': (1, 1), 'Br': (1, 1), 'O': (-2, 1)}
+
+
+def test_unbalanceable_sets():
+    engine = FormulaEngine()
+    assert engine.balance(['Fe', 'Cu']) is None
+    assert engine.balance(['Na']) is None
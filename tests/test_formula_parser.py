@@ -0,0 +1,73 @@
+import pytest
+
+from formula_parser import FormulaError, FormulaParser
+
+parser = FormulaParser(['H', 'C', 'N', 'O', 'Na', 'S', 'Ca', 'Cu', 'Fe'])
+
+
+def parsed(formula):
+    result = parser.parse(formula)
+    return dict(result.counts), result.charge
+
+
+def test_groups_hydrates_and_charges():
+    assert parsed('Ca(OH)2') == ({'Ca': 1, 'O': 2, 'H': 2}, 0)
+    assert parsed('CuSO4·5H2O') == ({'Cu': 1, 'S': 1, 'O': 9, 'H': 10}, 0)
+    assert parsed('[Fe(CN)6]^3-') == ({'Fe': 1, 'C': 6, 'N': 6}, -3)
+    assert parsed('SO₄²⁻') == ({'S': 1, 'O': 4}, -2)
+    assert parsed('NH4+') == ({'N': 1, 'H': 4}, 1)
+    assert parsed('O--') == ({'O': 1}, -2)
+
+
+@pytest.mark.parametrize('formula', ['Na+-', 'Na-+', 'O--+', 'S+-+'])
+def test_mixed_sign_charges_are_rejected(formula):
+    with pytest.raises(FormulaError):
+        parser.parse(formula)
+
+
+@pytest.mark.parametrize('formula', ['H0', 'H2O0', 'Ca(OH)0', 'CuSO4·0H2O', '0H2O', 'H00', 'SO4^0-'])
+def test_zero_counts_are_rejected(formula):
+    with pytest.raises(FormulaError):
+        parser.parse(formula)
+
+
+def test_counts_beyond_the_token_table():
+    assert parsed('C60') == ({'C': 60}, 0)
+    assert parsed('Na2SO4·30H2O') == ({'Na': 2, 'S': 1, 'O': 34, 'H': 60}, 0)
+    assert parsed('(CH2)40') == ({'C': 40, 'H': 80}, 0)
+
+
+@pytest.mark.parametrize('formula', ['2', '+', '(2H)', 'H+O', 'H2^2-O', 'H2(2O)', 'Xx2', 'h2o'])
+def test_misplaced_numbers_and_charges_are_rejected(formula):
+    with pytest.raises(FormulaError):
+        parser.parse(formula)
+
+
+@pytest.mark.parametrize('path', ['/api/formula', '/api/formula/batch'])
+@pytest.mark.parametrize('body', [[], ['H2O'], 'H2O', 3])
+def test_formula_endpoints_reject_a_body_that_is_not_an_object(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('formula', ['Fe 3', 'Na Cl', 'H2 O', 'Ca(OH) 2', 'SO4 ^2-', 'H2O\t2'])
+def test_internal_whitespace_is_rejected(formula):
+    with pytest.raises(FormulaError, match='Whitespace'):
+        parser.parse(formula)
+
+
+def test_surrounding_whitespace_is_ignored():
+    assert parsed('  H2O\n') == ({'H': 2, 'O': 1}, 0)
+    assert parsed(' NH4+ ') == ({'N': 1, 'H': 4}, 1)
+
+
+@pytest.mark.parametrize('formula', ['H999999999', 'C100000', '(H2O)100000', '100000H2O', 'SO4^100000-',
+                                     'H' + '9' * 5000])
+def test_counts_above_the_maximum_are_rejected(formula):
+    with pytest.raises(FormulaError, match='exceeds'):
+        parser.parse(formula)
+
+
+def test_counts_up_to_the_maximum_are_accepted():
+    assert parsed('C99999H2') == ({'C': 99999, 'H': 2}, 0)
@@ -0,0 +1,42 @@
+import os
+import shutil
+
+from metrics import RETIRED_FILE, Metrics, retire
+
+
+def request_count(metrics):
+    return sum(int(line.rsplit(' ', 1)[1]) for line in metrics.render().splitlines()
+               if line.startswith('chemcraft_http_requests_total{'))
+
+
+def record(metrics, n):
+    for _ in range(n):
+        metrics.observe_request('index', 'GET', 200, 0.001, 100)
+
+
+def test_retired_totals_are_kept_and_the_file_removed(tmp_path):
+    worker = Metrics(directory=str(tmp_path))
+    record(worker, 3)
+    worker.flush()
+    retire(str(tmp_path), os.getpid())
+    assert sorted(os.listdir(tmp_path)) == [RETIRED_FILE]
+
+    retire(str(tmp_path), os.getpid())  # nothing left to retire
+    replacement = Metrics(directory=str(tmp_path))
+    record(replacement, 2)
+    assert request_count(replacement) == 5
+    assert replacement.render().count('chemcraft_http_requests_total{') == 1
+
+
+def test_a_scrape_racing_retirement_counts_the_worker_once(tmp_path):
+    directory = str(tmp_path)
+    worker = Metrics(directory=directory)
+    record(worker, 4)
+    worker.flush()
+    # A scrape that read the worker's file before it was merged and removed
+    shutil.copy(os.path.join(directory, f"metrics-{os.getpid()}.json"),
+                os.path.join(directory, 'metrics-1.json'))
+    retire(directory, os.getpid())
+
+    scraper = Metrics(directory=directory)
+    assert request_count(scraper) == 4
@@ -0,0 +1,15 @@
+import pytest
+
+
+def test_batch_results_keep_input_order(client):
+    combinations = [['H', 'H', 'O'], ['Na', 'Cl'], ['Xx'], ['H', 'O', 'H']]
+    results = client.post('/api/mix/batch', json={'combinations': combinations}).get_json()['results']
+    assert [r['compound']['formula'] for r in results if r['success']] == ['H2O', 'NaCl', 'H2O']
+    assert results[2] == {'success': False, 'error': 'Unknown element: Xx'}
+
+
+@pytest.mark.parametrize('body', [[], [['H', 'O']], 'H2O', 3])
+def test_batch_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.post('/api/mix/batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,16 @@
+import logging
+
+import app
+
+
+def test_fingerprint_follows_the_generator_code(monkeypatch):
+    elements = app.load_elements(logging.getLogger(__name__))
+    before = app.mix_table_fingerprint(elements)
+    assert app.mix_table_fingerprint(elements) == before
+
+    monkeypatch.setitem(app.ANION_NAMES, 'O', 'Oxyde')
+    assert app.mix_table_fingerprint(elements) != before
+    monkeypatch.undo()
+
+    monkeypatch.setattr(app, 'MIX_TABLE_GENERATOR', app.MIX_TABLE_GENERATOR + (app.copy_compound,))
+    assert app.mix_table_fingerprint(elements) != before
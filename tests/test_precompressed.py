@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, request
+
+import precompressed
+from precompressed import PrecompressedJSON
+
+BODY = json.dumps([{'number': n, 'name': f"Element {n}"} for n in range(200)])
+
+
+@pytest.fixture
+def respond():
+    app = Flask(__name__)
+
+    def respond(payload, **headers):
+        with app.test_request_context(headers=headers):
+            return payload.make_response(request)
+    return respond
+
+
+def test_serves_gzip_to_clients_that_accept_it(respond):
+    response = respond(PrecompressedJSON(BODY), **{'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode() == BODY
+    assert 'Accept-Encoding' in response.vary
+
+
+@pytest.mark.parametrize('accept', [None, 'identity', 'gzip;q=0', 'deflate'])
+def test_serves_the_plain_body_otherwise(respond, accept):
+    headers = {'Accept-Encoding': accept} if accept else {}
+    response = respond(PrecompressedJSON(BODY), **headers)
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == BODY
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_serves_brotli_when_it_is_smaller(respond):
+    brotli = pytest.importorskip('brotli')
+    payload = PrecompressedJSON(BODY)
+    response = respond(payload, **{'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()).decode() == BODY
+
+
+def test_without_brotli_only_gzip_is_kept(respond, monkeypatch):
+    monkeypatch.setattr(precompressed, 'brotli', None)
+    payload = PrecompressedJSON(BODY)
+    assert set(payload.variants) == {'gzip'}
+    assert respond(payload, **{'Accept-Encoding': 'br, gzip'}).headers['Content-Encoding'] == 'gzip'
+
+
+def test_matching_etag_gets_304_with_vary(respond):
+    payload = PrecompressedJSON(BODY)
+    response = respond(payload, **{'If-None-Match': f'"{payload.etag}"', 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == f'"{payload.etag}"'
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_elements_endpoint_is_served_precompressed(client):
+    plain = client.get('/api/elements')
+    compressed = client.get('/api/elements', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+    assert 'Accept-Encoding' in compressed.headers['Vary']
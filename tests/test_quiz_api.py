@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from quiz_engine import QuizEngine
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+def test_a_seeded_question_cannot_be_rebuilt_offline(client):
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    offline = QuizEngine(data['elements'] if isinstance(data, dict) else data)
+
+    for seed in range(20):
+        served = client.get(f'/api/quiz/random?seed={seed}').get_json()
+        assert client.get(f'/api/quiz/random?seed={seed}').get_json()['question'] == served['question']
+        guess = offline.question(seed=seed)
+        assert (guess['question'], guess['answers']) != (served['question'], served['answers'])
+
+        check = client.post('/api/quiz/check', json={'token': served['token'], 'answer_index': 0}).get_json()
+        assert check['correct_answer'] == served['answers'][check['correct_index']]
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'x', 3])
+def test_check_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.post('/api/quiz/check', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def sequences_in_forks(produce, forks=2):
+    """What produce() returns in each of `forks` forked children"""
+    results = []
+    for _ in range(forks):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_end)
+                os.write(write_end, json.dumps(produce()).encode('utf-8'))
+            finally:
+                os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end, 'rb') as f:
+            results.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_workers_ask_different_questions():
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    engine = QuizEngine(data['elements'] if isinstance(data, dict) else data)
+
+    first, second = sequences_in_forks(lambda: [engine.question()['question'] for _ in range(20)])
+    assert first != second
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_workers_issue_different_quiz_tokens(client):
+    client.get('/api/quiz/random')
+
+    first, second = sequences_in_forks(
+        lambda: [client.get('/api/quiz/random').get_json()['token'] for _ in range(5)])
+    assert not set(first) & set(second)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_a_seeded_engine_repeats_its_sequence_after_fork():
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    engine = QuizEngine(data['elements'] if isinstance(data, dict) else data, seed='fixed')
+
+    first, second = sequences_in_forks(lambda: [engine.question()['question'] for _ in range(20)])
+    assert first == second
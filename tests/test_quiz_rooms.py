@@ -0,0 +1,267 @@
+import asyncio
+import time
+
+import pytest
+
+import quiz_rooms
+from quiz_rooms import HIGH_WATER, MAX_BACKLOG, Room, RoomError, RoomHub, Subscriber
+
+
+class FixedQuiz:
+    """Questions whose correct answer is always at index 1"""
+
+    def __init__(self):
+        self.asked = 0
+
+    def question(self):
+        self.asked += 1
+        return {'question': f"Question {self.asked}?", 'answers': ['A', 'B', 'C', 'D'],
+                'correct_index': 1, 'explanation': 'Because B.'}
+
+
+class FakeTransport:
+    def __init__(self):
+        self.written = []
+        self.buffered = 0
+        self.aborted = False
+
+    def set_write_buffer_limits(self, high=None):
+        self.high = high
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def write(self, data):
+        self.written.append(data)
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.drained = asyncio.Event()
+
+    async def drain(self):
+        await self.drained.wait()
+        self.transport.buffered = 0
+
+
+def events(subscriber):
+    return [frame.split(b'\n', 1)[0].decode()[len('event: '):] for frame in subscriber.writer.transport.written]
+
+
+def run(test):
+    """Run an async test body on a fresh event loop (rooms schedule timers on the running loop)"""
+    return asyncio.run(test())
+
+
+def test_join_normalizes_names_and_enforces_limits():
+    async def test():
+        room = Room('ABCDEF', FixedQuiz(), questions=1, max_participants=2)
+        token = room.join('  Ada \n Lovelace with a very long surname  ')
+        assert room.participant(token).name == 'Ada Lovelace with a very'
+        with pytest.raises(RoomError, match='name is required') as error:
+            room.join('   ')
+        assert error.value.status == 400
+        room.join('Grace')
+        with pytest.raises(RoomError, match='full') as error:
+            room.join('Edsger')
+        assert error.value.status == 409
+        with pytest.raises(RoomError) as error:
+            room.participant('nobody')
+        assert error.value.status == 403
+        room.close()
+    run(test)
+
+
+def test_a_quiz_runs_from_lobby_to_finished():
+    async def test():
+        room = Room('ABCDEF', FixedQuiz(), questions=2, seconds=20)
+        ada, grace, edsger = room.join('Ada'), room.join('Grace'), room.join('Edsger')
+        with pytest.raises(RoomError, match='not open'):
+            room.answer(ada, 1, 1)
+
+        room.advance()
+        assert room.phase == 'question' and room.number == 1
+        assert 'correct_index' not in room.status()['question']
+        with pytest.raises(RoomError, match='answer positions'):
+            room.answer(ada, 1, 4)
+        with pytest.raises(RoomError, match='answer positions'):
+            room.answer(ada, 1, True)
+        with pytest.raises(RoomError, match='not open'):
+            room.answer(ada, 2, 1)
+        room.answer(ada, 1, 1)
+        with pytest.raises(RoomError, match='Already answered') as error:
+            room.answer(ada, 1, 1)
+        assert error.value.status == 409
+        room.answer(grace, 1, 0)
+        assert room.phase == 'question'
+        room.answer(edsger, 1, 1)
+
+        # Everyone answered, so the question closed by itself
+        assert room.phase == 'reveal'
+        assert room.reveal['answer_counts'] == [1, 2, 0, 0]
+        assert room.reveal['correct_answer'] == 'B'
+        scores = {p['name']: p for p in room.leaderboard}
+        assert scores['Ada']['score'] > quiz_rooms.BASE_POINTS and scores['Grace']['score'] == 0
+        assert scores['Grace']['rank'] == 3
+
+        room.advance()
+        room.advance()  # the host reveals before everyone answered
+        assert room.phase == 'finished'
+        assert room.participant(ada).correct == 1
+        with pytest.raises(RoomError, match='finished'):
+            room.advance()
+        with pytest.raises(RoomError, match='finished'):
+            room.join('Late')
+    run(test)
+
+
+def test_tied_scores_share_a_rank():
+    async def test():
+        room = Room('ABCDEF', FixedQuiz(), questions=1)
+        first, second, third = room.join('A'), room.join('B'), room.join('C')
+        room.advance()
+        room.answer(first, 1, 0)
+        room.answer(second, 1, 0)
+        room.advance()
+        assert [(p['name'], p['rank']) for p in room.leaderboard] == [('A', 1), ('B', 1), ('C', 1)]
+    run(test)
+
+
+def test_a_question_closes_when_its_time_is_up():
+    async def test():
+        room = Room('ABCDEF', FixedQuiz(), questions=3, seconds=0.05)
+        room.join('Ada')
+        room.advance()
+        await asyncio.sleep(0.1)
+        assert room.phase == 'reveal' and room.reveal['answered'] == 0
+    run(test)
+
+
+def test_only_the_host_token_is_accepted():
+    room = Room('ABCDEF', FixedQuiz())
+    room.check_host(room.host_token)
+    for token in ('wrong', None, 123):
+        with pytest.raises(RoomError) as error:
+            room.check_host(token)
+        assert error.value.status == 403
+
+
+def test_subscribers_get_the_state_then_every_broadcast(monkeypatch):
+    monkeypatch.setattr(quiz_rooms, 'PROGRESS_INTERVAL', 0.01)
+
+    async def test():
+        room = Room('ABCDEF', FixedQuiz(), questions=1)
+        subscriber = Subscriber(FakeWriter())
+        room.subscribe(subscriber)
+        room.join('Ada')
+        room.join('Grace')
+        await asyncio.sleep(0.05)
+        room.advance()
+        room.advance()
+        assert events(subscriber) == ['state', 'progress', 'question', 'reveal', 'finished']
+
+        # A second subscriber catches up from the cached state
+        late = Subscriber(FakeWriter())
+        room.subscribe(late)
+        assert events(late) == ['state']
+        assert b'"phase":"finished"' in late.writer.transport.written[0]
+        assert room.frames_sent == 6
+        room.close()
+        assert subscriber.writer.transport.aborted and late.writer.transport.aborted
+    run(test)
+
+
+def test_a_lagging_subscriber_queues_and_coalesces_keyed_frames():
+    async def test():
+        writer = FakeWriter()
+        subscriber = Subscriber(writer)
+        subscriber.send(b'first')
+        writer.transport.buffered = HIGH_WATER + 1
+        subscriber.send(b'progress 1', key='progress')
+        subscriber.send(b'question')
+        subscriber.send(b'progress 2', key='progress')
+        assert subscriber.lagging
+        assert [frame for frame, _ in subscriber.backlog] == [b'question', b'progress 2']
+        assert writer.transport.written == [b'first']
+
+        writer.drained.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert writer.transport.written == [b'first', b'question', b'progress 2']
+        assert not subscriber.lagging and subscriber.backlog_bytes == 0
+    run(test)
+
+
+def test_a_subscriber_that_falls_too_far_behind_is_dropped():
+    async def test():
+        room = Room('ABCDEF', FixedQuiz())
+        writer = FakeWriter()
+        subscriber = Subscriber(writer)
+        room.subscribe(subscriber)
+        writer.transport.buffered = HIGH_WATER + 1
+        frame = b'x' * 1024
+        for _ in range(MAX_BACKLOG // len(frame)):
+            subscriber.send(frame)
+        assert not subscriber.closed
+        subscriber.send(frame)
+        assert subscriber.closed and subscriber.dropped and writer.transport.aborted
+        assert subscriber.backlog_bytes == 0
+
+        subscriber.send(b'ignored')
+        assert not subscriber.backlog
+        room.unsubscribe(subscriber)
+        assert room.dropped_subscribers == 1
+    run(test)
+
+
+def test_hub_validates_new_rooms():
+    hub = RoomHub(FixedQuiz())
+    for questions, seconds in ((0, 20), (51, 20), ('5', 20), (5, 4), (5, 121), (5, '20')):
+        with pytest.raises(RoomError) as error:
+            hub.create(questions, seconds)
+        assert error.value.status == 400
+    room = hub.create(5, 30)
+    assert len(room.code) == quiz_rooms.ROOM_CODE_LENGTH
+    assert hub.get(room.code.lower()) is room
+    with pytest.raises(RoomError) as error:
+        hub.get('NOROOM')
+    assert error.value.status == 404
+
+
+def test_hub_expires_idle_rooms_to_make_space():
+    async def test():
+        hub = RoomHub(FixedQuiz(), max_rooms=2, room_ttl=60)
+        idle, busy = hub.create(), hub.create()
+        subscriber = Subscriber(FakeWriter())
+        idle.subscribe(subscriber)
+        with pytest.raises(RoomError, match='Too many') as error:
+            hub.create()
+        assert error.value.status == 503
+
+        idle.last_active = time.monotonic() - 61
+        third = hub.create()
+        assert set(hub.rooms) == {busy.code, third.code}
+        assert subscriber.closed
+
+        hub.expire()
+        assert len(hub.rooms) == 2
+    run(test)
+
+
+def test_hub_heartbeat_and_stats():
+    async def test():
+        hub = RoomHub(FixedQuiz())
+        room = hub.create()
+        room.join('Ada')
+        subscriber = Subscriber(FakeWriter())
+        room.subscribe(subscriber)
+        hub.heartbeat()
+        assert subscriber.writer.transport.written[-1] == quiz_rooms.HEARTBEAT
+        assert hub.stats() == {'rooms': 1, 'participants': 1, 'subscribers': 1, 'lagging_subscribers': 0,
+                               'dropped_subscribers': 0, 'frames_sent': 1}
+        room.close()
+    run(test)
@@ -0,0 +1,181 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+from quiz_rooms import RoomHub
+from room_server import MAX_BODY_SIZE, MAX_HEADER_SIZE, RoomServer, load_quiz
+
+
+@pytest.fixture(scope='module')
+def quiz():
+    return load_quiz(seed=0)
+
+
+@contextlib.asynccontextmanager
+async def serving(hub):
+    """The port of a RoomServer for `hub` listening on localhost"""
+    room_server = RoomServer(hub)
+    server = await asyncio.start_server(room_server.handle, '127.0.0.1', 0, limit=MAX_HEADER_SIZE)
+    async with server:
+        yield server.sockets[0].getsockname()[1]
+        await room_server.close()
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = {name.lower(): value.strip() for name, _, value in (line.partition(':') for line in lines[1:] if line)}
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers, json.loads(body) if body else None
+
+
+def encode(method, path, payload=None, headers=()):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode() if payload is not None else b''
+    head = [f"{method} {path} HTTP/1.1", 'Host: localhost', f"Content-Length: {len(body)}", *headers]
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def call(port, method, path, payload=None, headers=()):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(encode(method, path, payload, headers))
+        return await read_response(reader)
+    finally:
+        writer.close()
+
+
+async def read_event(reader):
+    """(event, data) of the next SSE frame, skipping the retry hint and comments"""
+    while True:
+        frame = (await reader.readuntil(b'\n\n')).decode()
+        fields = dict(line.split(': ', 1) for line in frame.strip().split('\n') if ': ' in line)
+        if 'event' in fields:
+            return fields['event'], json.loads(fields['data'])
+
+
+def test_a_room_plays_out_over_http_and_its_event_stream(quiz):
+    async def test():
+        async with serving(RoomHub(quiz)) as port:
+            status, _, created = await call(port, 'POST', '/rooms', {'questions': 1, 'seconds': 30})
+            assert status == 201
+            room, host = created['room'], created['host_token']
+            status, _, joined = await call(port, 'POST', f'/rooms/{room}/join', {'name': 'Ada'})
+            assert status == 201
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(encode('GET', f'/rooms/{room.lower()}/events'))
+            head = await reader.readuntil(b'\r\n\r\n')
+            assert b'200 OK' in head and b'text/event-stream' in head
+            event, state = await read_event(reader)
+            assert (event, state['phase'], state['participants']) == ('state', 'lobby', 1)
+
+            assert (await call(port, 'POST', f'/rooms/{room}/next', {'host_token': host}))[2]['phase'] == 'question'
+            event, question = await read_event(reader)
+            assert event == 'question' and question['number'] == 1 and len(question['answers']) == 4
+
+            status, _, accepted = await call(port, 'POST', f'/rooms/{room}/answer',
+                                             {'token': joined['token'], 'question': 1, 'answer_index': 0})
+            assert (status, accepted) == (200, {'accepted': True})
+            event, reveal = await read_event(reader)
+            assert event == 'reveal' and reveal['answered'] == 1
+            assert (await read_event(reader))[0] == 'finished'
+
+            status, _, me = await call(port, 'GET', f"/rooms/{room}/me?token={joined['token']}")
+            assert status == 200 and me['name'] == 'Ada' and me['rank'] == 1
+            status, _, health = await call(port, 'GET', '/health')
+            assert health['rooms'] == 1 and health['subscribers'] == 1
+
+            writer.close()
+            await asyncio.sleep(0.05)
+            assert (await call(port, 'GET', '/health'))[2]['subscribers'] == 0
+    asyncio.run(test())
+
+
+def test_requests_share_a_keep_alive_connection_until_close(quiz):
+    async def test():
+        async with serving(RoomHub(quiz)) as port:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(encode('GET', '/health') + encode('GET', '/health', headers=['Connection: close']))
+            first, second = await read_response(reader), await read_response(reader)
+            assert first[0] == second[0] == 200
+            assert first[1]['connection'] == 'keep-alive' and second[1]['connection'] == 'close'
+            assert await reader.read() == b''
+            writer.close()
+    asyncio.run(test())
+
+
+@pytest.mark.parametrize('method, path, payload, status', [
+    ('GET', '/nowhere', None, 404),
+    ('GET', '/rooms/NOROOM', None, 404),
+    ('GET', '/rooms', None, 405),
+    ('GET', '/rooms/ABCDEF/join', None, 405),
+    ('POST', '/rooms/ABCDEF/events', None, 405),
+    ('DELETE', '/rooms/ABCDEF', None, 405),
+    ('POST', '/rooms', b'not json', 400),
+    ('POST', '/rooms', [1, 2], 400),
+    ('POST', '/rooms', {'questions': 0}, 400),
+    ('OPTIONS', '/rooms/ABCDEF/answer', None, 204),
+])
+def test_dispatch_checks_routes_methods_and_bodies(quiz, method, path, payload, status):
+    async def test():
+        async with serving(RoomHub(quiz)) as port:
+            response_status, headers, body = await call(port, method, path, payload)
+            assert response_status == status
+            assert headers['access-control-allow-origin']
+            if status != 204:
+                assert 'error' in body
+    asyncio.run(test())
+
+
+def test_room_actions_check_tokens(quiz):
+    async def test():
+        async with serving(RoomHub(quiz)) as port:
+            room = (await call(port, 'POST', '/rooms', {}))[2]['room']
+            assert (await call(port, 'POST', f'/rooms/{room}/next', {'host_token': 'guess'}))[0] == 403
+            assert (await call(port, 'GET', f'/rooms/{room}/me?token=guess'))[0] == 403
+            assert (await call(port, 'POST', f'/rooms/{room}/answer',
+                               {'token': 'guess', 'question': 1, 'answer_index': 0}))[0] == 403
+            assert (await call(port, 'POST', f'/rooms/{room}/join', {}))[0] == 400
+    asyncio.run(test())
+
+
+@pytest.mark.parametrize('request_bytes, status', [
+    (encode('POST', '/rooms', b'{}', headers=[f"X-Padding: {'a' * MAX_HEADER_SIZE}"]), 431),
+    (encode('POST', '/rooms').replace(b'Content-Length: 0', f"Content-Length: {MAX_BODY_SIZE + 1}".encode()), 413),
+    (encode('POST', '/rooms').replace(b'Content-Length: 0', b'Content-Length: -1'), 413),
+    (encode('POST', '/rooms').replace(b'Content-Length: 0', b'Content-Length: many'), 400),
+    (b'NONSENSE\r\n\r\n', 400),
+])
+def test_oversized_and_malformed_requests_are_refused(quiz, request_bytes, status):
+    async def test():
+        async with serving(RoomHub(quiz)) as port:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request_bytes)
+            response_status, headers, body = await read_response(reader)
+            assert response_status == status and 'error' in body
+            assert headers['connection'] == 'close'
+            assert await reader.read() == b''
+            writer.close()
+    asyncio.run(test())
+
+
+def test_closing_the_server_drops_open_streams(quiz):
+    async def test():
+        hub = RoomHub(quiz)
+        room = hub.create()
+        room_server = RoomServer(hub)
+        server = await asyncio.start_server(room_server.handle, '127.0.0.1', 0, limit=MAX_HEADER_SIZE)
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+            writer.write(encode('GET', f'/rooms/{room.code}/events'))
+            await reader.readuntil(b'\r\n\r\n')
+            assert (await read_event(reader))[0] == 'state'
+            await room_server.close()
+            assert not room_server.connections and not room.subscribers
+            with contextlib.suppress(ConnectionError):
+                assert await reader.read() == b''
+            writer.close()
+    asyncio.run(test())
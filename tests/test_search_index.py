@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from search_index import EXACT_NUMBER, EXACT_SYMBOL, NAME_PREFIX, NUMBER_PREFIX, ElementSearchIndex
+
+ELEMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'elements.json')
+
+
+@pytest.fixture(scope='module')
+def index():
+    with open(ELEMENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    return ElementSearchIndex(data['elements'] if isinstance(data, dict) else data)
+
+
+def test_atomic_numbers_match_by_prefix(index):
+    ranked = index.ranked('1', limit=200)
+    assert ranked[0] == (EXACT_NUMBER, 1)
+    assert [number for _, number in ranked[1:]] == list(range(10, 20)) + list(range(100, 119))
+    assert {tier for tier, _ in ranked[1:]} == {NUMBER_PREFIX}
+
+
+def test_longer_and_unmatched_numbers(index):
+    assert index.ranked('11', limit=200) == [(EXACT_NUMBER, 11)] + [(NUMBER_PREFIX, n) for n in range(110, 119)]
+    assert index.ranked('119') == []
+    assert index.ranked('0') == []
+
+
+def test_names_and_symbols(index):
+    assert index.ranked('fe', limit=1) == [(EXACT_SYMBOL, 26)]
+    assert index.ranked('carb') == [(NAME_PREFIX, 6)]
+    assert [e['symbol'] for e in index.search('sodim', fuzzy=True)] == ['Na']